@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+import tempfile
+from alembic.util import AutogenerateDiffsDetected
+from sqlalchemy import create_engine
+from .core.migrations import upgrade_database, check_drift
+
+def check_migrations(url: str) -> bool:
+    """
+    Migrates an empty database to head and compares it with the models.
+    Returns False (and prints the differences) when they have drifted, which
+    means a model changed without a matching `alembic revision --autogenerate`.
+    """
+    engine = create_engine(url)
+    try:
+        upgrade_database(engine)
+        check_drift(engine)
+    except AutogenerateDiffsDetected as exc:
+        print(exc)
+        return False
+    finally:
+        engine.dispose()
+    print("Models and migrations are in sync.")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail when models and migrations drift (for CI).")
+    parser.add_argument(
+        "--url",
+        help="Empty scratch database to migrate, e.g. a throwaway Postgres (defaults to a temporary SQLite file)",
+    )
+    args = parser.parse_args()
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'check.db')}"
+    sys.exit(0 if check_migrations(url) else 1)
@@ -0,0 +1,22 @@
+from .database import SessionLocal
+from .models import user, company, offer, application  # noqa: F401
+from .core.search import prune_cv_documents
+from .core.storage import cv_storage
+
+def collect_uploads():
+    """
+    Deletes stored CVs no user references any more, including files left by the
+    old per-user naming scheme and abandoned temp files, and the text extracted
+    from them. Safe to run from cron.
+    """
+    db = SessionLocal()
+    try:
+        removed = cv_storage.collect_garbage(db)
+        pruned = prune_cv_documents(db)
+        db.commit()
+        print(f"Removed {removed} unreferenced upload(s) and {pruned} CV text document(s)")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    collect_uploads()
@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from sqlalchemy import case, event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from .config import settings
+from .events import on_signal, publish_signal
+from .sql import conflict_insert
+from ..models.catalog_state import CatalogState
+
+# Response cache and conditional GET for the public offer catalog.
+# GET /offers/, GET /offers/facets and GET /offers/{id} responses are kept as
+# serialized bytes, keyed by path and normalized query string, together with a
+# strong ETag (hash of the body). Every entry is tagged with the catalog version it was rendered
+# at. The version lives in the catalog_state row, shared by every worker:
+# offer writes call touch_catalog() inside their transaction, which bumps it,
+# and once the transaction commits a "catalog" signal (core.events) tells
+# every worker to move to the new version, so older entries are never served
+# again. The row also holds the time of the last change, the Last-Modified of
+# every catalog response on every worker. Entries expire after
+# CATALOG_CACHE_TTL and the row is re-read as often, which bounds staleness
+# when a signal is missed (listener reconnecting, a write from a CLI).
+# Clients revalidating with If-None-Match / If-Modified-Since get a 304.
+
+_CATALOG_PATH = re.compile(r"^/offers/(\d+|facets)?$")
+logger = logging.getLogger(__name__)
+
+
+def _epoch(timestamp: datetime) -> float:
+    # SQLite hands timezone-aware columns back naive, in UTC
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def read_catalog_state(db: Session) -> Optional[Tuple[int, float]]:
+    """(version, last modified as epoch seconds) of the shared catalog, None before the migration."""
+    row = db.get(CatalogState, 1)
+    return None if row is None else (row.version, _epoch(row.modified_at))
+
+
+class CatalogCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Until the shared state is read, on the first catalog request
+        self.version = 0
+        self.last_modified = time.time()
+        self.loaded = False
+        self.checked_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bytes_from_cache = 0
+        self.bytes_not_sent = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def advance(self, version: int, last_modified: float):
+        """Moves to the shared catalog `version`; a signal or re-read older than the current one is ignored."""
+        with self._lock:
+            if self.loaded and version <= self.version:
+                return
+            self.version = version
+            self.last_modified = last_modified
+            self.loaded = True
+            self._entries.clear()
+
+    def check_due(self) -> bool:
+        """True once per CATALOG_CACHE_TTL: the caller should re-read the shared state."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self.checked_at < self.ttl:
+                return False
+            self.checked_at = now
+            return True
+
+    def refresh(self, session_factory: Callable[[], Session]):
+        try:
+            with session_factory() as db:
+                state = read_catalog_state(db)
+        except Exception:
+            # Keep serving what is cached, entries still expire; retried after the next TTL
+            logger.warning("catalog state re-read failed", exc_info=True)
+            return
+        if state is not None:
+            self.advance(*state)
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Returns (headers, body, etag) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.version or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2:]
+
+    def put(self, key: str, version: int, headers: List[Tuple[bytes, bytes]], body: bytes, etag: str):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if version != self.version:
+                # Rendered from data older than the catalog now is
+                return
+            self._entries[key] = (version, time.monotonic() + self.ttl, headers, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def record_served(self, size: int, not_modified: bool):
+        with self._lock:
+            if not_modified:
+                self.not_modified += 1
+                self.bytes_not_sent += size
+            else:
+                self.bytes_from_cache += size
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "not_modified": self.not_modified,
+            "bytes_served_from_cache": self.bytes_from_cache,
+            "bytes_not_sent": self.bytes_not_sent,
+        }
+
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_SIZE, settings.CATALOG_CACHE_TTL)
+on_signal("catalog", lambda fields: catalog_cache.advance(fields["version"], fields["modified"]))
+
+
+def touch_catalog(db: Session):
+    """
+    Bumps the shared catalog version in the current transaction. Every
+    worker's cache moves on when it commits.
+    """
+    if "catalog_changed" in db.info:
+        return
+    now = datetime.now(timezone.utc)
+    table = CatalogState.__table__
+    stmt = conflict_insert(db, CatalogState).values(id=1, version=1, modified_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        # Never backwards, whatever the clocks of the writing hosts
+        set_={"version": table.c.version + 1,
+              "modified_at": case((table.c.modified_at > now, table.c.modified_at), else_=now)},
+    )
+    version, modified_at = db.execute(stmt.returning(table.c.version, table.c.modified_at)).one()
+    db.info["catalog_changed"] = (version, _epoch(modified_at))
+    publish_signal(db, "catalog", version=version, modified=_epoch(modified_at))
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_catalog_version(session):
+    # The signal reaches this worker too; moving now also covers the writer's next read
+    changed = session.info.pop("catalog_changed", None)
+    if changed:
+        catalog_cache.advance(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_catalog_change(session):
+    session.info.pop("catalog_changed", None)
+
+
+def cache_key(scope) -> Optional[str]:
+    if scope["method"] not in ("GET", "HEAD") or not _CATALOG_PATH.match(scope["path"]):
+        return None
+    # Same parameters in any order, or with empty values, share one entry
+    params = sorted((k, v.strip()) for k, v in parse_qsl(scope["query_string"].decode("latin-1")) if v.strip())
+    return f"{scope['path']}?{urlencode(params)}"
+
+
+def _not_modified(request_headers: Dict[bytes, bytes], etag: str, last_modified: float) -> bool:
+    if_none_match = request_headers.get(b"if-none-match")
+    if if_none_match is not None:
+        candidates = [c.strip() for c in if_none_match.decode("latin-1").split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+    if_modified_since = request_headers.get(b"if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since.decode("latin-1")).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+class CatalogCacheMiddleware:
+    """
+    Pure ASGI middleware in front of the catalog routes. Keep it inside
+    CORSMiddleware so cached responses still get their CORS headers.
+    """
+
+    def __init__(self, app, cache: CatalogCache = catalog_cache,
+                 session_factory: Optional[Callable[[], Session]] = None):
+        self.app = app
+        self.cache = cache
+        self.session_factory = session_factory
+
+    async def __call__(self, scope, receive, send):
+        key = cache_key(scope) if scope["type"] == "http" else None
+        if key is None or self.cache.maxsize <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        if self.session_factory is not None and self.cache.check_due():
+            await run_in_threadpool(self.cache.refresh, self.session_factory)
+
+        request_headers = dict(scope["headers"])
+        cached = self.cache.get(key)
+        if cached is not None:
+            headers, body, etag = cached
+            await self._respond(scope, send, request_headers, headers, body, etag, from_cache=True)
+            return
+
+        # Miss: render through the route, buffering the (small) JSON body
+        version = self.cache.version
+        status, headers, chunks = 500, [], []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        if status != 200:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"etag", b"last-modified")]
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.cache.put(key, version, headers, body, etag)
+        await self._respond(scope, send, request_headers, headers, body, etag, from_cache=False)
+
+    async def _respond(self, scope, send, request_headers, headers, body, etag, from_cache: bool):
+        last_modified = self.cache.last_modified
+        validators = [
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", formatdate(last_modified, usegmt=True).encode("latin-1")),
+            (b"cache-control", b"public, no-cache"),
+        ]
+        if _not_modified(request_headers, etag, last_modified):
+            self.cache.record_served(len(body), not_modified=True)
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if from_cache:
+            self.cache.record_served(len(body), not_modified=False)
+        response_headers = headers + validators + [(b"content-length", str(len(body)).encode("latin-1"))]
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
@@ -0,0 +1,94 @@
+import logging
+import os
+import re
+import zipfile
+from typing import List
+from xml.etree import ElementTree
+from pypdf import PdfReader
+from .config import settings
+
+# Plain text out of uploaded CVs, for the candidate search (core.search).
+# PDFs go through pypdf, page by page; DOCX files are zip archives whose body
+# is word/document.xml, read with the standard library. Legacy binary .doc
+# files are accepted as uploads but have no extractor. Extraction stops at
+# CV_TEXT_MAX_PAGES pages and CV_TEXT_MAX_CHARS characters, and refuses DOCX
+# bodies over CV_TEXT_MAX_XML_BYTES once uncompressed, so a hostile file only
+# costs a bounded amount of work.
+
+# Broken files are recorded on their CvDocument, pypdf's per-object warnings would only be log noise
+logging.getLogger("pypdf").setLevel(logging.ERROR)
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_WHITESPACE_RE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+class UnreadableDocument(Exception):
+    """The file is not a document we can read (corrupt, encrypted, unsupported format)."""
+
+
+def normalize(text: str) -> str:
+    # PostgreSQL text cannot hold NUL characters, and layout whitespace is noise for search
+    text = text.replace("\x00", " ")
+    text = _WHITESPACE_RE.sub(" ", text)
+    return _BLANK_LINES_RE.sub("\n", text).strip()[:settings.CV_TEXT_MAX_CHARS]
+
+
+def _pdf_text(path: str) -> str:
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            raise UnreadableDocument("encrypted PDF")
+        parts: List[str] = []
+        size = 0
+        for page in reader.pages[:settings.CV_TEXT_MAX_PAGES]:
+            part = page.extract_text() or ""
+            parts.append(part)
+            size += len(part)
+            if size >= settings.CV_TEXT_MAX_CHARS:
+                break
+    except UnreadableDocument:
+        raise
+    except Exception as exc:
+        raise UnreadableDocument(f"unreadable PDF: {exc}") from exc
+    return "\n".join(parts)
+
+
+def _docx_text(path: str) -> str:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            body = archive.getinfo("word/document.xml")
+            if body.file_size > settings.CV_TEXT_MAX_XML_BYTES:
+                raise UnreadableDocument("DOCX body too large")
+            with archive.open(body) as handle:
+                paragraphs: List[str] = []
+                words: List[str] = []
+                for _, element in ElementTree.iterparse(handle):
+                    if element.tag == f"{_WORD_NS}t" and element.text:
+                        words.append(element.text)
+                    elif element.tag == f"{_WORD_NS}tab":
+                        words.append(" ")
+                    elif element.tag == f"{_WORD_NS}p":
+                        paragraphs.append("".join(words))
+                        words = []
+                        element.clear()
+    except UnreadableDocument:
+        raise
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as exc:
+        raise UnreadableDocument(f"unreadable DOCX: {exc}") from exc
+    return "\n".join(paragraphs)
+
+
+EXTRACTORS = {".pdf": _pdf_text, ".docx": _docx_text}
+
+
+def extract_text(path: str) -> str:
+    """
+    Returns the normalized text of the CV at `path`, "" when the format has no
+    extractor. Raises UnreadableDocument for files that cannot be parsed and
+    OSError when the file cannot be read at all.
+    """
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return ""
+    return normalize(extractor(path))
@@ -0,0 +1,146 @@
+import os
+import re
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Optional, Tuple
+import anyio
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+from .config import settings
+
+# Delivery of stored files once a route has authorized the download.
+# FILE_DELIVERY selects who moves the bytes:
+#   "x-accel"    nginx serves them from an `internal` location mapped to
+#                FILE_ACCEL_PREFIX (alias UPLOAD_DIR), the app only sends headers
+#   "x-sendfile" same idea for Apache mod_xsendfile / lighttpd, with the absolute path
+#   "direct"     the app answers itself: conditional GET (strong ETag, 304),
+#                single byte ranges (206 / 416), and the whole file handed to the
+#                server through the ASGI pathsend extension when it offers it
+# Front proxies handle ranges and validators on their own in the first two modes.
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def strong_etag(path: str, stat_result: os.stat_result) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if _SHA256_RE.match(stem):
+        # Content-addressed: the name is the digest of the bytes
+        return f'"{stem}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns the inclusive (start, end) of a single-range request, None to serve
+    the whole file (no header, or several ranges), or raises ValueError when the
+    range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        # Multiple or malformed ranges: ignoring Range is always allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse for one byte range of a file (206 Partial Content)."""
+
+    def __init__(self, path: str, byte_range: Tuple[int, int], **kwargs):
+        self.byte_range = byte_range
+        super().__init__(path, status_code=206, **kwargs)
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        start, end = self.byte_range
+        self.headers.setdefault("content-length", str(end - start + 1))
+        self.headers.setdefault("content-range", f"bytes {start}-{end}/{stat_result.st_size}")
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        start, end = self.byte_range
+        remaining = end - start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us, close the body anyway
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def deliver_file(request: Request, path: str, relative_path: str, filename: str) -> Response:
+    """
+    Builds the response for an already authorized download of `path`
+    (`relative_path` under UPLOAD_DIR). Does blocking stat calls, so call it
+    from a sync route.
+    """
+    media_type = guess_type(filename)[0] or "application/octet-stream"
+    disposition = {"content-disposition": f'attachment; filename="{filename}"'}
+
+    if settings.FILE_DELIVERY == "x-accel":
+        prefix = settings.FILE_ACCEL_PREFIX.rstrip("/")
+        return Response(
+            media_type=media_type,
+            headers={**disposition, "x-accel-redirect": f"{prefix}/{relative_path}"},
+        )
+    if settings.FILE_DELIVERY == "x-sendfile":
+        return Response(
+            media_type=media_type,
+            headers={**disposition, "x-sendfile": os.path.abspath(path)},
+        )
+
+    stat_result = os.stat(path)
+    etag = strong_etag(path, stat_result)
+    validators = {"etag": etag, "accept-ranges": "bytes", "cache-control": "private, no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=validators)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        # The client's partial copy is stale, send the full file
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, stat_result.st_size)
+    except ValueError:
+        return Response(status_code=416, headers={**validators, "content-range": f"bytes */{stat_result.st_size}"})
+
+    if byte_range is not None and byte_range != (0, stat_result.st_size - 1):
+        return RangeFileResponse(
+            path, byte_range, headers=validators, media_type=media_type,
+            filename=filename, stat_result=stat_result,
+        )
+    return FileResponse(
+        path, headers=validators, media_type=media_type, filename=filename, stat_result=stat_result,
+    )
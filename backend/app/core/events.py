@@ -0,0 +1,324 @@
+import asyncio
+import itertools
+import json
+import logging
+import select as select_module
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from .config import settings
+
+# Server push of application events (new applications, status changes) to
+# the students and companies they concern, over GET /events/stream (SSE).
+#
+# Routes call publish_event() inside their transaction. Events are addressed
+# to topics ("user:<id>" for a student, "company:<id>" for every account of a
+# company) and only leave once the transaction commits. The broker decides how
+# they reach the workers: MemoryBroker hands them to this process's hub (one
+# worker), PostgresBroker sends them with pg_notify as part of the commit and
+# every worker's listener thread feeds its own hub (several workers).
+#
+# The hub lives on the event loop. Each connected client is a Subscription
+# with a bounded queue: an idle client costs a few objects and a pending
+# wait, no thread and no database connection. A client that falls
+# EVENTS_QUEUE_SIZE events behind is dropped with an "overflow" event and
+# re-syncs over the regular API when it reconnects.
+#
+# The same brokers carry signals: cache invalidations that every worker must
+# apply (catalog_cache, recommend). publish_signal() queues one like an event,
+# and on each worker the handlers registered with on_signal() run when it
+# arrives, in the thread that received it, instead of going to the hub.
+
+Event = Dict
+Envelope = Tuple[List[str], Event]  # (topics, event)
+
+CHANNEL = "application_events"
+NOTIFY_MAX_BYTES = 7900  # PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+SIGNAL_PREFIX = "signal:"
+
+logger = logging.getLogger(__name__)
+_signal_handlers: Dict[str, List[Callable[[Event], None]]] = defaultdict(list)
+
+
+def user_topic(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def company_topic(company_id: int) -> str:
+    return f"company:{company_id}"
+
+
+class Subscription:
+    def __init__(self, topics: List[str], maxsize: int):
+        self.topics = topics
+        self.maxsize = maxsize
+        self.queue: deque = deque()
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def push(self, item: Tuple[int, Event]):
+        if self.overflowed:
+            return
+        if len(self.queue) >= self.maxsize:
+            # Never buffer without bound for a client that does not read
+            self.overflowed = True
+            self.queue.clear()
+        else:
+            self.queue.append(item)
+        self._ready.set()
+
+    async def get(self, timeout: float) -> List[Tuple[int, Event]]:
+        """Waits up to `timeout` seconds, then returns every queued (id, event), possibly none."""
+        if not self.queue and not self.overflowed:
+            # A timer handle rather than asyncio.wait_for, which would start a task per idle client
+            timer = asyncio.get_running_loop().call_later(timeout, self._ready.set)
+            try:
+                await self._ready.wait()
+            finally:
+                timer.cancel()
+        self._ready.clear()
+        items = list(self.queue)
+        self.queue.clear()
+        return items
+
+
+class EventHub:
+    def __init__(self, max_clients: int, queue_size: int):
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._topics: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._ids = itertools.count(1)
+        self.clients = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def bind(self, loop: Optional[asyncio.AbstractEventLoop]):
+        self.loop = loop
+
+    def publish(self, envelopes: List[Envelope]):
+        """Thread-safe: delivery always happens on the hub's event loop."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return  # No server running in this process (CLI, scripts)
+        loop.call_soon_threadsafe(self._deliver, envelopes)
+
+    def _deliver(self, envelopes: List[Envelope]):
+        for topics, payload in envelopes:
+            item = (next(self._ids), payload)
+            for topic in topics:
+                for subscription in self._topics.get(topic, ()):
+                    overflowed = subscription.overflowed
+                    subscription.push(item)
+                    self.delivered += 1
+                    if subscription.overflowed and not overflowed:
+                        self.overflows += 1
+
+    def full(self) -> bool:
+        return self.clients >= self.max_clients
+
+    def subscribe(self, topics: List[str]) -> Subscription:
+        subscription = Subscription(topics, self.queue_size)
+        for topic in topics:
+            self._topics[topic].add(subscription)
+        self.clients += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        removed = False
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                removed = True
+                if not subscribers:
+                    del self._topics[topic]
+        if removed:
+            self.clients -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "clients": self.clients,
+            "max_clients": self.max_clients,
+            "topics": len(self._topics),
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+            "broker": type(broker).__name__,
+        }
+
+
+hub = EventHub(settings.EVENTS_MAX_CLIENTS, settings.EVENTS_QUEUE_SIZE)
+
+
+class MemoryBroker:
+    """Delivers committed events to this process only: enough with one worker."""
+
+    def stage(self, session: Session, envelopes: List[Envelope]):
+        pass
+
+    def committed(self, envelopes: List[Envelope]):
+        dispatch(envelopes)
+
+    def start(self, engine: Engine):
+        pass
+
+    def stop(self):
+        pass
+
+
+class PostgresBroker:
+    """
+    Fans events out to every worker with LISTEN/NOTIFY. The NOTIFY is sent on
+    the transaction's own connection, so PostgreSQL delivers it exactly when
+    the transaction commits and drops it on rollback. Each worker listens on
+    one dedicated connection, outside the pool, from a background thread.
+    """
+
+    def __init__(self, retry_delay: float = 1.0):
+        self.retry_delay = retry_delay
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def stage(self, session: Session, envelopes: List[Envelope]):
+        connection = session.connection()
+        for payload in _notify_payloads(envelopes):
+            connection.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    def committed(self, envelopes: List[Envelope]):
+        pass  # Our own listener receives the notification like every other worker
+
+    def start(self, engine: Engine):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, args=(engine,), name="events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self, engine: Engine):
+        while not self._stopping.is_set():
+            try:
+                # A raw DBAPI connection from the engine's URL, so the pool keeps all of its connections
+                args, kwargs = engine.dialect.create_connect_args(engine.url)
+                connection = engine.dialect.connect(*args, **kwargs)
+            except Exception:
+                self._stopping.wait(self.retry_delay)
+                continue
+            try:
+                connection.autocommit = True
+                cursor = connection.cursor()
+                cursor.execute(f"LISTEN {CHANNEL}")
+                while not self._stopping.is_set():
+                    # Wakes at least once a second to notice stop()
+                    if select_module.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    envelopes = []
+                    while connection.notifies:
+                        envelopes.extend(
+                            (topics, payload) for topics, payload in json.loads(connection.notifies.pop(0).payload)
+                        )
+                    if envelopes:
+                        dispatch(envelopes)
+            except Exception:
+                # Connection lost: events sent meanwhile are missed, clients re-sync on their next fetch
+                self._stopping.wait(self.retry_delay)
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+
+def dispatch(envelopes: List[Envelope]):
+    """Runs the handlers of the signals among `envelopes` and hands the events to the hub."""
+    events = []
+    for topics, payload in envelopes:
+        if topics and topics[0].startswith(SIGNAL_PREFIX):
+            for handler in _signal_handlers.get(topics[0][len(SIGNAL_PREFIX):], ()):
+                try:
+                    handler(payload)
+                except Exception:
+                    logger.exception("signal handler %r failed", handler)
+        else:
+            events.append((topics, payload))
+    if events:
+        hub.publish(events)
+
+
+def _notify_payloads(envelopes: List[Envelope]) -> Iterable[str]:
+    """JSON arrays of envelopes, each small enough for one NOTIFY."""
+    batch: List[str] = []
+    size = 2
+    for topics, payload in envelopes:
+        encoded = json.dumps([topics, payload], separators=(",", ":"), default=str)
+        if batch and size + len(encoded) + 1 > NOTIFY_MAX_BYTES:
+            yield "[" + ",".join(batch) + "]"
+            batch, size = [], 2
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        yield "[" + ",".join(batch) + "]"
+
+
+BROKERS = {"memory": MemoryBroker, "postgres": PostgresBroker}
+broker = MemoryBroker()
+
+
+def set_broker(new_broker):
+    global broker
+    broker = new_broker
+
+
+def start(engine: Engine, loop: asyncio.AbstractEventLoop):
+    """Binds the hub to the server's loop and starts the configured broker (lifespan)."""
+    if settings.EVENTS_BROKER == "postgres" and engine.dialect.name != "postgresql":
+        raise RuntimeError("EVENTS_BROKER=postgres needs a PostgreSQL DATABASE_URL")
+    set_broker(BROKERS[settings.EVENTS_BROKER]())
+    hub.bind(loop)
+    broker.start(engine)
+
+
+def stop():
+    broker.stop()
+    hub.bind(None)
+
+
+def publish_event(db: Session, topics: List[str], event_type: str, **fields):
+    """Queues an event for `topics`. It is sent when the current transaction commits."""
+    db.info.setdefault("events", []).append((topics, dict(fields, type=event_type)))
+
+
+def on_signal(name: str, handler: Callable[[Event], None]):
+    """Runs `handler(fields)` on this worker for every signal `name`, from any worker."""
+    _signal_handlers[name].append(handler)
+
+
+def publish_signal(db: Session, name: str, **fields):
+    """Queues a signal for every worker. It is sent when the current transaction commits."""
+    publish_event(db, [SIGNAL_PREFIX + name], name, **fields)
+
+
+@event.listens_for(Session, "before_commit")
+def _stage_events(session):
+    envelopes = session.info.get("events")
+    if envelopes:
+        broker.stage(session, envelopes)
+
+
+@event.listens_for(Session, "after_commit")
+def _send_events(session):
+    envelopes = session.info.pop("events", None)
+    if envelopes:
+        broker.committed(envelopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_events(session):
+    session.info.pop("events", None)
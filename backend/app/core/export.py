@@ -0,0 +1,63 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, List
+from sqlalchemy.sql import Select
+from ..database import SessionLocal
+
+# Streaming exports.
+# Rows come from a server-side cursor (stream_results + yield_per) and are
+# encoded batch by batch, so memory stays flat whatever the table size and the
+# first bytes leave as soon as the first batch is fetched. The generator opens
+# its own session because the request-scoped one is closed before a
+# StreamingResponse body starts.
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+BATCH_SIZE = 1000
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(columns: List[str], rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, (_plain(v) for v in row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(writer, buffer: io.StringIO, rows) -> str:
+    writer.writerows([_plain(v) for v in row] for row in rows)
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def stream_rows(statement: Select, fmt: str, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    columns = [column.key for column in statement.selected_columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(columns)
+        yield _encode_csv(writer, buffer, []).encode()
+
+    with SessionLocal() as db:
+        result = db.execute(
+            statement.execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for rows in result.partitions():
+            if fmt == "csv":
+                yield _encode_csv(writer, buffer, rows).encode()
+            else:
+                yield _encode_ndjson(columns, rows).encode()
@@ -0,0 +1,323 @@
+import asyncio
+import itertools
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+from .config import settings
+from .metrics import JOBS_DEAD, JOBS_DURATION, JOBS_FINISHED, JOBS_OLDEST_DUE, JOBS_QUEUE_DEPTH, JOBS_WAIT
+from .sql import conflict_insert
+from ..models.job import DeadJob, Job
+
+# Durable background jobs, stored in the database next to the data they act on.
+# Routes call enqueue() inside their transaction: the job exists exactly when
+# the work that asked for it commits, and a rollback drops it with the rest.
+#
+# Workers claim due jobs with a single UPDATE ... WHERE id IN (SELECT ... FOR
+# UPDATE SKIP LOCKED) on PostgreSQL, so any number of them, in any process,
+# share the table without waiting on each other's rows. SQLite has one writer
+# at a time, which makes the same statement (without the locking clause)
+# atomic there. A handler runs in a session of its own and the job is marked
+# done in that same transaction, so its database effects happen once; effects
+# outside the database (files, mail) may be repeated after a crash and must be
+# idempotent.
+#
+# A failed job is retried after JOBS_BACKOFF_BASE * 2^(attempt - 1) seconds
+# (with jitter, at most JOBS_BACKOFF_MAX) and moves to dead_jobs after
+# max_attempts. A running job whose worker disappeared is handed out again
+# once its JOBS_LEASE_SECONDS lease expires. An idempotency key makes enqueue()
+# a no-op while a job with that key is queued, running or done within
+# JOBS_RETENTION_SECONDS.
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE = "queued", "running", "done"
+ERROR_MAX_CHARS = 4000
+
+Handler = Callable[[Session, dict], None]
+_handlers: Dict[str, Handler] = {}
+_local_workers: Set["Worker"] = set()  # woken as soon as a transaction that enqueued commits
+
+
+def job(name: str):
+    """Registers a sync handler(db, payload) for jobs called `name`."""
+    def register(handler: Handler) -> Handler:
+        _handlers[name] = handler
+        return handler
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands timestamps back without their (UTC) offset
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before retrying a job that has failed `attempts` times."""
+    delay = min(settings.JOBS_BACKOFF_BASE * 2 ** (attempts - 1), settings.JOBS_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)  # Jitter, so jobs that failed together retry apart
+
+
+def enqueue(db: Session, name: str, payload: Optional[dict] = None, key: Optional[str] = None,
+            delay: float = 0, max_attempts: Optional[int] = None) -> bool:
+    """
+    Adds a job as part of the current transaction, to run `delay` seconds
+    after it commits at the earliest. With `key`, nothing is added when a job
+    with the same key already exists. Returns whether the job was added.
+    """
+    statement = conflict_insert(db, Job).values(
+        name=name,
+        payload=payload or {},
+        idempotency_key=key,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=_now() + timedelta(seconds=delay),
+    )
+    if key is not None:
+        statement = statement.on_conflict_do_nothing(index_elements=["idempotency_key"])
+    added = db.execute(statement).rowcount > 0
+    if added and delay <= 0:
+        db.info["jobs_enqueued"] = True
+    return added
+
+
+def forget(db: Session, key: str):
+    """Drops the done job holding `key`, so the key can be enqueued again before JOBS_RETENTION_SECONDS."""
+    db.execute(
+        delete(Job).where(Job.idempotency_key == key, Job.status == DONE).execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session):
+    if session.info.pop("jobs_enqueued", False):
+        for worker in list(_local_workers):
+            worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session):
+    session.info.pop("jobs_enqueued", None)
+
+
+def _to_dead_letter(db: Session, job, error: Optional[str], now: datetime):
+    db.execute(insert(DeadJob).values(
+        id=job.id, name=job.name, payload=job.payload, idempotency_key=job.idempotency_key,
+        attempts=job.attempts, last_error=error, created_at=job.created_at, failed_at=now,
+    ))
+    db.execute(delete(Job).where(Job.id == job.id))
+
+
+def queue_stats(db: Session) -> Dict:
+    """Jobs by status, the wait of the oldest due job and the dead-letter count."""
+    now = _now()
+    depth = {QUEUED: 0, RUNNING: 0, DONE: 0}
+    depth.update(db.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+    oldest = db.scalar(select(func.min(Job.run_at)).where(Job.status == QUEUED, Job.run_at <= now))
+    return {
+        "depth": depth,
+        "oldest_due_seconds": round((now - _aware(oldest)).total_seconds(), 3) if oldest else 0.0,
+        "dead": db.scalar(select(func.count()).select_from(DeadJob)),
+    }
+
+
+def requeue_dead(db: Session, ids: Optional[List[int]] = None) -> int:
+    """Moves dead jobs (all, or those in `ids`) back to the queue with fresh attempts."""
+    statement = select(DeadJob)
+    if ids:
+        statement = statement.where(DeadJob.id.in_(ids))
+    requeued = 0
+    for dead in db.scalars(statement).all():
+        added = enqueue(db, dead.name, dead.payload, key=dead.idempotency_key)
+        db.delete(dead)
+        requeued += added
+    db.commit()
+    return requeued
+
+
+class Worker:
+    """
+    Runs jobs on the current event loop, JOBS_CONCURRENCY at a time. Handlers
+    are sync and run on the worker's own threads, never on the loop nor in the
+    threadpool that serves the API's sync routes.
+    """
+
+    _serial = itertools.count(1)
+
+    def __init__(self, session_factory: sessionmaker, concurrency: Optional[int] = None,
+                 poll_interval: Optional[float] = None):
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.JOBS_CONCURRENCY
+        self.poll_interval = settings.JOBS_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{next(self._serial)}"
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def wake(self):
+        """Thread-safe: ends the current idle wait."""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def stop(self):
+        self._stopping = True
+        self.wake()
+
+    async def run(self, until_idle: bool = False):
+        """Claims and runs jobs until stop(), or until none is due when `until_idle`."""
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        # One thread more than jobs, so claims and maintenance never wait behind a slow job
+        executor = ThreadPoolExecutor(self.concurrency + 1, thread_name_prefix="jobs")
+        running: Set[asyncio.Future] = set()
+        next_maintenance = 0.0
+        _local_workers.add(self)
+        try:
+            while not self._stopping:
+                self._wakeup.clear()
+                if time.monotonic() >= next_maintenance:
+                    next_maintenance = time.monotonic() + settings.JOBS_MAINTENANCE_INTERVAL
+                    await self._guarded(self.loop.run_in_executor(executor, self.maintain))
+                free = self.concurrency - len(running)
+                claimed = []
+                if free > 0:
+                    claimed = await self._guarded(self.loop.run_in_executor(executor, self.claim, free)) or []
+                for job_row in claimed:
+                    task = self.loop.run_in_executor(executor, self.execute, job_row)
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                    task.add_done_callback(lambda _: self._wakeup.set())
+                if until_idle and not claimed and not running:
+                    break
+                if not claimed or len(running) >= self.concurrency:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            _local_workers.discard(self)
+            if running:
+                # Unfinished jobs keep their lease and are retried by another worker once it expires
+                await asyncio.wait(running, timeout=settings.JOBS_SHUTDOWN_TIMEOUT)
+            executor.shutdown(wait=False)
+
+    async def _guarded(self, future):
+        try:
+            return await future
+        except Exception:
+            # Database down or busy: log and try again on the next round
+            logger.exception("job worker %s: queue access failed", self.name)
+            return None
+
+    def claim(self, limit: int) -> list:
+        now = _now()
+        with self.session_factory() as db:
+            due = select(Job.id)\
+                .where(Job.status == QUEUED, Job.run_at <= now)\
+                .order_by(Job.run_at, Job.id)\
+                .limit(limit)\
+                .with_for_update(skip_locked=True)  # Not rendered on SQLite, which needs no row locks
+            claimed = db.execute(
+                update(Job)
+                .where(Job.id.in_(due.scalar_subquery()))
+                .values(status=RUNNING, attempts=Job.attempts + 1, started_at=now, locked_by=self.name)
+                .returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts, Job.run_at)
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+        for job_row in claimed:
+            JOBS_WAIT.labels(job_row.name).observe(max((now - _aware(job_row.run_at)).total_seconds(), 0.0))
+        return claimed
+
+    def _owned(self, job_id: int):
+        # A worker only finishes jobs it still holds: after an expired lease another worker may run it
+        return (Job.id == job_id) & (Job.status == RUNNING) & (Job.locked_by == self.name)
+
+    def execute(self, job_row):
+        started = time.perf_counter()
+        try:
+            handler = _handlers.get(job_row.name)
+            if handler is None:
+                raise LookupError(f"No handler registered for job {job_row.name!r}")
+            with self.session_factory() as db:
+                handler(db, job_row.payload)
+                finished = db.execute(
+                    update(Job).where(self._owned(job_row.id))
+                    .values(status=DONE, finished_at=_now(), locked_by=None, last_error=None)
+                    .execution_options(synchronize_session=False)
+                )
+                if finished.rowcount:
+                    db.commit()
+                    outcome = "done"
+                else:
+                    db.rollback()
+                    outcome = "lost"
+        except Exception:
+            try:
+                outcome = self._failed(job_row, traceback.format_exc()[-ERROR_MAX_CHARS:])
+            except Exception:
+                # Not even recorded: the job stays running until its lease expires
+                logger.exception("job worker %s: could not record the failure of job %s", self.name, job_row.id)
+                outcome = "lost"
+        JOBS_DURATION.labels(job_row.name).observe(time.perf_counter() - started)
+        JOBS_FINISHED.labels(job_row.name, outcome).inc()
+
+    def _failed(self, job_row, error: str) -> str:
+        logger.warning("job %s (%s) failed, attempt %s of %s\n%s",
+                       job_row.id, job_row.name, job_row.attempts, job_row.max_attempts, error)
+        now = _now()
+        with self.session_factory() as db:
+            job = db.scalars(select(Job).where(self._owned(job_row.id)).with_for_update()).first()
+            if job is None:
+                return "lost"
+            if job.attempts >= job.max_attempts:
+                _to_dead_letter(db, job, error, now)
+                outcome = "dead"
+            else:
+                job.status = QUEUED
+                job.run_at = now + timedelta(seconds=backoff(job.attempts))
+                job.locked_by = None
+                job.last_error = error
+                outcome = "retried"
+            db.commit()
+        return outcome
+
+    def maintain(self):
+        """Releases expired leases, deletes old done jobs and samples the depth metrics."""
+        now = _now()
+        with self.session_factory() as db:
+            expired = db.scalars(
+                select(Job)
+                .where(Job.status == RUNNING, Job.started_at < now - timedelta(seconds=settings.JOBS_LEASE_SECONDS))
+                .with_for_update(skip_locked=True)
+            ).all()
+            for job in expired:
+                error = f"Lease of worker {job.locked_by} expired"
+                if job.attempts >= job.max_attempts:
+                    _to_dead_letter(db, job, error, now)  # It keeps killing its worker
+                else:
+                    job.status, job.run_at, job.locked_by, job.last_error = QUEUED, now, None, error
+            db.execute(
+                delete(Job)
+                .where(Job.status == DONE, Job.finished_at < now - timedelta(seconds=settings.JOBS_RETENTION_SECONDS))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            stats = queue_stats(db)
+        for status, count in stats["depth"].items():
+            JOBS_QUEUE_DEPTH.labels(status).set(count)
+        JOBS_OLDEST_DUE.set(stats["oldest_due_seconds"])
+        JOBS_DEAD.set(stats["dead"])
@@ -0,0 +1,155 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+# Prometheus metrics.
+# MetricsMiddleware times every HTTP request and labels it with the route
+# template ("/offers/{id}"), never the raw path, to keep label cardinality
+# bounded. SQL statements are attributed to the request that issued them
+# through a context variable fed by SQLAlchemy cursor events.
+#
+# With several worker processes set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory shared by the workers (and wipe it on deploy); /metrics then
+# aggregates the per-process files so any worker can answer a scrape.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+JOB_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ["method", "route"], multiprocess_mode="livesum"
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size", ["method", "route"], buckets=SIZE_BUCKETS
+)
+DB_STATEMENTS = Histogram(
+    "db_statements_per_request", "SQL statements issued per request", ["route"], buckets=STATEMENT_BUCKETS
+)
+DB_TIME = Histogram(
+    "db_time_per_request_seconds", "Time spent executing SQL per request", ["route"], buckets=LATENCY_BUCKETS
+)
+
+# Background jobs (core.jobs). Depth gauges are sampled from the jobs table by
+# every worker, so they agree: "livemax" reports one value, not the sum over workers.
+JOBS_QUEUE_DEPTH = Gauge(
+    "jobs_queue_depth", "Jobs in the queue by status", ["status"], multiprocess_mode="livemax"
+)
+JOBS_OLDEST_DUE = Gauge(
+    "jobs_oldest_due_seconds", "How long the oldest due job has been waiting", multiprocess_mode="livemax"
+)
+JOBS_DEAD = Gauge(
+    "jobs_dead", "Jobs in the dead-letter table", multiprocess_mode="livemax"
+)
+JOBS_WAIT = Histogram(
+    "jobs_wait_seconds", "Time from a job being due to a worker starting it", ["job"], buckets=JOB_WAIT_BUCKETS
+)
+JOBS_DURATION = Histogram(
+    "jobs_duration_seconds", "Job run time", ["job"], buckets=LATENCY_BUCKETS
+)
+JOBS_FINISHED = Counter(
+    "jobs_finished_total", "Job runs by outcome (done, retried, dead, lost)", ["job", "outcome"]
+)
+
+
+class RequestDBStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Mutable holder shared by reference, so increments made from the threadpool
+# (where sync routes run on a copy of the context) are still seen here.
+_request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += time.perf_counter() - getattr(context, "_metrics_started", time.perf_counter())
+
+
+def instrument_engine(engine: Engine):
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_template(app, scope) -> str:
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so it adds no extra task or body buffering per request."""
+
+    def __init__(self, app, router_app=None):
+        self.app = app
+        self.router_app = router_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(self.router_app, scope)
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        db_stats = RequestDBStats()
+        token = _request_db_stats.set(db_stats)
+        in_flight = IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            _request_db_stats.reset(token)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            LATENCY.labels(method, route).observe(elapsed)
+            RESPONSE_SIZE.labels(method, route).observe(body_size)
+            DB_STATEMENTS.labels(route).observe(db_stats.statements)
+            DB_TIME.labels(route).observe(db_stats.seconds)
+
+
+def render_metrics() -> tuple:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,68 @@
+import os
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+# Schema migrations (Alembic, scripts in backend/migrations).
+# upgrade_database() brings any database to head: empty ones get the full
+# history, and databases built by the old create_all() startup are first
+# stamped at the baseline revision, since they already have its tables.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BASELINE_REVISION = "0001"
+_ADVISORY_LOCK_ID = 720_150_001  # Serializes concurrent upgrades on PostgreSQL
+
+
+def alembic_config(connection: Optional[Connection] = None) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade_database(engine: Engine, revision: str = "head"):
+    with engine.connect() as connection:
+        is_postgres = connection.dialect.name == "postgresql"
+        if is_postgres:
+            # Workers starting together wait here instead of racing on alembic_version
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+        try:
+            tables = inspect(connection).get_table_names()
+            connection.commit()
+            config = alembic_config(connection)
+            if "alembic_version" not in tables and "users" in tables:
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, revision)
+        finally:
+            if is_postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+                connection.commit()
+
+
+def schema_lock(connection: Connection):
+    """
+    Takes the upgrade lock until the end of the connection's transaction, for
+    one-time seeding that every starting worker would otherwise race on.
+    No-op outside PostgreSQL.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+
+
+def check_drift(engine: Engine):
+    """Raises alembic.util.AutogenerateDiffsDetected when the models differ from the migrated schema."""
+    with engine.connect() as connection:
+        command.check(alembic_config(connection))
@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from fastapi import HTTPException
+from sqlalchemy import String, func, tuple_
+from sqlalchemy.orm import Query, Session
+from .config import settings
+
+# Keyset ("seek") pagination.
+# Every list route orders by a sort key plus the primary key as tie breaker and
+# hands out an opaque cursor holding the key of the last row it returned. The
+# next page is then a plain `WHERE (key, id) < (:key, :id) ... LIMIT n`, so page N
+# costs the same as page 1 instead of scanning the skipped rows like OFFSET does.
+# Cursors come back from clients: each value is checked against the Python type
+# of its key before it is bound, so a tampered one is a 400, not a driver error.
+
+BIGINT_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _value_fits(value: Any, key) -> bool:
+    try:
+        expected = key.type.python_type
+    except NotImplementedError:
+        expected = None
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is datetime:
+        return isinstance(value, datetime)
+    if expected is int:
+        return isinstance(value, int) and value in BIGINT_RANGE
+    if expected is float:
+        return isinstance(value, (int, float))
+    if expected is str:
+        return isinstance(value, str)
+    return isinstance(value, (int, float, str)) and expected is None
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != len(keys) or not all(_value_fits(v, k) for v, k in zip(values, keys)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return settings.DEFAULT_PAGE_SIZE
+    return min(limit, settings.MAX_PAGE_SIZE)
+
+
+def sort_key(db: Session, column):
+    """
+    Returns the expression a timestamp column should be ordered and compared by.
+    SQLite stores timestamps as text with or without fractional seconds, which
+    breaks equality against bound datetimes, so both sides are normalized there.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return func.datetime(column, type_=String)  # Text, and cursors carry it as such
+    return column
+
+
+def paginate(
+    query: Query,
+    keys: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    descending: bool = True,
+) -> dict:
+    """
+    Returns one page of `query` as `{"items": [...], "next_cursor": ...}`.
+    `keys` are the ordering expressions, the last one must be unique (the id).
+    """
+    limit = clamp_limit(limit)
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        row, bound = tuple_(*keys), tuple_(*values)
+        query = query.filter(row < bound if descending else row > bound)
+
+    order = [k.desc() if descending else k.asc() for k in keys]
+    rows = query.add_columns(*keys).order_by(None).order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1:])
+    return {"items": [row[0] for row in rows], "next_cursor": next_cursor}
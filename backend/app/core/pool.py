@@ -0,0 +1,145 @@
+import bisect
+import threading
+import time
+from typing import Dict
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from .config import settings
+
+# Connection pool sizing and telemetry.
+# Engines are built with the DB_POOL_* settings and an instrumented QueuePool
+# that records how long each checkout waited for a free connection and how many
+# gave up after DB_POOL_TIMEOUT. /internal/pool exposes the numbers so worker
+# counts can be sized against Postgres max_connections.
+
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, waited: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, waited * 1000)] += 1
+
+    def histogram(self) -> Dict[str, int]:
+        # Cumulative, Prometheus style: bucket "le" includes everything below it
+        cumulative, running = {}, 0
+        for bound, count in zip(list(WAIT_BUCKETS_MS) + ["+Inf"], self.wait_buckets):
+            running += count
+            cumulative[str(bound)] = running
+        return cumulative
+
+
+pool_stats: Dict[str, PoolStats] = {}
+
+
+class _Instrumented:
+    stats_label = "sync"
+
+    def _do_get(self):
+        stats = pool_stats.setdefault(self.stats_label, PoolStats())
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.observe(time.perf_counter() - start, timed_out=False)
+        return connection
+
+
+class InstrumentedQueuePool(_Instrumented, QueuePool):
+    stats_label = "sync"
+
+
+class InstrumentedAsyncPool(_Instrumented, AsyncAdaptedQueuePool):
+    stats_label = "async"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection, pool sizing does not apply
+        return {}
+
+    options = {
+        "poolclass": InstrumentedAsyncPool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def warm_pool(engine, count: int) -> int:
+    """Opens up to `count` connections (never more than the pool keeps) and returns them to the pool."""
+    if isinstance(engine.pool, QueuePool):
+        count = min(count, engine.pool.size())
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def warm_async_pool(engine, count: int) -> int:
+    if isinstance(engine.pool, QueuePool):
+        count = min(count, engine.pool.size())
+    connections = []
+    try:
+        for _ in range(count):
+            connection = await engine.connect()
+            connections.append(connection)
+            await connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            await connection.close()
+    return len(connections)
+
+
+def pool_snapshot(engine, label: str) -> dict:
+    pool = engine.pool
+    stats = pool_stats.get(label, PoolStats())
+    snapshot = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        snapshot.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "timeout_seconds": settings.DB_POOL_TIMEOUT,
+        })
+    snapshot.update({
+        "checkouts": stats.checkouts,
+        "checkout_timeouts": stats.timeouts,
+        "wait_seconds_total": round(stats.wait_seconds_total, 6),
+        "wait_ms_histogram": stats.histogram(),
+    })
+    return snapshot
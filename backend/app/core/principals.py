@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from .config import settings
+from ..models.user import User
+
+# Authenticated principal cache.
+# get_current_user would otherwise SELECT the user row on every authenticated
+# request. Entries are column snapshots (never the password hash) kept for
+# PRINCIPAL_CACHE_TTL seconds in an LRU of PRINCIPAL_CACHE_SIZE entries, and are
+# dropped as soon as a transaction that changed or deleted the user commits.
+
+_CACHED_COLUMNS = [c.key for c in User.__table__.columns if c.key != "password"]
+
+
+class InvalidationBus:
+    """
+    In-process pub/sub for cache invalidations. With several workers, swap it
+    for an implementation that fans out between processes (Redis, LISTEN/NOTIFY)
+    through set_invalidation_bus(); subscribers stay the same.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Callable[[int], None]] = []
+
+    def subscribe(self, callback: Callable[[int], None]):
+        self._subscribers.append(callback)
+
+    def publish(self, user_id: int):
+        for callback in self._subscribers:
+            callback(user_id)
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, snapshot: Dict):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+_bus = InvalidationBus()
+_bus.subscribe(principal_cache.invalidate)
+
+
+def set_invalidation_bus(bus: InvalidationBus):
+    global _bus
+    bus.subscribe(principal_cache.invalidate)
+    _bus = bus
+
+
+def invalidate_principal(user_id: int):
+    _bus.publish(user_id)
+
+
+def snapshot(user: User) -> Dict:
+    return {key: getattr(user, key) for key in _CACHED_COLUMNS}
+
+
+def attach(snapshot: Dict) -> User:
+    """
+    Rebuilds a User from a snapshot as a detached instance with its identity
+    set, ready for Session.merge(..., load=False) to adopt without a SELECT.
+    """
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+def load_principal(db: Session, user_id: int) -> Optional[User]:
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return db.merge(attach(cached), load=False)
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        principal_cache.put(user_id, snapshot(user))
+    return user
+
+
+# Any committed change to a users row (role changes included) drops the entry,
+# whichever route or script made it.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault("changed_principals", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_principals", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_principals", None)
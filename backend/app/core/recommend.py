@@ -0,0 +1,311 @@
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .catalog_cache import read_catalog_state
+from .config import settings
+from .events import on_signal, publish_signal
+from ..models.offer import Offer
+
+# Offer recommendations by TF-IDF similarity, served from memory.
+# Each offer is a sparse TF-IDF vector over its title, category, features and
+# description, stored as one row of two fixed-width arrays: the ids of its
+# RECOMMEND_TERMS_PER_OFFER heaviest terms and their normalized weights. A
+# student's profile is the sum of the vectors of the offers they applied to.
+# Scoring every offer is then a gather of profile weights by term id and a row
+# sum over an N x K array, and the top k come out of argpartition, without
+# sorting the catalog.
+#
+# The index is built from the database on first use. Offer writes call
+# offers_changed() inside their transaction; once it commits, a "recommend"
+# signal carries the ids to every worker through the events broker, where
+# they are queued and re-read before the next recommendation, so rows are
+# patched in place instead of rebuilding the matrix. IDF weights are refreshed
+# for the whole matrix when the number of offers has moved by
+# RECOMMEND_IDF_REFRESH since the last refresh.
+#
+# Every RECOMMEND_RESYNC_SECONDS a worker also compares the shared catalog
+# version (core.catalog_cache, bumped by the same writes) with the one its
+# index was built at, and rebuilds when it moved: the backstop for signals
+# lost while a worker's listener was reconnecting.
+
+_TOKEN_RE = re.compile(r"[^\W\d_]{2,}")
+STOP_WORDS = frozenset("""
+    and the for with you your our are will from this that have has into able
+    les des une pour avec dans sur est nous vous votre aux par qui que ses son
+""".split())
+# Title and category say more about an offer than its description: their terms count several times
+FIELD_WEIGHTS = (("title", 3), ("category", 3), ("features", 2), ("description", 1))
+PADDING = 0  # Term id of unused slots, its IDF is pinned to 0 so they never score
+SIGNAL_MAX_IDS = 500  # More changed offers ask for a rebuild instead, keeping signals under the NOTIFY limit
+
+OfferRow = Tuple[int, Optional[str], Optional[str], Optional[str], Optional[list]]
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def offer_terms(title, description, category, features) -> Counter:
+    fields = {
+        "title": title,
+        "category": category,
+        "features": " ".join(features) if isinstance(features, list) else features,
+        "description": description,
+    }
+    counts: Counter = Counter()
+    for field, repeat in FIELD_WEIGHTS:
+        for token in tokenize(fields[field]):
+            counts[token] += repeat
+    return counts
+
+
+class OfferIndex:
+    def __init__(self, terms_per_offer: int, idf_refresh: float, resync_interval: float = float("inf")):
+        self.width = terms_per_offer
+        self.idf_refresh = idf_refresh
+        self.resync_interval = resync_interval
+        self.built = False
+        self.stale = False  # Rebuild at the next sync
+        self.version: Optional[int] = None  # Shared catalog version at the last build
+        self.checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # One build at a time, concurrent first queries wait for it
+        self._pending: Set[int] = set()
+        self._reset(0)
+
+    def _reset(self, capacity: int):
+        capacity = max(capacity, 1024)
+        self.vocabulary: Dict[str, int] = {"": PADDING}
+        self.df = np.zeros(4096, dtype=np.int64)
+        self.idf = np.zeros(4096, dtype=np.float32)
+        self.terms = np.zeros((capacity, self.width), dtype=np.int32)
+        self.tf = np.zeros((capacity, self.width), dtype=np.float32)
+        # tf * idf, L2-normalized: what is actually scored. Free rows are all zeros.
+        self.scaled = np.zeros((capacity, self.width), dtype=np.float32)
+        self.offer_ids = np.zeros(capacity, dtype=np.int64)
+        # Reused by every query for the gathered profile weights, instead of a fresh N x K allocation
+        self.scratch = np.empty_like(self.scaled)
+        self.row_of: Dict[int, int] = {}
+        self.free_rows: List[int] = []
+        self.rows = 0  # Rows in use or freed, the rest of the arrays is spare capacity
+        self.refreshed_at = 0  # Number of offers at the last IDF refresh
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def load(self, offers: Iterable[OfferRow]):
+        """Rebuilds the index from (id, title, description, category, features) rows."""
+        documents = [(row[0], offer_terms(*row[1:])) for row in offers]
+        with self._lock:
+            self._reset(len(documents))
+            # Document frequencies first, so each row keeps its heaviest terms by the final IDF
+            for _, counts in documents:
+                for term in counts:
+                    term_id = self._term_id(term)  # May grow self.df
+                    self.df[term_id] += 1
+            self._set_idf(np.arange(len(self.vocabulary)), len(documents))
+            for offer_id, counts in documents:
+                self._put(offer_id, counts)
+            self._refresh()
+            self.built = True
+
+    def upsert(self, offer: OfferRow):
+        counts = offer_terms(*offer[1:])
+        with self._lock:
+            self._remove(offer[0])
+            self._put(offer[0], counts)
+            self._maybe_refresh()
+
+    def remove(self, offer_id: int):
+        with self._lock:
+            self._remove(offer_id)
+            self._maybe_refresh()
+
+    def invalidate(self, offer_id: int):
+        """Queues an offer to be re-read from the database before the next query."""
+        with self._lock:
+            self._pending.add(offer_id)
+
+    def invalidate_all(self):
+        """Rebuilds the whole index from the database before the next query."""
+        with self._lock:
+            self.stale = True
+
+    def sync(self, db: Session):
+        """
+        Builds the index on first use (or once stale), afterwards applies the
+        queued offer changes. Blocks for the whole build: call it off the event loop.
+        """
+        if self.built and not self.stale and self._resync_due():
+            state = read_catalog_state(db)
+            if state is not None and state[0] != self.version:
+                self.invalidate_all()
+        if not self.built or self.stale:
+            with self._build_lock:
+                if not self.built or self.stale:
+                    self._build(db)
+            return
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+        found = db.execute(select(*self._columns()).where(Offer.id.in_(pending))).all()
+        for row in found:
+            self.upsert(row)
+        for offer_id in pending - {row[0] for row in found}:
+            self.remove(offer_id)
+
+    @staticmethod
+    def _columns():
+        return Offer.id, Offer.title, Offer.description, Offer.category, Offer.features
+
+    def _build(self, db: Session):
+        with self._lock:
+            self._pending.clear()
+            self.stale = False
+        # Read before the offers: a write committed in between is signalled, or seen at the next check
+        state = read_catalog_state(db)
+        self.load(db.execute(select(*self._columns())).all())
+        self.version = None if state is None else state[0]
+        self.checked_at = time.monotonic()
+
+    def _resync_due(self) -> bool:
+        now = time.monotonic()
+        if now - self.checked_at < self.resync_interval:
+            return False
+        self.checked_at = now
+        return True
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            term_id = self.vocabulary[term] = len(self.vocabulary)
+            if term_id == len(self.df):
+                self.df = np.concatenate([self.df, np.zeros_like(self.df)])
+                self.idf = np.concatenate([self.idf, np.zeros_like(self.idf)])
+        return term_id
+
+    def _set_idf(self, term_ids: np.ndarray, documents: int):
+        self.idf[term_ids] = np.log((1 + documents) / (1 + self.df[term_ids])) + 1.0
+        self.idf[PADDING] = 0.0
+
+    def _put(self, offer_id: int, counts: Counter):
+        if not counts:
+            return
+        term_ids = np.fromiter((self._term_id(term) for term in counts), dtype=np.int32, count=len(counts))
+        tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        if self.built:
+            # Incremental: count this offer in, and give its terms an up-to-date IDF
+            self.df[term_ids] += 1
+            self._set_idf(term_ids, len(self.row_of) + 1)
+        if len(term_ids) > self.width:
+            keep = np.argpartition(-(tf * self.idf[term_ids]), self.width - 1)[:self.width]
+            term_ids, tf = term_ids[keep], tf[keep]
+
+        row = self.free_rows.pop() if self.free_rows else self._new_row()
+        self.terms[row] = PADDING
+        self.tf[row] = 0.0
+        self.terms[row, :len(term_ids)] = term_ids
+        self.tf[row, :len(term_ids)] = tf
+        self.offer_ids[row] = offer_id
+        self.row_of[offer_id] = row
+        if self.built:
+            self._scale(slice(row, row + 1))  # load() scales every row at once at the end
+
+    def _remove(self, offer_id: int):
+        row = self.row_of.pop(offer_id, None)
+        if row is None:
+            return
+        terms = self.terms[row]
+        self.df[terms[terms != PADDING]] -= 1
+        self.terms[row] = PADDING
+        self.tf[row] = 0.0
+        self.scaled[row] = 0.0
+        self.free_rows.append(row)
+
+    def _new_row(self) -> int:
+        if self.rows == len(self.offer_ids):
+            # Capacity doubles, so growing to N offers copies the arrays O(log N) times
+            self.terms = np.concatenate([self.terms, np.zeros_like(self.terms)])
+            self.tf = np.concatenate([self.tf, np.zeros_like(self.tf)])
+            self.scaled = np.concatenate([self.scaled, np.zeros_like(self.scaled)])
+            self.offer_ids = np.concatenate([self.offer_ids, np.zeros_like(self.offer_ids)])
+            self.scratch = np.empty_like(self.scaled)
+        self.rows += 1
+        return self.rows - 1
+
+    def _scale(self, rows: slice):
+        weighted = self.tf[rows] * self.idf[self.terms[rows]]
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        self.scaled[rows] = weighted / np.maximum(norms, 1e-12)
+
+    def _maybe_refresh(self):
+        if abs(len(self.row_of) - self.refreshed_at) > self.idf_refresh * max(self.refreshed_at, 1):
+            self._refresh()
+
+    def _refresh(self):
+        # Document frequencies of the stored terms, so the ones cut by the width limit do not linger
+        self.df[:] = 0
+        counted = np.bincount(self.terms[:self.rows].ravel(), minlength=len(self.vocabulary))
+        self.df[:len(counted)] = counted
+        self._set_idf(np.arange(len(self.vocabulary)), len(self.row_of))
+        self._scale(slice(0, self.rows))
+        self.refreshed_at = len(self.row_of)
+
+    def recommend(self, liked_offer_ids: Sequence[int], k: int,
+                  exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """
+        Returns up to k (offer_id, score) pairs, best first, for the profile of
+        `liked_offer_ids`. Scores are mean cosine similarities; offers in
+        `exclude` and offers sharing no term with the profile are left out.
+        """
+        with self._lock:
+            liked_rows = [self.row_of[i] for i in liked_offer_ids if i in self.row_of]
+            if not liked_rows or k <= 0:
+                return []
+            profile = np.zeros(len(self.vocabulary), dtype=np.float32)
+            np.add.at(profile, self.terms[liked_rows].ravel(), self.scaled[liked_rows].ravel())
+            profile[PADDING] = 0.0
+
+            # Term ids are always in range: mode="clip" skips numpy's bounds check, the costliest step here
+            gathered = np.take(profile, self.terms[:self.rows], mode="clip", out=self.scratch[:self.rows])
+            scores = np.einsum("ij,ij->i", gathered, self.scaled[:self.rows])
+            excluded = [self.row_of[i] for i in exclude if i in self.row_of]
+            scores[excluded] = 0.0
+            candidates = int(np.count_nonzero(scores > 0))
+            k = min(k, candidates)
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(int(self.offer_ids[row]), float(scores[row]) / len(liked_rows)) for row in top]
+
+
+offer_index = OfferIndex(
+    settings.RECOMMEND_TERMS_PER_OFFER, settings.RECOMMEND_IDF_REFRESH, settings.RECOMMEND_RESYNC_SECONDS,
+)
+
+
+def _apply_offer_changes(fields):
+    if fields["offer_ids"] is None:
+        offer_index.invalidate_all()
+    else:
+        for offer_id in fields["offer_ids"]:
+            offer_index.invalidate(offer_id)
+
+
+on_signal("recommend", _apply_offer_changes)
+
+
+def offers_changed(db: Session, offer_ids: Iterable[int]):
+    """Marks offers as created, edited or deleted by the current transaction, on every worker."""
+    offer_ids = sorted(set(offer_ids))
+    if offer_ids:
+        publish_signal(db, "recommend", offer_ids=offer_ids if len(offer_ids) <= SIGNAL_MAX_IDS else None)
@@ -0,0 +1,271 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, case, delete, select, text, func, or_, Integer, Float
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, Query
+from ..models.offer import Offer
+from ..models.user import User
+from ..models.application import Application
+from ..models.cv_document import CvDocument
+
+# Full-text search over offers, and over candidates' CV text.
+# On PostgreSQL the ranked document lives in the deferred `Offer.search_vector`
+# tsvector column (GIN indexed). Everywhere else (local SQLite runs) an FTS5 virtual table
+# keyed by the offer id plays the same role. CV text works the same way with
+# `CvDocument.search_vector` and the CV_FTS_TABLE table keyed by the document id.
+
+FTS_TABLE = "offers_fts"
+CV_FTS_TABLE = "cv_documents_fts"
+FTS_TABLES = (FTS_TABLE, CV_FTS_TABLE)
+TS_CONFIG = "simple"  # Offers are a mix of French and English, so no stemming
+
+_PG_DOCUMENT = f"""
+    setweight(to_tsvector('{TS_CONFIG}', coalesce(offers.title, '')), 'A') ||
+    setweight(to_tsvector('{TS_CONFIG}', coalesce(companies.name, '')), 'B') ||
+    setweight(to_tsvector('{TS_CONFIG}', coalesce(offers.features::text, '')), 'C') ||
+    setweight(to_tsvector('{TS_CONFIG}', coalesce(offers.description, '')), 'D')
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def init_search(engine: Engine):
+    """
+    Creates the search structures `create_all` cannot add to an existing
+    database and indexes any offer that is not searchable yet.
+    """
+    with engine.begin() as conn:
+        if _dialect(conn) == "postgresql":
+            conn.execute(text("ALTER TABLE offers ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_offers_search_vector ON offers USING gin (search_vector)"
+            ))
+            conn.execute(text(
+                f"UPDATE offers SET search_vector = {_PG_DOCUMENT} FROM companies "
+                "WHERE companies.id = offers.company_id AND offers.search_vector IS NULL"
+            ))
+        else:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(title, company, features, description)"
+            ))
+            conn.execute(text(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, company, features, description) "
+                "SELECT offers.id, offers.title, companies.name, offers.features, offers.description "
+                "FROM offers LEFT JOIN companies ON companies.id = offers.company_id "
+                f"WHERE offers.id NOT IN (SELECT rowid FROM {FTS_TABLE})"
+            ))
+            conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {CV_FTS_TABLE} USING fts5(text)"))
+            conn.execute(text(
+                f"INSERT INTO {CV_FTS_TABLE} (rowid, text) SELECT id, text FROM cv_documents "
+                f"WHERE text IS NOT NULL AND id NOT IN (SELECT rowid FROM {CV_FTS_TABLE})"
+            ))
+
+
+def search_ready(conn) -> bool:
+    """True when the search structures exist (on PostgreSQL they come with the migrations)."""
+    if _dialect(conn) == "postgresql":
+        return True
+    found = conn.execute(
+        text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name IN (:offers, :cvs)"),
+        {"offers": FTS_TABLE, "cvs": CV_FTS_TABLE},
+    ).scalar()
+    return found == len(FTS_TABLES)
+
+
+def drop_search(engine: Engine):
+    with engine.begin() as conn:
+        if _dialect(conn) != "postgresql":
+            for table in FTS_TABLES:
+                conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def index_offer(db: Session, offer_id: int):
+    """Refreshes the search document of one offer. Runs inside the caller's transaction."""
+    index_offers(db, [offer_id])
+
+
+def index_offers(db: Session, offer_ids: List[int]):
+    """Refreshes the search documents of several offers in one statement per table."""
+    if not offer_ids:
+        return
+    ids = bindparam("ids", expanding=True)
+    if _dialect(db.get_bind()) == "postgresql":
+        db.execute(
+            text(
+                f"UPDATE offers SET search_vector = {_PG_DOCUMENT} FROM companies "
+                "WHERE companies.id = offers.company_id AND offers.id IN :ids"
+            ).bindparams(ids),
+            {"ids": list(offer_ids)},
+        )
+    else:
+        remove_offers(db, offer_ids)
+        db.execute(
+            text(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, company, features, description) "
+                "SELECT offers.id, offers.title, companies.name, offers.features, offers.description "
+                "FROM offers LEFT JOIN companies ON companies.id = offers.company_id "
+                "WHERE offers.id IN :ids"
+            ).bindparams(ids),
+            {"ids": list(offer_ids)},
+        )
+
+
+def remove_offer(db: Session, offer_id: int):
+    remove_offers(db, [offer_id])
+
+
+def remove_offers(db: Session, offer_ids: List[int]):
+    # The tsvector column goes away with its row, only the FTS5 table needs cleanup
+    if offer_ids and _dialect(db.get_bind()) != "postgresql":
+        db.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(offer_ids)},
+        )
+
+
+def index_cv_document(db: Session, document_id: int, document_text: Optional[str]):
+    """Makes a CV document searchable. Runs inside the caller's transaction."""
+    if _dialect(db.get_bind()) == "postgresql":
+        db.execute(
+            text(f"UPDATE cv_documents SET search_vector = to_tsvector('{TS_CONFIG}', coalesce(:text, '')) "
+                 "WHERE id = :id"),
+            {"id": document_id, "text": document_text},
+        )
+    else:
+        remove_cv_documents(db, [document_id])
+        if document_text:
+            db.execute(
+                text(f"INSERT INTO {CV_FTS_TABLE} (rowid, text) VALUES (:id, :text)"),
+                {"id": document_id, "text": document_text},
+            )
+
+
+def remove_cv_documents(db: Session, document_ids: List[int]):
+    if document_ids and _dialect(db.get_bind()) != "postgresql":
+        db.execute(
+            text(f"DELETE FROM {CV_FTS_TABLE} WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(document_ids)},
+        )
+
+
+def prune_cv_documents(db: Session, sha256s: Optional[List[str]] = None) -> int:
+    """Deletes the CV documents (all, or those of `sha256s`) no user points to any more. Returns how many went."""
+    statement = select(CvDocument.id).where(~select(User.id).where(User.cv_sha256 == CvDocument.sha256).exists())
+    if sha256s is not None:
+        statement = statement.where(CvDocument.sha256.in_(sha256s))
+    unreferenced = db.scalars(statement).all()
+    if unreferenced:
+        remove_cv_documents(db, unreferenced)
+        db.execute(delete(CvDocument).where(CvDocument.id.in_(unreferenced)))
+    return len(unreferenced)
+
+
+def _fts5_query(q: str) -> Optional[str]:
+    # Quote every token so user input can never be parsed as FTS5 syntax,
+    # and let the last one match as a prefix for search-as-you-type.
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def apply_search(db: Session, query: Query, q: str) -> Tuple[Query, Any]:
+    """
+    Restricts `query` to offers matching `q`. Returns the filtered query and a
+    relevance expression to sort by, where lower values are better matches.
+    """
+    if _dialect(db.get_bind()) == "postgresql":
+        ts_query = func.websearch_to_tsquery(TS_CONFIG, q)
+        query = query.filter(Offer.search_vector.op("@@")(ts_query))
+        return query, -func.ts_rank_cd(Offer.search_vector, ts_query, type_=Float)
+
+    match = _fts5_query(q)
+    if match is None:
+        return query.filter(text("0 = 1")), Offer.id
+    # bm25 weights follow the column order: title, company, features, description
+    ranked = text(
+        f"SELECT rowid AS offer_id, bm25({FTS_TABLE}, 10.0, 5.0, 2.0, 1.0) AS rank "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    ).bindparams(match=match).columns(offer_id=Integer, rank=Float).subquery()
+    return query.join(ranked, ranked.c.offer_id == Offer.id), ranked.c.rank
+
+
+def apply_cv_search(db: Session, query: Query, q: str) -> Query:
+    """
+    Restricts an Application query to candidates whose CV text matches `q`
+    (every word, the last one as a prefix on SQLite). The order is left alone,
+    so keyset pagination keeps working.
+    """
+    matching = select(User.id).join(CvDocument, CvDocument.sha256 == User.cv_sha256)
+    if _dialect(db.get_bind()) == "postgresql":
+        matching = matching.where(CvDocument.search_vector.op("@@")(func.websearch_to_tsquery(TS_CONFIG, q)))
+    else:
+        match = _fts5_query(q)
+        if match is None:
+            return query.filter(text("0 = 1"))
+        matching = matching.where(CvDocument.id.in_(
+            text(f"SELECT rowid FROM {CV_FTS_TABLE} WHERE {CV_FTS_TABLE} MATCH :cv_match")
+            .bindparams(cv_match=match).columns(rowid=Integer)
+        ))
+    return query.filter(Application.stagiaire_id.in_(matching))
+
+
+def _is_paid():
+    # Stipends are free text such as "Paid (400 DT/month)" or "Unpaid"
+    return Offer.price.ilike("paid%")
+
+
+def apply_filters(
+    query: Query,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    duration: Optional[str] = None,
+    paid: Optional[bool] = None,
+) -> Query:
+    if category:
+        query = query.filter(Offer.category == category)
+    if location:
+        query = query.filter(Offer.location.ilike(f"%{location}%"))
+    if duration:
+        query = query.filter(Offer.duration.ilike(f"%{duration}%"))
+    if paid is not None:
+        is_paid = _is_paid()
+        query = query.filter(is_paid if paid else or_(~is_paid, Offer.price.is_(None)))
+    return query
+
+
+FACETS = ("category", "location", "duration", "paid")
+
+
+def facet_counts(query: Query) -> Dict[str, Any]:
+    """
+    Offer counts per category, location, duration and paid/unpaid for the
+    offers `query` selects, in one grouped query. It groups by all four at
+    once (portable, unlike GROUPING SETS) and folds the combinations here;
+    there are only as many as distinct (category, location, duration, paid)
+    tuples, far fewer than offers.
+    """
+    paid = case((_is_paid(), "paid"), else_="unpaid")
+    rows = query.with_entities(Offer.category, Offer.location, Offer.duration, paid, func.count())\
+        .group_by(Offer.category, Offer.location, Offer.duration, paid)\
+        .order_by(None)\
+        .all()
+    counts = {facet: defaultdict(int) for facet in FACETS}
+    total = 0
+    for *values, count in rows:
+        total += count
+        for facet, value in zip(FACETS, values):
+            counts[facet][value] += count
+    result: Dict[str, Any] = {"total": total}
+    for facet in FACETS:
+        ordered = sorted(counts[facet].items(), key=lambda item: (-item[1], item[0] or ""))
+        result[facet] = [{"value": value, "count": count} for value, count in ordered]
+    return result
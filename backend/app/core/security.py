@@ -1,12 +1,19 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+# Purpose claim of the tokens that only open GET /events/stream, see deps.decode_user_id
+STREAM_TOKEN_PURPOSE = "events"
+
+def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None, purpose: Optional[str] = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -14,11 +21,91 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode = {"exp": expire, "sub": str(subject)}
+    if purpose is not None:
+        to_encode["purpose"] = purpose
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def create_stream_token(subject: Union[str, Any]) -> str:
+    """A token that can only open the user's event stream, and only for EVENTS_TOKEN_EXPIRE_SECONDS."""
+    return create_access_token(
+        subject, timedelta(seconds=settings.EVENTS_TOKEN_EXPIRE_SECONDS), purpose=STREAM_TOKEN_PURPOSE
+    )
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool already has as much work queued as it accepts."""
+
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt in a dedicated process pool so a burst of logins cannot take
+    over the request threadpool. At most `workers + max_pending` calls are
+    admitted at once; the rest fail fast with PasswordHasherBusy (a 503).
+    With workers=0 hashing runs inline on the calling thread. Async routes
+    use run_async(), which awaits the worker process instead of parking a
+    request thread on it for the whole hash.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max(1, workers + max_pending))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    async def run_async(self, fn, *args):
+        if self.workers <= 0:
+            return await run_in_threadpool(fn, *args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher_pool = PasswordHasherPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+# Module level so they can be pickled into the worker processes
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return hasher_pool.run(_verify, plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    return hasher_pool.run(_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hasher_pool.run_async(_verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await hasher_pool.run_async(_hash, password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    # True when the hash was made with a different bcrypt cost than BCRYPT_ROUNDS
+    return pwd_context.needs_update(hashed_password)
@@ -0,0 +1,10 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# INSERT with ON CONFLICT support. PostgreSQL and SQLite (3.24+) share the
+# on_conflict_do_nothing / on_conflict_do_update API, only the construct differs.
+
+
+def conflict_insert(db: Session, entity):
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    return insert(entity)
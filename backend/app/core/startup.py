@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from .config import settings
+from .migrations import current_revision, head_revision, upgrade_database
+from .pool import warm_pool, warm_async_pool
+from .search import init_search, search_ready
+from .stats import init_stats
+
+# Per-worker startup, run from the FastAPI lifespan rather than at import, so
+# importing app.main (gunicorn --preload, tests, CLIs) opens no connection.
+# A worker whose database is already at the migration head only reads
+# alembic_version; the full upgrade, with its advisory lock, runs only when a
+# migration is pending. The pools are then warmed in the background and
+# /ready answers 503 until that is done.
+
+class StartupState:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.schema: Optional[str] = None  # "current" (fast path) or "upgraded"
+        self.schema_seconds: Optional[float] = None
+        self.startup_seconds: Optional[float] = None
+        self.warm_connections: Dict[str, int] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.startup_seconds is not None
+
+    def snapshot(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "schema": self.schema,
+            "schema_seconds": self.schema_seconds,
+            "startup_seconds": self.startup_seconds,
+            "warm_connections": self.warm_connections,
+            "error": self.error,
+        }
+
+
+state = StartupState()
+
+
+def schema_is_current(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        return current_revision(conn) == head_revision() and search_ready(conn)
+
+
+def prepare_database(engine: Engine) -> str:
+    """Brings the schema to head unless it already is there. Returns which path was taken."""
+    if schema_is_current(engine):
+        path = "current"
+    else:
+        upgrade_database(engine)
+        init_search(engine)
+        path = "upgraded"
+    init_stats(engine)
+    return path
+
+
+def prepare(engine: Engine):
+    started = time.perf_counter()
+    # A preloaded parent may have left connections behind, never share them across fork
+    engine.dispose(close=False)
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    state.schema = prepare_database(engine)
+    state.schema_seconds = round(time.perf_counter() - started, 4)
+
+
+async def warm_pools(engine: Engine, async_engine=None, retry_delay: float = 1.0):
+    while True:
+        try:
+            state.warm_connections["sync"] = await run_in_threadpool(warm_pool, engine, settings.DB_POOL_WARM)
+            if async_engine is not None:
+                state.warm_connections["async"] = await warm_async_pool(async_engine, settings.DB_POOL_WARM)
+            break
+        except Exception as exc:
+            # The database went away after the schema check: stay unready and retry
+            state.error = str(exc)
+            await asyncio.sleep(retry_delay)
+    state.error = None
+    state.startup_seconds = round(time.perf_counter() - state.started, 4)
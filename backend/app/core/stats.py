@@ -0,0 +1,238 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, cast, Date
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from .migrations import schema_lock
+from .sql import conflict_insert
+from ..models.stats import StatCounter, StatDaily
+from ..models.user import User
+from ..models.company import Company
+from ..models.offer import Offer
+from ..models.application import Application
+
+# Incrementally maintained platform statistics.
+# Write routes call the *_created / *_deleted / *_changed helpers inside their
+# own transaction, so the counters commit or roll back together with the rows
+# they count. Totals live in `stat_counters` ((metric, dimension) -> value,
+# dimension "" is the total) and daily rollups in `stat_daily` (rows created per
+# day, per role / category / current status). `rebuild` recomputes both from the
+# base tables to repair drift.
+
+TOTAL = ""
+METRICS = ("users", "companies", "offers", "applications")
+
+
+def _dim(value) -> str:
+    if value is None:
+        return "unknown"
+    return getattr(value, "value", value)
+
+
+def _day(timestamp: Optional[datetime] = None) -> date:
+    if timestamp is None:
+        return datetime.now(timezone.utc).date()
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date()
+
+
+def _upsert(db: Session, table, rows: List[dict], keys: List[str], absolute: bool = False):
+    if not rows:
+        return
+    # Rows always lock in key order, so two transactions moving counts in
+    # opposite directions (pending -> accepted, accepted -> pending) cannot deadlock
+    rows.sort(key=lambda row: tuple(row[key] for key in keys))
+    stmt = conflict_insert(db, table).values(rows)
+    value = stmt.excluded.value if absolute else table.c.value + stmt.excluded.value
+    stmt = stmt.on_conflict_do_update(index_elements=keys, set_={"value": value})
+    db.execute(stmt)
+
+
+def _apply(
+    db: Session,
+    counters: Dict[Tuple[str, str], int],
+    daily: Optional[Dict[Tuple[date, str, str], int]] = None,
+    absolute: bool = False,
+):
+    # One multi-row upsert per table, whatever the number of counters touched
+    _upsert(
+        db,
+        StatCounter.__table__,
+        [{"metric": m, "dimension": d, "value": v} for (m, d), v in counters.items() if v],
+        ["metric", "dimension"],
+        absolute,
+    )
+    _upsert(
+        db,
+        StatDaily.__table__,
+        [{"day": day, "metric": m, "dimension": d, "value": v} for (day, m, d), v in (daily or {}).items() if v],
+        ["day", "metric", "dimension"],
+        absolute,
+    )
+
+
+def user_created(db: Session, role, created_at: Optional[datetime] = None, delta: int = 1):
+    role = _dim(role)
+    _apply(
+        db,
+        {("users", TOTAL): delta, ("users", role): delta},
+        {(_day(created_at), "users", role): delta},
+    )
+
+
+def user_deleted(db: Session, role, created_at: Optional[datetime]):
+    user_created(db, role, created_at, delta=-1)
+
+
+def company_created(db: Session, delta: int = 1):
+    _apply(db, {("companies", TOTAL): delta})
+
+
+def offer_created(db: Session, category, created_at: Optional[datetime] = None, delta: int = 1):
+    category = _dim(category)
+    _apply(
+        db,
+        {("offers", TOTAL): delta, ("offers", category): delta},
+        {(_day(created_at), "offers", category): delta},
+    )
+
+
+def offers_created(db: Session, offers: List[Offer], delta: int = 1):
+    counters, daily = defaultdict(int), defaultdict(int)
+    for offer in offers:
+        category = _dim(offer.category)
+        counters[("offers", TOTAL)] += delta
+        counters[("offers", category)] += delta
+        daily[(_day(offer.created_at), "offers", category)] += delta
+    _apply(db, counters, daily)
+
+
+def offers_deleted(db: Session, offers: List[Offer]):
+    offers_created(db, offers, delta=-1)
+
+
+def offer_deleted(db: Session, category, created_at: Optional[datetime]):
+    offer_created(db, category, created_at, delta=-1)
+
+
+def offer_category_changed(db: Session, old, new, created_at: Optional[datetime]):
+    old, new = _dim(old), _dim(new)
+    if old == new:
+        return
+    day = _day(created_at)
+    _apply(
+        db,
+        {("offers", old): -1, ("offers", new): 1},
+        {(day, "offers", old): -1, (day, "offers", new): 1},
+    )
+
+
+def application_created(db: Session, status, applied_at: Optional[datetime] = None, delta: int = 1):
+    status = _dim(status)
+    _apply(
+        db,
+        {("applications", TOTAL): delta, ("applications", status): delta},
+        {(_day(applied_at), "applications", status): delta},
+    )
+
+
+def applications_deleted(db: Session, applications: List[Application]):
+    counters, daily = defaultdict(int), defaultdict(int)
+    for application in applications:
+        status = _dim(application.status)
+        counters[("applications", TOTAL)] -= 1
+        counters[("applications", status)] -= 1
+        daily[(_day(application.applied_at), "applications", status)] -= 1
+    _apply(db, counters, daily)
+
+
+def application_status_changed(db: Session, old, new, applied_at: Optional[datetime]):
+    application_statuses_changed(db, [(old, new, applied_at)])
+
+
+def application_statuses_changed(db: Session, changes: List[Tuple[object, object, Optional[datetime]]]):
+    """Takes (old status, new status, applied_at) triples."""
+    counters, daily = defaultdict(int), defaultdict(int)
+    for old, new, applied_at in changes:
+        old, new = _dim(old), _dim(new)
+        if old == new:
+            continue
+        day = _day(applied_at)
+        counters[("applications", old)] -= 1
+        counters[("applications", new)] += 1
+        daily[(day, "applications", old)] -= 1
+        daily[(day, "applications", new)] += 1
+    _apply(db, counters, daily)
+
+
+def totals(db: Session) -> Dict[str, int]:
+    rows = db.query(StatCounter.metric, StatCounter.value)\
+        .filter(StatCounter.dimension == TOTAL, StatCounter.metric.in_(METRICS)).all()
+    result = {metric: 0 for metric in METRICS}
+    result.update({metric: int(value) for metric, value in rows})
+    return result
+
+
+def timeseries(db: Session, metric: str, days: int) -> dict:
+    end = _day()
+    start = end - timedelta(days=days - 1)
+    rows = db.query(StatDaily.day, StatDaily.dimension, StatDaily.value)\
+        .filter(StatDaily.metric == metric, StatDaily.day >= start, StatDaily.day <= end).all()
+    by_day = defaultdict(dict)
+    for day, dimension, value in rows:
+        if value:
+            by_day[day][dimension] = int(value)
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        counts = by_day.get(day, {})
+        series.append({"day": day.isoformat(), "total": sum(counts.values()), "counts": counts})
+    return {"metric": metric, "start": start.isoformat(), "end": end.isoformat(), "series": series}
+
+
+def _day_expression(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", column), Date)
+    return func.date(column)
+
+
+def rebuild(db: Session):
+    """Recomputes every counter and rollup from the base tables, in one transaction."""
+    counters, daily = defaultdict(int), defaultdict(int)
+    sources = [
+        ("users", User.role, User.created_at),
+        ("offers", Offer.category, Offer.created_at),
+        ("applications", Application.status, Application.applied_at),
+    ]
+    for metric, dimension_column, created_column in sources:
+        day = _day_expression(db, created_column)
+        rows = db.query(day, dimension_column, func.count()).group_by(day, dimension_column).all()
+        for row_day, dimension, count in rows:
+            if isinstance(row_day, str):
+                row_day = date.fromisoformat(row_day)
+            dimension = _dim(dimension)
+            counters[(metric, TOTAL)] += count
+            counters[(metric, dimension)] += count
+            if row_day is not None:
+                daily[(row_day, metric, dimension)] += count
+    counters[("companies", TOTAL)] = db.query(func.count(Company.id)).scalar()
+
+    db.query(StatCounter).delete()
+    db.query(StatDaily).delete()
+    db.flush()
+    # Absolute values: a concurrent rebuild's rows, which the deletes above
+    # cannot see before it commits, are overwritten rather than added to
+    _apply(db, counters, daily, absolute=True)
+    db.commit()
+
+
+def init_stats(engine: Engine):
+    # First start on an existing database: seed the counters once. Workers
+    # starting together queue on the migration lock, and only the first one
+    # still finds the table empty.
+    with Session(engine) as db:
+        schema_lock(db.connection())
+        if db.query(StatCounter).first() is None:
+            rebuild(db)
@@ -0,0 +1,220 @@
+import hashlib
+import os
+import time
+import uuid
+from typing import Dict, Iterator, Optional, Set
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from sqlalchemy.orm import Session
+from .config import settings
+from ..models.user import User
+
+# Content-addressed file store for uploaded CVs.
+# Uploads are read in chunks and written from the threadpool, so the event loop
+# never blocks on disk I/O, hashed as they stream, and refused past CV_MAX_BYTES.
+# That check runs on the file Starlette has already parsed out of the form, so
+# UploadLimitMiddleware refuses oversized request bodies before they are read.
+# They land in a temp file that is renamed into place atomically under its
+# SHA-256, sharded two levels deep (cv/ab/cd/abcd...sha.pdf) so directories stay
+# small and identical uploads share one file. Files no user points to any more
+# are garbage-collected once older than STORAGE_GC_GRACE_SECONDS, which leaves
+# in-flight uploads of the same content alone.
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class UploadLimitMiddleware:
+    """
+    413 for request bodies on the upload routes that are larger than the
+    route's file limit plus FORM_OVERHEAD_BYTES: at once from Content-Length,
+    or as soon as a body sent without one goes past it. Starlette would
+    otherwise spool the whole multipart body to disk before the route runs.
+    """
+
+    FORM_OVERHEAD_BYTES = 64 * 1024  # Boundaries, part headers and small fields around the file
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits  # path -> largest file accepted
+
+    async def __call__(self, scope, receive, send):
+        max_file_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_file_bytes is None:
+            await self.app(scope, receive, send)
+            return
+        max_bytes = max_file_bytes + self.FORM_OVERHEAD_BYTES
+        too_large = JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload is too large. The maximum size is {max_file_bytes // (1024 * 1024)} MB."},
+        )
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    rejected = True
+                    await too_large(scope, receive, send)
+                    # The route sees a client that went away, and its own response is dropped
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+
+class ContentStore:
+    def __init__(self, root: str, namespace: str, max_bytes: int, chunk_size: int, grace_seconds: int):
+        self.root = root
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.grace_seconds = grace_seconds
+        self.tmp_dir = os.path.join(root, ".tmp")
+
+    def relative_path(self, sha256: str, suffix: str) -> str:
+        return "/".join([self.namespace, sha256[:2], sha256[2:4], sha256 + suffix])
+
+    def url_for(self, relative_path: str) -> str:
+        return f"/uploads/{relative_path}"
+
+    def sha256_for_url(self, url: Optional[str]) -> Optional[str]:
+        """The content hash a stored file is named after, None for files from before the store."""
+        path = self.path_for_url(url)
+        if path is None:
+            return None
+        name = os.path.splitext(os.path.basename(path))[0]
+        if len(name) != 64 or not url.startswith(f"/uploads/{self.namespace}/"):
+            return None
+        return name
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path_for_url(self, url: Optional[str]) -> Optional[str]:
+        if not url or not url.startswith("/uploads/"):
+            return None
+        relative = url[len("/uploads/"):]
+        path = os.path.normpath(os.path.join(self.root, relative))
+        # Never resolve outside the store
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            return None
+        return path
+
+    @staticmethod
+    def _write_chunk(handle, digest, chunk: bytes):
+        digest.update(chunk)
+        handle.write(chunk)
+
+    def _publish(self, tmp_path: str, final_path: str):
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        if os.path.exists(final_path):
+            # Same content already stored: keep one copy, refresh its GC clock
+            os.remove(tmp_path)
+            os.utime(final_path)
+        else:
+            os.replace(tmp_path, final_path)
+
+    async def save(self, upload: UploadFile, suffix: str) -> str:
+        """Stores `upload` and returns its URL under /uploads."""
+        await run_in_threadpool(os.makedirs, self.tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        handle = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            while True:
+                chunk = await upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise UploadTooLarge(self.max_bytes)
+                await run_in_threadpool(self._write_chunk, handle, digest, chunk)
+            await run_in_threadpool(handle.close)
+            relative = self.relative_path(digest.hexdigest(), suffix)
+            await run_in_threadpool(self._publish, tmp_path, os.path.join(self.root, relative))
+        except BaseException:
+            handle.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.url_for(relative)
+
+    def _referenced_urls(self, db: Session) -> Set[str]:
+        rows = db.query(User.cv_url).filter(User.cv_url.isnot(None)).distinct()
+        return {url for (url,) in rows}
+
+    def _is_collectable(self, path: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(path) > self.grace_seconds
+        except FileNotFoundError:
+            return False
+
+    def release(self, db: Session, url: Optional[str]):
+        """Deletes the file behind `url` if no user references it any more."""
+        path = self.path_for_url(url)
+        if path is None or not self._is_collectable(path):
+            return
+        if db.query(User.id).filter(User.cv_url == url).first() is None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _stored_files(self) -> Iterator[str]:
+        for directory, _, filenames in os.walk(os.path.join(self.root, self.namespace)):
+            for filename in filenames:
+                yield os.path.join(directory, filename)
+        # Files written before the store existed (uploads/cv_<user>_<name>)
+        if os.path.isdir(self.root):
+            for filename in os.listdir(self.root):
+                if filename.startswith(f"{self.namespace}_"):
+                    yield os.path.join(self.root, filename)
+
+    def collect_garbage(self, db: Session) -> int:
+        """Sweeps unreferenced files (and stale temp files) past the grace period."""
+        referenced = {self.path_for_url(url) for url in self._referenced_urls(db)}
+        removed = 0
+        for path in self._stored_files():
+            if path not in referenced and self._is_collectable(path):
+                os.remove(path)
+                removed += 1
+        if os.path.isdir(self.tmp_dir):
+            for filename in os.listdir(self.tmp_dir):
+                path = os.path.join(self.tmp_dir, filename)
+                if self._is_collectable(path):
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+cv_storage = ContentStore(
+    root=settings.UPLOAD_DIR,
+    namespace="cv",
+    max_bytes=settings.CV_MAX_BYTES,
+    chunk_size=settings.UPLOAD_CHUNK_SIZE,
+    grace_seconds=settings.STORAGE_GC_GRACE_SECONDS,
+)
@@ -1,35 +1,57 @@
-from typing import Generator
+from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .database import get_db
+from .database import get_db, get_async_db
 from .core.config import settings
 from .models.user import User
+from .core.principals import principal_cache, snapshot, attach, load_principal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def decode_user_id(token: str, purpose: Optional[str] = None) -> int:
+    """
+    The user id of a valid token. Login tokens carry no purpose; a token
+    issued for one `purpose` (the event stream's) is refused everywhere else.
+    """
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("purpose") != purpose:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return int(user_id)
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    user = load_principal(db, decode_user_id(token))
+    if user is None:
+        raise credentials_exception
+    return user
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    user_id = decode_user_id(token)
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return await db.merge(attach(cached), load=False)
+    user = await db.get(User, user_id)
     if user is None:
         raise credentials_exception
+    principal_cache.put(user_id, snapshot(user))
     return user
 
 def get_current_active_user(
@@ -46,11 +68,19 @@ def get_current_admin(
         )
     return current_user
 
-def get_current_company(
-    current_user: User = Depends(get_current_user),
-) -> User:
+def _require_company(current_user: User) -> User:
     if current_user.role != "company" and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Only companies can perform this action"
         )
     return current_user
+
+def get_current_company(
+    current_user: User = Depends(get_current_user),
+) -> User:
+    return _require_company(current_user)
+
+async def get_current_company_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    return _require_company(current_user)
@@ -0,0 +1,244 @@
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+from typing import Dict, Iterable, Iterator, List
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.engine import Connection
+from .database import SessionLocal, engine
+from .models.user import User, UserRole
+from .models.company import Company
+from .models.offer import Offer
+from .models.application import Application, ApplicationStatus
+from .models import stats as stats_models  # noqa: F401
+from .core.security import get_password_hash
+from .core.migrations import upgrade_database
+from .core.search import init_search
+from .core import stats
+
+# Synthetic data at a chosen scale factor, for capacity and load testing.
+# Scale factor 1 is about 10k users (1k of them companies), 50k offers and
+# 500k applications, and everything grows linearly with it. Rows are streamed
+# in batches: COPY on PostgreSQL, executemany elsewhere, all in one
+# transaction. Every synthetic user shares one password, hashed once.
+
+EMAIL_DOMAIN = "synthetic.tn"
+
+# Category popularity follows a Zipf law over this ranking
+CATEGORIES = [
+    "Software Engineering", "Data Science", "Marketing", "UI/UX Design", "Finance", "Sales",
+    "Electrical Engineering", "Human Resources", "Mechanical Engineering", "Civil Engineering",
+    "Legal", "Hospitality",
+]
+LOCATIONS = [("Tunis", 40), ("Sfax", 12), ("Sousse", 12), ("Remote", 10), ("Ariana", 8), ("Nabeul", 5),
+             ("Monastir", 5), ("Bizerte", 4), ("Gabes", 2), ("Kairouan", 2)]
+DURATIONS = ["1 Month", "2 Months", "3 Months", "4-6 Months", "6 Months"]
+PRICES = ["Unpaid", "Paid (300 DT/month)", "Paid (400 DT/month)", "Paid (600 DT/month)"]
+SKILLS = ["python", "react", "sql", "excel", "figma", "seo", "java", "docker", "communication", "autocad",
+          "power bi", "accounting", "negotiation", "matlab", "english", "french"]
+STATUSES = [(ApplicationStatus.PENDING, 60), (ApplicationStatus.REJECTED, 25), (ApplicationStatus.ACCEPTED, 15)]
+
+HISTORY_DAYS = 730  # Users and offers are spread over the last two years
+
+
+def plan(scale: float) -> Dict[str, int]:
+    return {
+        "companies": max(int(1_000 * scale), 1),
+        "students": max(int(9_000 * scale), 1),
+        "offers": max(int(50_000 * scale), 1),
+        "applications": int(500_000 * scale),
+    }
+
+
+def _cumulative(weights: Iterable[float]) -> List[float]:
+    return list(accumulate(weights))
+
+
+def _next_id(conn: Connection, table: Table) -> int:
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+class Loader:
+    """Appends rows to a table in batches, with COPY when the driver has it."""
+
+    def __init__(self, conn: Connection, batch_size: int):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+
+    def load(self, table: Table, rows: Iterator[dict]) -> int:
+        started, total = time.perf_counter(), 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            if self.copy:
+                self._copy(table, batch)
+            else:
+                self.conn.execute(table.insert(), batch)
+            total += len(batch)
+        elapsed = time.perf_counter() - started
+        print(f"  {table.name:<14} {total:>10} rows  {elapsed:7.1f} s  {total / max(elapsed, 1e-9):>10.0f} rows/s")
+        return total
+
+    def _copy(self, table: Table, batch: List[dict]):
+        columns = list(batch[0])
+        # The column types' own bind processing, so enums and JSON reach COPY as the INSERT would send them
+        processors = [table.c[name].type.bind_processor(self.conn.dialect) for name in columns]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            values = []
+            for name, process in zip(columns, processors):
+                value = row[name]
+                if process is not None:
+                    value = process(value)
+                values.append("" if value is None else value)
+            writer.writerow(values)
+        buffer.seek(0)
+        cursor = self.conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+
+def generate(conn: Connection, scale: float, seed: int, password: str, batch_size: int) -> Dict[str, int]:
+    rng = random.Random(seed)
+    sizes = plan(scale)
+    now = datetime.now(timezone.utc)
+    hashed = get_password_hash(password)
+    loader = Loader(conn, batch_size)
+
+    def past(days: float) -> datetime:
+        return now - timedelta(seconds=rng.random() * days * 86400)
+
+    user_base = _next_id(conn, User.__table__)
+    company_base = _next_id(conn, Company.__table__)
+    offer_base = _next_id(conn, Offer.__table__)
+    application_base = _next_id(conn, Application.__table__)
+    n_companies, n_students = sizes["companies"], sizes["students"]
+
+    # Company accounts first, then students: user ids are contiguous ranges
+    loader.load(User.__table__, (
+        {
+            "id": user_base + i,
+            "email": f"company{i}@{EMAIL_DOMAIN}" if i < n_companies else f"student{i - n_companies}@{EMAIL_DOMAIN}",
+            "name": f"Company {i}" if i < n_companies else f"Student {i - n_companies}",
+            "password": hashed,
+            "role": UserRole.COMPANY if i < n_companies else UserRole.STAGIAIRE,
+            "created_at": past(HISTORY_DAYS),
+        }
+        for i in range(n_companies + n_students)
+    ))
+    loader.load(Company.__table__, (
+        {
+            "id": company_base + i, "user_id": user_base + i, "name": f"Company {i}",
+            "description": "Synthetic company profile.", "website": f"www.company{i}.{EMAIL_DOMAIN}",
+            "created_at": past(HISTORY_DAYS),
+        }
+        for i in range(n_companies)
+    ))
+
+    # Offers: a few companies post most of them (Pareto), categories follow Zipf
+    company_weights = _cumulative(rng.paretovariate(2.0) for _ in range(n_companies))
+    category_weights = [1 / rank for rank in range(1, len(CATEGORIES) + 1)]
+    category_cumulative = _cumulative(category_weights)
+    location_cumulative = _cumulative(weight for _, weight in LOCATIONS)
+    offer_created: List[datetime] = []
+    offer_popularity: List[float] = []
+
+    def offers() -> Iterator[dict]:
+        for i in range(sizes["offers"]):
+            category_index = rng.choices(range(len(CATEGORIES)), cum_weights=category_cumulative)[0]
+            created_at = past(HISTORY_DAYS / 2)
+            offer_created.append(created_at)
+            # Heavy-tailed draw, scaled by how popular the category is
+            offer_popularity.append(rng.paretovariate(1.6) * category_weights[category_index])
+            yield {
+                "id": offer_base + i,
+                "company_id": company_base + rng.choices(range(n_companies), cum_weights=company_weights)[0],
+                "title": f"{CATEGORIES[category_index]} Intern #{i}",
+                "description": f"Synthetic {CATEGORIES[category_index].lower()} internship offer number {i}.",
+                "category": CATEGORIES[category_index],
+                "duration": rng.choice(DURATIONS),
+                "location": rng.choices(LOCATIONS, cum_weights=location_cumulative)[0][0],
+                "price": rng.choice(PRICES),
+                "features": rng.sample(SKILLS, rng.randint(1, 4)),
+                "created_at": created_at,
+            }
+
+    loader.load(Offer.__table__, offers())
+
+    # Applications per offer are proportional to its popularity, capped by the
+    # number of students; each offer draws distinct students, so (student, offer) stays unique
+    total_popularity = sum(offer_popularity)
+    status_cumulative = _cumulative(weight for _, weight in STATUSES)
+    first_student = user_base + n_companies
+
+    def applications() -> Iterator[dict]:
+        next_id = application_base
+        for index, popularity in enumerate(offer_popularity):
+            expected = popularity / total_popularity * sizes["applications"]
+            count = min(int(expected) + (rng.random() < expected % 1), n_students)
+            open_days = max((now - offer_created[index]).total_seconds() / 86400, 0.001)
+            for student in rng.sample(range(n_students), count):
+                yield {
+                    "id": next_id,
+                    "stagiaire_id": first_student + student,
+                    "offer_id": offer_base + index,
+                    "status": rng.choices(STATUSES, cum_weights=status_cumulative)[0][0],
+                    "applied_at": now - timedelta(days=rng.random() * min(open_days, 60)),
+                }
+                next_id += 1
+
+    loader.load(Application.__table__, applications())
+
+    if conn.dialect.name == "postgresql":
+        # Explicit ids were inserted, move the sequences past them
+        for table in ("users", "companies", "offers", "applications"):
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+    return sizes
+
+
+def generate_data(scale: float, seed: int = 42, password: str = "password", batch_size: int = 50_000):
+    upgrade_database(engine)
+    with engine.connect() as conn:
+        taken = conn.execute(
+            select(User.id).where(User.email == f"company0@{EMAIL_DOMAIN}")
+        ).first()
+    if taken:
+        raise SystemExit("Synthetic data is already loaded; run `python -m reset_db` first.")
+
+    started = time.perf_counter()
+    print(f"Generating scale factor {scale}: {plan(scale)}")
+    with engine.begin() as conn:
+        generate(conn, scale, seed, password, batch_size)
+
+    print("Indexing offers for search and rebuilding statistics ...")
+    init_search(engine)
+    db = SessionLocal()
+    try:
+        stats.rebuild(db)
+    finally:
+        db.close()
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    print(f"Done in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a synthetic data set sized by a scale factor.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="1 is about 10k users, 1k companies, 50k offers and 500k applications")
+    parser.add_argument("--seed", type=int, default=42, help="Same seed and scale, same data")
+    parser.add_argument("--password", default="password", help="Password of every synthetic account")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+    generate_data(args.scale, args.seed, args.password, args.batch_size)
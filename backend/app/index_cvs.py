@@ -0,0 +1,43 @@
+import argparse
+from sqlalchemy import select
+from .database import SessionLocal
+from .models.user import User
+from .core.jobs import enqueue
+from .core.storage import cv_storage
+from .tasks import index_cv_later
+
+def index_cvs(force: bool = False):
+    """
+    Queues the text extraction of every stored CV that has none yet, after
+    hashing the files uploaded before content-addressed storage. With `force`,
+    every CV is extracted again (e.g. after an extractor upgrade). Workers do
+    the extraction; run `python -m app.worker --until-idle` without an API up.
+    """
+    db = SessionLocal()
+    try:
+        queued, seen = 0, set()
+        users = db.scalars(select(User).where(User.cv_url.isnot(None))).all()
+        for user in users:
+            if user.cv_sha256 is None:
+                path = cv_storage.path_for_url(user.cv_url)
+                try:
+                    user.cv_sha256 = cv_storage.sha256_for_url(user.cv_url) or cv_storage.hash_file(path)
+                except (OSError, TypeError):
+                    print(f"User {user.id}: CV file {user.cv_url} is missing")
+                    continue
+            if user.cv_sha256 in seen:
+                continue
+            seen.add(user.cv_sha256)
+            if force:
+                queued += enqueue(db, "cv.index", {"sha256": user.cv_sha256, "url": user.cv_url, "force": True})
+            else:
+                queued += index_cv_later(db, user.cv_sha256, user.cv_url)
+        db.commit()
+        print(f"Queued {queued} CV(s) for text extraction ({len(seen)} distinct files)")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue CV text extraction for the candidate search.")
+    parser.add_argument("--force", action="store_true", help="Extract every CV again")
+    index_cvs(parser.parse_args().force)
@@ -1,14 +1,23 @@
 from sqlalchemy.orm import Session
-from .database import SessionLocal, engine, Base
+from .database import SessionLocal, engine
 from .models.user import User, UserRole
 from .models.company import Company
 from .models.offer import Offer
 from .models.application import Application
 from .core.security import get_password_hash
+from .core.migrations import upgrade_database
+from .core.search import init_search
+from .core import stats
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """
+    Seeds the demo accounts in one transaction. For production-sized data sets
+    use `python -m app.generate_data --scale N`.
+    """
+    upgrade_database(engine)
     db = SessionLocal()
+    # The demo accounts share one password, hash it once
+    demo_password = get_password_hash("password")
     
     # Check if admin exists
     admin = db.query(User).filter(User.email == "admin@test.tn").first()
@@ -16,11 +25,10 @@ def init_db():
         admin = User(
             email="admin@test.tn",
             name="Platform Admin",
-            password=get_password_hash("password"),
+            password=demo_password,
             role=UserRole.ADMIN
         )
         db.add(admin)
-        db.commit()
     
     # Check if company exists
     company_user = db.query(User).filter(User.email == "company@test.tn").first()
@@ -28,12 +36,11 @@ def init_db():
         company_user = User(
             email="company@test.tn",
             name="TechSolutions Tunisia",
-            password=get_password_hash("password"),
+            password=demo_password,
             role=UserRole.COMPANY
         )
         db.add(company_user)
-        db.commit()
-        db.refresh(company_user)
+        db.flush()
         
         company_profile = Company(
             user_id=company_user.id,
@@ -42,8 +49,7 @@ def init_db():
             website="www.techsolutions.tn"
         )
         db.add(company_profile)
-        db.commit()
-        db.refresh(company_profile)
+        db.flush()
         
         # Add some offers
         offer1 = Offer(
@@ -66,7 +72,6 @@ def init_db():
         )
         db.add(offer1)
         db.add(offer2)
-        db.commit()
 
     # Check if student exists
     student_user = db.query(User).filter(User.email == "student@test.tn").first()
@@ -74,13 +79,16 @@ def init_db():
         student_user = User(
             email="student@test.tn",
             name="Bilel Ayari",
-            password=get_password_hash("password"),
+            password=demo_password,
             role=UserRole.STAGIAIRE
         )
         db.add(student_user)
-        db.commit()
+    db.flush()
 
+    # Mock rows are inserted directly, so recount them in one pass (commits)
+    stats.rebuild(db)
     db.close()
+    init_search(engine)
     print("Database initialized with mock data!")
 
 if __name__ == "__main__":
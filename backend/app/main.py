@@ -1,49 +1,126 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from .database import engine, Base
-import os
-from .routes import auth, offers, applications, admin
+from starlette.concurrency import run_in_threadpool
+from . import database
+from .database import SessionLocal, engine
+from .routes import auth, offers, applications, admin, internal, files, events, offers_async, applications_async
 from .core.config import settings
+from .core import startup
+from .core import events as event_broker
+from .core import jobs
+from . import tasks  # noqa: F401  (registers the job handlers)
+from .core.security import PasswordHasherBusy, hasher_pool
+from .core import metrics
+from .core.catalog_cache import CatalogCacheMiddleware
+from .core.storage import UploadLimitMiddleware
 
-# Initialize database tables on startup
-# In a production environment, you would typically use Alembic for migrations
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    description="Backend API for Tunisia Internship Management Platform",
-    version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
-
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = "uploads"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
-
-# Mount static files
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
-
-# CORS Middleware configuration
-# Allows communication between the React frontend and the FastAPI backend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.BACKEND_CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include API Routers with descriptive tags for documentation
-app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-app.include_router(offers.router, prefix="/offers", tags=["Internship Offers"])
-app.include_router(applications.router, prefix="/applications", tags=["Internship Applications"])
-app.include_router(admin.router, prefix="/admin", tags=["Administrative Control"])
-
-@app.get("/", tags=["Root"])
-async def root():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema check (or migration) before serving, pool warm-up in the background
+    await run_in_threadpool(startup.prepare, engine)
+    event_broker.start(engine, asyncio.get_running_loop())
+    warm_up = asyncio.create_task(startup.warm_pools(engine, database.async_engine))
+    job_worker = jobs.Worker(SessionLocal) if settings.JOBS_EMBEDDED_WORKER else None
+    job_runner = asyncio.create_task(job_worker.run()) if job_worker else None
+    yield
+    warm_up.cancel()
+    if job_worker:
+        job_worker.stop()
+        await job_runner
+    event_broker.stop()
+    hasher_pool.shutdown()
+
+def create_app() -> FastAPI:
     """
-    Root endpoint to verify the API is alive.
+    Builds the application without touching the database, so it can be
+    imported by a preloading parent (gunicorn --preload) and forked.
+    Startup work runs per worker in `lifespan`.
     """
-    return {"message": "Tunisie Internship Platform API is operational", "docs": "/docs"}
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description="Backend API for Tunisia Internship Management Platform",
+        version="1.0.0",
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
+    )
+
+
+    # Unauthenticated static access to uploads, off unless UPLOADS_PUBLIC is set.
+    # CVs are otherwise downloaded through the authorized /files routes.
+    if settings.UPLOADS_PUBLIC:
+        # The directory is created at startup, not yet when the app is built
+        app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR, check_dir=False), name="uploads")
+
+    # Cached, conditional responses for the public offer catalog. Added before CORS
+    # so it runs inside it and cached responses still carry the CORS headers.
+    app.add_middleware(CatalogCacheMiddleware, session_factory=SessionLocal)
+    # Oversized uploads are refused before their body is read, also inside CORS
+    app.add_middleware(UploadLimitMiddleware, limits={"/auth/upload-cv": settings.CV_MAX_BYTES})
+
+    # CORS Middleware configuration
+    # Allows communication between the React frontend and the FastAPI backend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.BACKEND_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # In async mode the read routes are served by their async counterparts.
+    # They are registered first so they take precedence over the sync versions.
+    if settings.DB_ASYNC:
+        app.include_router(offers_async.router, prefix="/offers", tags=["Internship Offers"])
+        app.include_router(applications_async.router, prefix="/applications", tags=["Internship Applications"])
+
+    # Prometheus instrumentation, outermost so it times the whole stack
+    if settings.METRICS_ENABLED:
+        metrics.instrument_engine(engine)
+        if database.async_engine is not None:
+            metrics.instrument_engine(database.async_engine.sync_engine)
+        app.add_middleware(metrics.MetricsMiddleware, router_app=app)
+
+        @app.get("/metrics", include_in_schema=False, dependencies=[Depends(internal.require_internal_token)])
+        def get_metrics():
+            content, media_type = metrics.render_metrics()
+            return Response(content=content, media_type=media_type)
+
+    # Include API Routers with descriptive tags for documentation
+    app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
+    app.include_router(offers.router, prefix="/offers", tags=["Internship Offers"])
+    app.include_router(applications.router, prefix="/applications", tags=["Internship Applications"])
+    app.include_router(admin.router, prefix="/admin", tags=["Administrative Control"])
+    app.include_router(files.router, prefix="/files", tags=["Files"])
+    app.include_router(events.router, prefix="/events", tags=["Events"])
+    app.include_router(internal.router, prefix="/internal", tags=["Internal"])
+
+    @app.exception_handler(PasswordHasherBusy)
+    async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Authentication is busy, please retry shortly"},
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+        )
+
+    @app.get("/", tags=["Root"])
+    async def root():
+        """
+        Root endpoint to verify the API is alive.
+        """
+        return {"message": "Tunisie Internship Platform API is operational", "docs": "/docs"}
+
+    @app.get("/ready", tags=["Root"])
+    async def ready():
+        """
+        Readiness probe: 503 until the schema is checked and the connection
+        pools are warm, 200 afterwards. `/` stays the liveness check.
+        """
+        return JSONResponse(status_code=200 if startup.state.ready else 503, content=startup.state.snapshot())
+
+    return app
+
+app = create_app()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -20,3 +20,10 @@ class Application(Base):
 
     stagiaire = relationship("User", backref="applications")
     offer = relationship("Offer", back_populates="applications")
+
+    __table_args__ = (
+        # One application per student and offer; also serves the stagiaire_id foreign key
+        Index("uq_applications_stagiaire_offer", "stagiaire_id", "offer_id", unique=True),
+        # Company dashboard counts and pending lists; also serves the offer_id foreign key
+        Index("ix_applications_offer_id_status_applied_at", "offer_id", "status", "applied_at"),
+    )
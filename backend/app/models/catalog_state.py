@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime
+from ..database import Base
+
+class CatalogState(Base):
+    """
+    Version of the public offer catalog, shared by every worker: bumped by
+    each transaction that changes offers (core.catalog_cache.touch_catalog),
+    together with the time of that change, which is the catalog's
+    Last-Modified. A single row, id 1.
+    """
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    modified_at = Column(DateTime(timezone=True), nullable=False)
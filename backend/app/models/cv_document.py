@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from ..database import Base
+
+class CvDocument(Base):
+    """
+    Text extracted from a stored CV (see core.cv_text), one row per file
+    content: CVs are stored under their SHA-256, so users who upload the same
+    file share a row and it is extracted once. `status` is "indexed", "empty"
+    (no text found, e.g. a scanned PDF or a legacy .doc) or "failed".
+    """
+    __tablename__ = "cv_documents"
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    text = deferred(Column(Text, nullable=True))
+    error = Column(Text, nullable=True)
+    extracted_at = Column(DateTime(timezone=True), nullable=False)
+    # Full-text document maintained by core.search (PostgreSQL only, SQLite uses FTS5)
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql"), nullable=True))
+
+    __table_args__ = (
+        Index("uq_cv_documents_sha256", "sha256", unique=True),
+        Index("ix_cv_documents_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class Job(Base):
+    """
+    Background work waiting for, or taken by, a worker (see core.jobs).
+    `status` is "queued", "running" or "done"; done rows are kept for
+    JOBS_RETENTION_SECONDS so their idempotency key still deduplicates.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    idempotency_key = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # not before; pushed back on each retry
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String, nullable=True)  # worker holding a running job
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Workers claim by (status = 'queued', run_at <= now); also finds expired leases and old done rows
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # enqueue() inserts ON CONFLICT DO NOTHING on it; NULL keys never conflict
+        Index("uq_jobs_idempotency_key", "idempotency_key", unique=True),
+    )
+
+class DeadJob(Base):
+    """
+    Dead-letter table: jobs that failed max_attempts times, with their last
+    error. They are kept until someone requeues (python -m app.worker
+    --requeue-dead) or deletes them.
+    """
+    __tablename__ = "dead_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # the id the job had in `jobs`
+    name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    idempotency_key = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=False)
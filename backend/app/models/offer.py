@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -10,12 +11,20 @@ class Offer(Base):
     company_id = Column(Integer, ForeignKey("companies.id"))
     title = Column(String, index=True)
     description = Column(Text)
-    category = Column(String)  # Added category for filtering
+    category = Column(String, index=True)  # Added category for filtering
     duration = Column(String)
     location = Column(String) # Added location
     price = Column(String)    # Added stipend/price
     features = Column(JSON, nullable=True) # Added features
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Full-text document maintained by core.search (PostgreSQL only, SQLite uses FTS5)
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql"), nullable=True))
 
     company = relationship("Company", back_populates="offers")
     applications = relationship("Application", back_populates="offer", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Company listings (newest first); also serves the company_id foreign key
+        Index("ix_offers_company_id_created_at", "company_id", "created_at"),
+        Index("ix_offers_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, BigInteger, Date
+from ..database import Base
+
+class StatCounter(Base):
+    """
+    Running total for a metric ("users", "offers", ...), optionally broken
+    down by a dimension such as a role, category or status ("" is the total).
+    """
+    __tablename__ = "stat_counters"
+
+    metric = Column(String, primary_key=True)
+    dimension = Column(String, primary_key=True, default="")
+    value = Column(BigInteger, nullable=False, default=0)
+
+class StatDaily(Base):
+    """
+    Daily rollup: rows created on `day` per metric and dimension, e.g. new
+    stagiaire accounts or applications applied that day by current status.
+    """
+    __tablename__ = "stat_daily"
+
+    day = Column(Date, primary_key=True)
+    metric = Column(String, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
@@ -27,4 +27,5 @@ class User(Base):
     password = Column(String, nullable=False) # Stores the bcrypt hashed password
     role = Column(Enum(UserRole), default=UserRole.STAGIAIRE)
     cv_url = Column(String, nullable=True) # Path to uploaded CV
+    cv_sha256 = Column(String, nullable=True, index=True) # Content hash of the CV, keys its extracted text (CvDocument)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
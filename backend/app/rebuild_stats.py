@@ -0,0 +1,20 @@
+from .database import SessionLocal, engine
+from .models import user, company, offer, application, stats as stats_models  # noqa: F401
+from .core import stats
+from .core.migrations import upgrade_database
+
+def rebuild_stats():
+    """
+    Recomputes the dashboard counters and daily rollups from the base tables.
+    Run it after bulk imports or manual SQL that bypassed the API.
+    """
+    upgrade_database(engine)
+    db = SessionLocal()
+    try:
+        stats.rebuild(db)
+        print("Statistics rebuilt:", stats.totals(db))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_stats()
@@ -1,6 +1,9 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, joinedload
 from ..database import get_db
 from ..schemas.user import User
 from ..schemas.offer import Offer
@@ -10,26 +13,51 @@ from ..models.user import User as UserModel
 from ..models.offer import Offer as OfferModel
 from ..models.application import Application as ApplicationModel
 from ..models.company import Company as CompanyModel
+from ..schemas.pagination import Page
 from ..deps import get_current_admin
+from ..core.principals import principal_cache, invalidate_principal
+from ..core.catalog_cache import catalog_cache, touch_catalog
+from ..core import jobs, search, stats
+from ..core.recommend import offers_changed
+from ..core.export import FORMATS, stream_rows
+from ..core.config import settings
+from ..core.pagination import paginate, sort_key
 
 router = APIRouter()
 
-@router.get("/users", response_model=List[User])
-def list_users(db: Session = Depends(get_db), admin: UserModel = Depends(get_current_admin)):
-    return db.query(UserModel).all()
+@router.get("/users", response_model=Page[User])
+def list_users(
+    db: Session = Depends(get_db),
+    admin: UserModel = Depends(get_current_admin),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+):
+    return paginate(db.query(UserModel), [sort_key(db, UserModel.created_at), UserModel.id], cursor, limit)
 
-@router.get("/companies", response_model=List[Company])
-def list_companies(db: Session = Depends(get_db), admin: UserModel = Depends(get_current_admin)):
-    return db.query(CompanyModel).all()
+@router.get("/companies", response_model=Page[Company])
+def list_companies(
+    db: Session = Depends(get_db),
+    admin: UserModel = Depends(get_current_admin),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+):
+    return paginate(db.query(CompanyModel), [sort_key(db, CompanyModel.created_at), CompanyModel.id], cursor, limit)
 
 @router.get("/stats")
 def get_stats(db: Session = Depends(get_db), admin: UserModel = Depends(get_current_admin)):
-    return {
-        "users": db.query(UserModel).count(),
-        "companies": db.query(CompanyModel).count(),
-        "offers": db.query(OfferModel).count(),
-        "applications": db.query(ApplicationModel).count()
-    }
+    # Read from the incrementally maintained counters, not COUNT(*) scans
+    return stats.totals(db)
+
+@router.get("/stats/timeseries")
+def get_stats_timeseries(
+    metric: str = "applications",
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    admin: UserModel = Depends(get_current_admin)
+):
+    if metric not in ("users", "offers", "applications"):
+        raise HTTPException(status_code=400, detail="metric must be one of users, offers, applications")
+    return stats.timeseries(db, metric, days)
 
 @router.delete("/users/{id}")
 def delete_user(id: int, db: Session = Depends(get_db), admin: UserModel = Depends(get_current_admin)):
@@ -40,10 +68,108 @@ def delete_user(id: int, db: Session = Depends(get_db), admin: UserModel = Depen
     if user.id == admin.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own admin account")
         
-    db.delete(user)
+    stats.user_deleted(db, user.role, user.created_at)
+    # Everything the user owns is deleted with it, one bulk statement per
+    # table, so no reader ever sees an application without its student or an
+    # offer without its company. Only the CV file is left to a job.
+    applications = db.execute(
+        delete(ApplicationModel).where(ApplicationModel.stagiaire_id == id)
+        .returning(ApplicationModel.status, ApplicationModel.applied_at)
+        .execution_options(synchronize_session=False)
+    ).all()
+    company_ids = db.scalars(select(CompanyModel.id).where(CompanyModel.user_id == id)).all()
+    if company_ids:
+        company_offers = select(OfferModel.id).where(OfferModel.company_id.in_(company_ids))
+        applications += db.execute(
+            delete(ApplicationModel).where(ApplicationModel.offer_id.in_(company_offers))
+            .returning(ApplicationModel.status, ApplicationModel.applied_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        offers = db.execute(
+            delete(OfferModel).where(OfferModel.company_id.in_(company_ids))
+            .returning(OfferModel.id, OfferModel.category, OfferModel.created_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.execute(delete(CompanyModel).where(CompanyModel.id.in_(company_ids))
+                   .execution_options(synchronize_session=False))
+        stats.offers_deleted(db, offers)
+        stats.company_created(db, delta=-len(company_ids))
+        if offers:
+            offer_ids = [offer.id for offer in offers]
+            search.remove_offers(db, offer_ids)
+            touch_catalog(db)
+            offers_changed(db, offer_ids)
+    stats.applications_deleted(db, applications)
+    db.execute(delete(UserModel).where(UserModel.id == id).execution_options(synchronize_session=False))
+    if user.cv_url:
+        # Delayed like upload_cv's cv.release, so the file is collectable when
+        # the job runs. The deletion time keeps the key unique when SQLite hands
+        # the id out again.
+        jobs.enqueue(
+            db, "users.purge", {"cv_url": user.cv_url},
+            key=f"users.purge:{id}:{datetime.now(timezone.utc).isoformat()}",
+            delay=settings.STORAGE_GC_GRACE_SECONDS,
+        )
     db.commit()
+    invalidate_principal(id)
     return {"message": "User deleted successfully"}
 
-@router.get("/applications", response_model=List[Application])
-def list_applications(db: Session = Depends(get_db), admin: UserModel = Depends(get_current_admin)):
-    return db.query(ApplicationModel).all()
+@router.get("/applications", response_model=Page[Application])
+def list_applications(
+    db: Session = Depends(get_db),
+    admin: UserModel = Depends(get_current_admin),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+):
+    query = db.query(ApplicationModel)\
+        .options(joinedload(ApplicationModel.offer), joinedload(ApplicationModel.stagiaire))
+    return paginate(query, [sort_key(db, ApplicationModel.applied_at), ApplicationModel.id], cursor, limit)
+
+@router.get("/cache-stats")
+def get_cache_stats(admin: UserModel = Depends(get_current_admin)):
+    return {"principals": principal_cache.stats(), "catalog": catalog_cache.stats()}
+
+def _export(name: str, statement, format: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_rows(statement, format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
+
+@router.get("/export/users")
+def export_users(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    admin: UserModel = Depends(get_current_admin)
+):
+    statement = select(
+        UserModel.id, UserModel.name, UserModel.email, UserModel.role,
+        UserModel.cv_url, UserModel.created_at,
+    ).order_by(UserModel.id)
+    return _export("users", statement, format)
+
+@router.get("/export/applications")
+def export_applications(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    admin: UserModel = Depends(get_current_admin)
+):
+    statement = select(
+        ApplicationModel.id, ApplicationModel.offer_id, OfferModel.title.label("offer_title"),
+        ApplicationModel.stagiaire_id, UserModel.email.label("stagiaire_email"),
+        ApplicationModel.status, ApplicationModel.applied_at,
+    ).outerjoin(OfferModel, OfferModel.id == ApplicationModel.offer_id)\
+        .outerjoin(UserModel, UserModel.id == ApplicationModel.stagiaire_id)\
+        .order_by(ApplicationModel.id)
+    return _export("applications", statement, format)
+
+@router.get("/export/offers")
+def export_offers(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    admin: UserModel = Depends(get_current_admin)
+):
+    statement = select(
+        OfferModel.id, OfferModel.company_id, CompanyModel.name.label("company_name"),
+        OfferModel.title, OfferModel.category, OfferModel.duration, OfferModel.location,
+        OfferModel.price, OfferModel.created_at,
+    ).outerjoin(CompanyModel, CompanyModel.id == OfferModel.company_id)\
+        .order_by(OfferModel.id)
+    return _export("offers", statement, format)
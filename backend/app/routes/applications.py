@@ -1,35 +1,132 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from sqlalchemy.orm.attributes import set_committed_value
 from ..database import get_db
-from ..schemas.application import Application, ApplicationCreate, ApplicationUpdate
+from ..schemas.application import (
+    Application, ApplicationCreate, ApplicationUpdate, ApplicationBulkUpdate, ApplicationBulkResult,
+    ApplicationSummary, CompanyApplicationSummary,
+)
 from ..models.application import Application as ApplicationModel, ApplicationStatus
 from ..models.offer import Offer as OfferModel
 from ..models.company import Company as CompanyModel
 from ..models.user import User as UserModel
+from ..schemas.pagination import Page
 from ..deps import get_current_user, get_current_company
+from ..core import search, stats
+from ..core.events import company_topic, publish_event, user_topic
+from ..core.sql import conflict_insert
+from ..core.config import settings
+from ..core.pagination import paginate, sort_key
 
 router = APIRouter()
 
-@router.get("/my-applications", response_model=List[Application])
+@router.get("/my-applications", response_model=Page[Application])
 def get_user_applications(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+):
+    # Nested offer and stagiaire are loaded up front instead of one lazy SELECT per row
+    query = db.query(ApplicationModel)\
+        .options(joinedload(ApplicationModel.offer), joinedload(ApplicationModel.stagiaire))\
+        .filter(ApplicationModel.stagiaire_id == current_user.id)
+    return paginate(query, [sort_key(db, ApplicationModel.applied_at), ApplicationModel.id], cursor, limit)
+
+@router.get("/my-applications/summary", response_model=ApplicationSummary)
+def get_user_application_summary(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
-    return db.query(ApplicationModel).filter(ApplicationModel.stagiaire_id == current_user.id).all()
+    """The student's application counts by status, which one page of the list cannot give."""
+    counts = {status: 0 for status in ApplicationStatus}
+    counts.update(
+        db.query(ApplicationModel.status, func.count(ApplicationModel.id))
+        .filter(ApplicationModel.stagiaire_id == current_user.id)
+        .group_by(ApplicationModel.status)
+        .all()
+    )
+    return {"total": sum(counts.values()), "counts": counts}
 
-@router.get("/company", response_model=List[Application])
+@router.get("/company", response_model=Page[Application])
 def get_company_applications(
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_company)
+    current_user: UserModel = Depends(get_current_company),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE,
+    status: Optional[ApplicationStatus] = None,
+    offer_id: Optional[int] = None,
+    q: Optional[str] = None
 ):
+    """
+    Applications to the company's offers, newest first. `q` keeps the
+    candidates whose CV text matches every word of it.
+    """
     company = db.query(CompanyModel).filter(CompanyModel.user_id == current_user.id).first()
     if not company:
         raise HTTPException(status_code=404, detail="Company profile not found")
         
-    return db.query(ApplicationModel)\
-        .join(OfferModel)\
-        .filter(OfferModel.company_id == company.id).all()
+    query = db.query(ApplicationModel)\
+        .join(ApplicationModel.offer)\
+        .options(contains_eager(ApplicationModel.offer), joinedload(ApplicationModel.stagiaire))\
+        .filter(OfferModel.company_id == company.id)
+    if status is not None:
+        query = query.filter(ApplicationModel.status == status)
+    if offer_id is not None:
+        query = query.filter(ApplicationModel.offer_id == offer_id)
+    if q and q.strip():
+        query = search.apply_cv_search(db, query, q.strip())
+    return paginate(query, [sort_key(db, ApplicationModel.applied_at), ApplicationModel.id], cursor, limit)
+
+@router.get("/company/summary", response_model=CompanyApplicationSummary)
+def get_company_application_summary(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_company),
+    pending_limit: int = 5
+):
+    """
+    Application counts by status, per offer and overall, and the latest
+    pending applications, for the company dashboard. The counts come from
+    one grouped query instead of downloading every application.
+    """
+    company = db.query(CompanyModel).filter(CompanyModel.user_id == current_user.id).first()
+    if not company:
+        raise HTTPException(status_code=404, detail="Company profile not found")
+
+    # Offers without applications are kept by the outer join, with a NULL status
+    rows = db.query(OfferModel.id, OfferModel.title, ApplicationModel.status, func.count(ApplicationModel.id))\
+        .outerjoin(ApplicationModel, ApplicationModel.offer_id == OfferModel.id)\
+        .filter(OfferModel.company_id == company.id)\
+        .group_by(OfferModel.id, OfferModel.title, ApplicationModel.status)\
+        .order_by(OfferModel.id)\
+        .all()
+    totals = {status: 0 for status in ApplicationStatus}
+    per_offer = {}
+    for offer_id, title, application_status, count in rows:
+        entry = per_offer.setdefault(offer_id, {
+            "offer_id": offer_id, "title": title, "total": 0, "counts": {status: 0 for status in ApplicationStatus},
+        })
+        if application_status is not None:
+            entry["counts"][application_status] += count
+            entry["total"] += count
+            totals[application_status] += count
+
+    latest_pending = db.query(ApplicationModel)\
+        .join(ApplicationModel.offer)\
+        .options(contains_eager(ApplicationModel.offer), joinedload(ApplicationModel.stagiaire))\
+        .filter(OfferModel.company_id == company.id, ApplicationModel.status == ApplicationStatus.PENDING)\
+        .order_by(ApplicationModel.applied_at.desc(), ApplicationModel.id.desc())\
+        .limit(max(1, min(pending_limit, settings.MAX_PAGE_SIZE)))\
+        .all()
+    return {
+        "total": sum(totals.values()),
+        "counts": totals,
+        "offers": list(per_offer.values()),
+        "latest_pending": latest_pending,
+    }
 
 @router.post("/", response_model=Application)
 def apply_to_offer(
@@ -37,28 +134,122 @@ def apply_to_offer(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
-    # Check if offer exists
-    offer = db.query(OfferModel).filter(OfferModel.id == application_in.offer_id).first()
+    offer = db.get(OfferModel, application_in.offer_id)
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
-        
-    # Check if already applied
-    existing = db.query(ApplicationModel).filter(
-        ApplicationModel.stagiaire_id == current_user.id,
-        ApplicationModel.offer_id == application_in.offer_id
-    ).first()
-    if existing:
+
+    # The unique (stagiaire_id, offer_id) index settles concurrent double-submits:
+    # exactly one INSERT returns a row, the others hit the conflict and return none.
+    statement = conflict_insert(db, ApplicationModel)\
+        .values(stagiaire_id=current_user.id, offer_id=offer.id, status=ApplicationStatus.PENDING)\
+        .on_conflict_do_nothing(index_elements=["stagiaire_id", "offer_id"])\
+        .returning(ApplicationModel)
+    try:
+        db_application = db.scalars(statement).first()
+    except IntegrityError:
+        # The offer was deleted since we read it
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Offer not found")
+    if db_application is None:
+        db.rollback()
         raise HTTPException(status_code=400, detail="You have already applied for this offer")
-        
-    db_application = ApplicationModel(
-        stagiaire_id=current_user.id,
-        offer_id=application_in.offer_id,
-        status=ApplicationStatus.PENDING
+
+    stats.application_created(db, ApplicationStatus.PENDING)
+    publish_event(
+        db, [user_topic(current_user.id), company_topic(offer.company_id)], "application.created",
+        application_id=db_application.id, offer_id=offer.id, status=ApplicationStatus.PENDING.value,
     )
-    db.add(db_application)
+    # Serialized from rows already in hand, before commit expires them
+    set_committed_value(db_application, "offer", offer)
+    set_committed_value(db_application, "stagiaire", current_user)
+    response = Application.model_validate(db_application)
     db.commit()
-    db.refresh(db_application)
-    return db_application
+    return response
+
+def _set_statuses(db: Session, ids: List[int], new_status: ApplicationStatus, owner_id: Optional[int]):
+    """
+    Sets `new_status` on the applications in `ids` whose offer belongs to the
+    company of user `owner_id` (any company when None), in one UPDATE on
+    PostgreSQL. Returns (id, offer_id, applied_at, old_status, stagiaire_id,
+    company_id) rows.
+    """
+    current = select(
+        ApplicationModel.id, ApplicationModel.status.label("old_status"),
+        ApplicationModel.stagiaire_id, OfferModel.company_id,
+    ).join(OfferModel, OfferModel.id == ApplicationModel.offer_id).where(ApplicationModel.id.in_(ids))
+    if owner_id is not None:
+        current = current.join(CompanyModel, CompanyModel.id == OfferModel.company_id)\
+            .where(CompanyModel.user_id == owner_id)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # UPDATE ... FROM: the locked subquery carries the old status into RETURNING
+        previous = current.with_for_update(of=ApplicationModel).subquery()
+        statement = update(ApplicationModel)\
+            .where(ApplicationModel.id == previous.c.id)\
+            .values(status=new_status)\
+            .returning(
+                ApplicationModel.id, ApplicationModel.offer_id, ApplicationModel.applied_at,
+                previous.c.old_status, previous.c.stagiaire_id, previous.c.company_id,
+            )
+        return db.execute(statement, execution_options={"synchronize_session": False}).all()
+
+    # SQLite cannot RETURNING columns of an UPDATE ... FROM table, read them first
+    previous = {id: rest for id, *rest in db.execute(current).all()}
+    if not previous:
+        return []
+    statement = update(ApplicationModel)\
+        .where(ApplicationModel.id.in_(previous))\
+        .values(status=new_status)\
+        .returning(ApplicationModel.id, ApplicationModel.offer_id, ApplicationModel.applied_at)
+    rows = db.execute(statement, execution_options={"synchronize_session": False}).all()
+    return [(id, offer_id, applied_at, *previous[id]) for id, offer_id, applied_at in rows]
+
+def _publish_status_changes(db: Session, rows, new_status: ApplicationStatus):
+    # Sent to the student and to the company once the transaction commits
+    for id, offer_id, _, old_status, stagiaire_id, company_id in rows:
+        if old_status != new_status:
+            publish_event(
+                db, [user_topic(stagiaire_id), company_topic(company_id)], "application.status_changed",
+                application_id=id, offer_id=offer_id, status=new_status.value, previous_status=old_status.value,
+            )
+
+def _missing_detail(db: Session, ids: List[int]) -> dict:
+    # Only runs when an update matched fewer rows than asked: tell 404 from 403
+    existing = set(db.scalars(select(ApplicationModel.id).where(ApplicationModel.id.in_(ids))))
+    return {
+        id: "Not authorized to update this application" if id in existing else "Application not found"
+        for id in ids
+    }
+
+@router.patch("/bulk", response_model=ApplicationBulkResult)
+def update_application_status_bulk(
+    batch: ApplicationBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_company)
+):
+    """
+    Sets one status on up to BULK_MAX_ITEMS applications. Ids that do not exist
+    or belong to another company are reported in `errors`, the rest are updated.
+    """
+    ids = list(dict.fromkeys(batch.ids))
+    owner_id = None if current_user.role == "admin" else current_user.id
+
+    rows = _set_statuses(db, ids, batch.status, owner_id)
+    stats.application_statuses_changed(
+        db, [(old_status, batch.status, applied_at) for _, _, applied_at, old_status, _, _ in rows]
+    )
+    _publish_status_changes(db, rows, batch.status)
+    db.commit()
+
+    updated_ids = {row[0] for row in rows}
+    missing = [id for id in ids if id not in updated_ids]
+    errors = []
+    if missing:
+        errors = [{"id": id, "detail": detail} for id, detail in _missing_detail(db, missing).items()]
+    return {
+        "updated": [{"id": id, "offer_id": offer_id, "status": batch.status} for id, offer_id, *_ in rows],
+        "errors": errors,
+    }
 
 @router.patch("/{id}", response_model=Application)
 def update_application_status(
@@ -67,18 +258,19 @@ def update_application_status(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_company)
 ):
-    application = db.query(ApplicationModel).filter(ApplicationModel.id == id).first()
-    if not application:
-        raise HTTPException(status_code=404, detail="Application not found")
-        
-    # Check if user is the company owner of the offer
-    offer = db.query(OfferModel).filter(OfferModel.id == application.offer_id).first()
-    company = db.query(CompanyModel).filter(CompanyModel.user_id == current_user.id).first()
-    
-    if offer.company_id != company.id and current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized to update this application")
-        
-    application.status = application_in.status
+    # Ownership is part of the UPDATE's WHERE clause, no SELECTs beforehand
+    owner_id = None if current_user.role == "admin" else current_user.id
+    rows = _set_statuses(db, [id], application_in.status, owner_id)
+    if not rows:
+        detail = _missing_detail(db, [id])[id]
+        raise HTTPException(status_code=404 if detail == "Application not found" else 403, detail=detail)
+
+    _, _, applied_at, old_status, _, _ = rows[0]
+    stats.application_status_changed(db, old_status, application_in.status, applied_at)
+    _publish_status_changes(db, rows, application_in.status)
+    application = db.query(ApplicationModel)\
+        .options(joinedload(ApplicationModel.offer), joinedload(ApplicationModel.stagiaire))\
+        .filter(ApplicationModel.id == id).one()
+    response = Application.model_validate(application)
     db.commit()
-    db.refresh(application)
-    return application
+    return response
@@ -0,0 +1,67 @@
+from typing import Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
+from ..schemas.application import Application, ApplicationSummary, CompanyApplicationSummary
+from ..models.application import ApplicationStatus
+from ..schemas.pagination import Page
+from ..models.user import User as UserModel
+from ..deps import get_current_user_async, get_current_company_async
+from ..core.config import settings
+from . import applications
+
+# Async counterparts of the read routes in applications.py (see offers_async.py).
+# The listings eager-load everything they serialize, so nothing lazy-loads once
+# run_sync has returned.
+
+router = APIRouter()
+
+@router.get("/my-applications", response_model=Page[Application])
+async def get_user_applications(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+):
+    return await db.run_sync(
+        lambda session: applications.get_user_applications(
+            db=session, current_user=current_user, cursor=cursor, limit=limit
+        )
+    )
+
+@router.get("/my-applications/summary", response_model=ApplicationSummary)
+async def get_user_application_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async)
+):
+    return await db.run_sync(
+        lambda session: applications.get_user_application_summary(db=session, current_user=current_user)
+    )
+
+@router.get("/company", response_model=Page[Application])
+async def get_company_applications(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_company_async),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE,
+    status: Optional[ApplicationStatus] = None,
+    offer_id: Optional[int] = None,
+    q: Optional[str] = None
+):
+    return await db.run_sync(
+        lambda session: applications.get_company_applications(
+            db=session, current_user=current_user, cursor=cursor, limit=limit, status=status, offer_id=offer_id, q=q
+        )
+    )
+
+@router.get("/company/summary", response_model=CompanyApplicationSummary)
+async def get_company_application_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_company_async),
+    pending_limit: int = 5
+):
+    return await db.run_sync(
+        lambda session: applications.get_company_application_summary(
+            db=session, current_user=current_user, pending_limit=pending_limit
+        )
+    )
@@ -1,65 +1,84 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-import shutil
 import os
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from ..database import get_db
-from ..core import security
+from ..core import jobs, security, stats
 from ..core.config import settings
+from ..core.sql import conflict_insert
 from ..schemas.user import UserCreate, Token, User
 from ..models.user import User as UserModel
 from ..models.company import Company as CompanyModel
 from ..deps import get_current_user
+from ..core.principals import invalidate_principal
+from ..core.storage import cv_storage, UploadTooLarge
+from ..tasks import index_cv_later
 
 router = APIRouter()
 
 @router.post("/register", response_model=User)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.email == user_in.email).first()
-    if user:
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
+    # Async so the request only awaits the hashing process, the database part goes to the threadpool
+    hashed_password = await security.get_password_hash_async(user_in.password)
+    return await run_in_threadpool(_create_user, db, user_in, hashed_password)
+
+def _create_user(db: Session, user_in: UserCreate, hashed_password: str):
+    # The unique email index decides between concurrent registrations: the
+    # INSERT returns the new row, or nothing when the email is taken.
+    statement = conflict_insert(db, UserModel)\
+        .values(email=user_in.email, password=hashed_password, name=user_in.name, role=user_in.role)\
+        .on_conflict_do_nothing(index_elements=["email"])\
+        .returning(UserModel)
+    db_user = db.scalars(statement).first()
+    if db_user is None:
+        db.rollback()
         raise HTTPException(
             status_code=400,
             detail="A user with this email already exists.",
         )
-    
-    hashed_password = security.get_password_hash(user_in.password)
-    db_user = UserModel(
-        email=user_in.email,
-        password=hashed_password,
-        name=user_in.name,
-        role=user_in.role,
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    # If role is company, create blank company profile
+    stats.user_created(db, db_user.role)
+
+    # If role is company, create blank company profile in the same transaction
     if db_user.role == "company":
-        company = CompanyModel(user_id=db_user.id, name=db_user.name)
-        db.add(company)
-        db.commit()
-        
-    return db_user
+        db.add(CompanyModel(user_id=db_user.id, name=db_user.name))
+        stats.company_created(db)
+
+    response = User.model_validate(db_user)
+    db.commit()
+    return response
 
 @router.post("/login", response_model=Token)
-def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    user = db.query(UserModel).filter(UserModel.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.password):
+async def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await run_in_threadpool(
+        lambda: db.query(UserModel).filter(UserModel.email == form_data.username).first()
+    )
+    if not user or not await security.verify_password_async(form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
-    
+
+    # Transparently upgrade hashes made with an older bcrypt cost
+    if security.password_needs_rehash(user.password):
+        new_hash = await security.get_password_hash_async(form_data.password)
+        await run_in_threadpool(_set_password, db, user, new_hash)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
             user.id, expires_delta=access_token_expires
         ),
         "token_type": "bearer",
-        "user": user
+        "user": User.model_validate(user)
     }
 
+def _set_password(db: Session, user: UserModel, hashed_password: str):
+    user.password = hashed_password
+    db.commit()
+    db.refresh(user)
+
 @router.get("/me", response_model=User)
 def read_user_me(current_user: UserModel = Depends(get_current_user)):
     return current_user
@@ -73,14 +92,30 @@ async def upload_cv(
     if not file.filename.lower().endswith(('.pdf', '.doc', '.docx')):
         raise HTTPException(status_code=400, detail="Invalid file type. Only PDF and DOC are allowed.")
     
-    file_path = f"uploads/cv_{current_user.id}_{file.filename}"
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    suffix = os.path.splitext(file.filename)[1].lower()
+    try:
+        cv_url = await cv_storage.save(file, suffix)
+    except UploadTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"CV is too large. The maximum size is {exc.max_bytes // (1024 * 1024)} MB.",
+        )
     
-    # Update user record
-    current_user.cv_url = f"/uploads/cv_{current_user.id}_{file.filename}"
-    db.add(current_user)
+    # The database work is blocking: off the event loop
+    return await run_in_threadpool(_set_cv, db, current_user, cv_url)
+
+def _set_cv(db: Session, user: UserModel, cv_url: str):
+    previous_cv_url = user.cv_url
+    user.cv_url = cv_url
+    user.cv_sha256 = cv_storage.sha256_for_url(cv_url)
+    db.add(user)
+    # Text extraction for the candidate search, skipped when this content is already indexed
+    index_cv_later(db, user.cv_sha256, cv_url)
+    if previous_cv_url and previous_cv_url != cv_url:
+        # The old file is deleted by a job once the GC grace period has passed, if it is still unreferenced
+        jobs.enqueue(db, "cv.release", {"url": previous_cv_url}, delay=settings.STORAGE_GC_GRACE_SECONDS)
     db.commit()
-    db.refresh(current_user)
-    
-    return {"cv_url": current_user.cv_url}
+    invalidate_principal(user.id)
+    db.refresh(user)
+
+    return {"cv_url": user.cv_url}
@@ -0,0 +1,97 @@
+import json
+import time
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from ..database import SessionLocal
+from ..deps import credentials_exception, decode_user_id, get_current_user
+from ..models.company import Company as CompanyModel
+from ..models.user import User as UserModel
+from ..schemas.user import StreamToken
+from ..core.config import settings
+from ..core.security import STREAM_TOKEN_PURPOSE, create_stream_token
+from ..core.events import Subscription, company_topic, hub, user_topic
+from ..core.principals import load_principal
+
+router = APIRouter()
+
+# Same bearer token as every other route, but optional: EventSource cannot send headers
+# and uses a stream token from POST /events/token in the query string instead
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
+def _topics_for(user_id: int) -> Optional[List[str]]:
+    # A short session of its own: the stream must not hold a connection while it is open
+    with SessionLocal() as db:
+        user = load_principal(db, user_id)
+        if user is None:
+            return None
+        topics = [user_topic(user.id)]
+        if user.role == "company":
+            company_ids = db.scalars(select(CompanyModel.id).where(CompanyModel.user_id == user.id))
+            topics.extend(company_topic(company_id) for company_id in company_ids)
+        return topics
+
+def _format(event_id: int, payload: dict) -> str:
+    return f"id: {event_id}\nevent: {payload['type']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+async def _stream(subscription: Subscription) -> AsyncIterator[str]:
+    deadline = time.monotonic() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        while time.monotonic() < deadline:
+            items = await subscription.get(min(settings.EVENTS_HEARTBEAT, max(deadline - time.monotonic(), 0)))
+            if subscription.overflowed:
+                # The client is too far behind: it reconnects and re-fetches what it shows
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            # An SSE comment keeps proxies and load balancers from closing an idle stream
+            yield "".join(_format(*item) for item in items) if items else ": keep-alive\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+@router.post("/token", response_model=StreamToken)
+def create_event_stream_token(current_user: UserModel = Depends(get_current_user)):
+    """
+    A short-lived token for `GET /events/stream?token=`, so the login JWT never
+    travels in a URL. It opens the stream only, and one is fetched per connection.
+    """
+    return {"token": create_stream_token(current_user.id), "expires_in": settings.EVENTS_TOKEN_EXPIRE_SECONDS}
+
+@router.get("/stream")
+async def stream_events(
+    token: Optional[str] = None,
+    bearer: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    """
+    Server-sent events for the current user: `application.created` and
+    `application.status_changed` for a student's own applications, and for
+    every application to a company's offers. The login JWT goes in the
+    Authorization header or, for EventSource, a stream token from
+    `POST /events/token` in `?token=`.
+    """
+    if bearer:
+        user_id = decode_user_id(bearer)
+    elif token:
+        user_id = decode_user_id(token, purpose=STREAM_TOKEN_PURPOSE)
+    else:
+        raise credentials_exception
+    if hub.full():
+        raise HTTPException(
+            status_code=503, detail="Too many open event streams", headers={"Retry-After": "5"}
+        )
+    topics = await run_in_threadpool(_topics_for, user_id)
+    if topics is None:
+        raise credentials_exception
+
+    subscription = hub.subscribe(topics)
+    return StreamingResponse(
+        _stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also runs when the client disconnects, which cancels the generator mid-wait
+        background=BackgroundTask(hub.unsubscribe, subscription),
+    )
@@ -0,0 +1,46 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..models.user import User as UserModel, UserRole
+from ..models.application import Application as ApplicationModel
+from ..models.offer import Offer as OfferModel
+from ..models.company import Company as CompanyModel
+from ..deps import get_current_user
+from ..core.delivery import deliver_file
+from ..core.storage import cv_storage
+
+router = APIRouter()
+
+def _can_read_cv(db: Session, reader: UserModel, owner_id: int) -> bool:
+    if reader.id == owner_id or reader.role == UserRole.ADMIN:
+        return True
+    if reader.role != UserRole.COMPANY:
+        return False
+    # Companies may read the CV of anyone who applied to one of their offers
+    applied = db.query(ApplicationModel.id)\
+        .join(OfferModel, OfferModel.id == ApplicationModel.offer_id)\
+        .join(CompanyModel, CompanyModel.id == OfferModel.company_id)\
+        .filter(ApplicationModel.stagiaire_id == owner_id, CompanyModel.user_id == reader.id)
+    return db.query(applied.exists()).scalar()
+
+@router.api_route("/cv/{user_id}", methods=["GET", "HEAD"])
+def download_cv(
+    user_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    if not _can_read_cv(db, current_user, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="You are not allowed to read this CV"
+        )
+
+    owner = db.get(UserModel, user_id) if user_id != current_user.id else current_user
+    path = cv_storage.path_for_url(owner.cv_url) if owner else None
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="CV not found")
+
+    relative_path = os.path.relpath(path, cv_storage.root).replace(os.sep, "/")
+    filename = f"cv_{user_id}{os.path.splitext(path)[1]}"
+    return deliver_file(request, path, relative_path, filename)
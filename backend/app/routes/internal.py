@@ -0,0 +1,40 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from .. import database
+from ..database import get_db
+from ..core.jobs import queue_stats
+from ..core.config import settings
+from ..core.pool import pool_snapshot
+from ..core.events import hub
+
+# Operational endpoints for the people running the service, not for the
+# frontend. Protected by INTERNAL_TOKEN when it is set.
+
+def require_internal_token(
+    x_internal_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    if not settings.INTERNAL_TOKEN:
+        return
+    # Prometheus can only send the token as a bearer credential
+    if x_internal_token != settings.INTERNAL_TOKEN and authorization != f"Bearer {settings.INTERNAL_TOKEN}":
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+@router.get("/pool")
+def get_pool_stats():
+    pools = {"sync": pool_snapshot(database.engine, "sync")}
+    if database.async_engine is not None:
+        pools["async"] = pool_snapshot(database.async_engine.sync_engine, "async")
+    return pools
+
+@router.get("/events")
+async def get_event_stats():
+    # Async so the counters are read on the loop that updates them
+    return hub.stats()
+
+@router.get("/jobs")
+def get_job_stats(db: Session = Depends(get_db)):
+    return queue_stats(db)
@@ -1,36 +1,137 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..schemas.offer import Offer, OfferCreate, OfferUpdate
+from ..schemas.offer import (
+    Offer, OfferCreate, OfferUpdate, OfferBulkCreate, OfferBulkResult, OfferFacets, RecommendedOffer,
+)
 from ..models.offer import Offer as OfferModel
 from ..models.company import Company as CompanyModel
+from ..models.application import Application as ApplicationModel
 from ..models.user import User as UserModel
+from ..schemas.pagination import Page
 from ..deps import get_current_user, get_current_company
+from ..core import search, stats
+from ..core.config import settings
+from ..core.pagination import clamp_limit, paginate, sort_key
+from ..core.catalog_cache import touch_catalog
+from ..core.recommend import offer_index, offers_changed
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Offer])
+@router.get("/", response_model=Page[Offer])
 def get_offers(
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
-    category: Optional[str] = None
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE,
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    duration: Optional[str] = None,
+    paid: Optional[bool] = None
 ):
-    query = db.query(OfferModel)
-    if category:
-        query = query.filter(OfferModel.category == category)
-    return query.offset(skip).limit(limit).all()
+    query = search.apply_filters(
+        db.query(OfferModel),
+        category=category,
+        location=location,
+        duration=duration,
+        paid=paid,
+    )
+    if q and q.strip():
+        # Ranked full-text search over title, company name, features and description
+        query, rank = search.apply_search(db, query, q.strip())
+        return paginate(query, [rank, OfferModel.id], cursor, limit, descending=False)
+    return paginate(query, [sort_key(db, OfferModel.created_at), OfferModel.id], cursor, limit)
+
+@router.get("/facets", response_model=OfferFacets)
+def get_offer_facets(
+    db: Session = Depends(get_db),
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    duration: Optional[str] = None,
+    paid: Optional[bool] = None
+):
+    """
+    Counts per category, location, duration and paid/unpaid for the offers the
+    same parameters would list on GET /offers/. Responses are cached with the
+    catalog (see core.catalog_cache) until the next offer write.
+    """
+    query = search.apply_filters(
+        db.query(OfferModel),
+        category=category,
+        location=location,
+        duration=duration,
+        paid=paid,
+    )
+    if q and q.strip():
+        query, _ = search.apply_search(db, query, q.strip())
+    return search.facet_counts(query)
+
+@router.get("/recommended", response_model=List[RecommendedOffer])
+def get_recommended_offers(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    limit: int = 10
+):
+    """
+    Offers similar to the ones the user applied to, best first, leaving out
+    those already applied to. Users without applications get the newest offers.
+    Ranking runs on the in-memory index of core.recommend.
+    """
+    limit = clamp_limit(limit)
+    applied_ids = applied_offer_ids(db, current_user.id)
+    ranked = rank_offers(db, applied_ids, limit) if applied_ids else []
+    return recommended_offers(db, current_user, applied_ids, ranked, limit)
+
+def applied_offer_ids(db: Session, user_id: int) -> List[int]:
+    """Ids of the offers the user applied to, latest application first."""
+    applied = db.query(ApplicationModel.offer_id)\
+        .filter(ApplicationModel.stagiaire_id == user_id)\
+        .order_by(ApplicationModel.applied_at.desc())\
+        .all()
+    return [offer_id for offer_id, in applied]
+
+def rank_offers(db: Session, applied_ids: List[int], limit: int):
+    """(offer_id, score) pairs from the index, which is built here on first use: CPU-bound."""
+    offer_index.sync(db)
+    # The latest applications describe the current interests
+    return offer_index.recommend(applied_ids[:settings.RECOMMEND_PROFILE_SIZE], limit, exclude=applied_ids)
+
+def recommended_offers(db: Session, current_user: UserModel, applied_ids: List[int], ranked, limit: int):
+    """The ranked offers, or the newest ones the user has not applied to when nothing ranked."""
+    if not ranked:
+        query = db.query(OfferModel)
+        if applied_ids:
+            query = query.filter(OfferModel.id.notin_(
+                db.query(ApplicationModel.offer_id).filter(ApplicationModel.stagiaire_id == current_user.id)
+            ))
+        newest = query.order_by(OfferModel.created_at.desc(), OfferModel.id.desc()).limit(limit).all()
+        return [RecommendedOffer.model_validate(offer) for offer in newest]
 
-@router.get("/company", response_model=List[Offer])
+    scores = dict(ranked)
+    offers = db.query(OfferModel).filter(OfferModel.id.in_(scores)).all()
+    # An offer deleted since the index last synced is simply missing here
+    offers.sort(key=lambda offer: scores[offer.id], reverse=True)
+    return [
+        RecommendedOffer.model_validate(offer).model_copy(update={"score": scores[offer.id]})
+        for offer in offers
+    ]
+
+@router.get("/company", response_model=Page[Offer])
 def get_company_offers(
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_company)
+    current_user: UserModel = Depends(get_current_company),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
 ):
     company = db.query(CompanyModel).filter(CompanyModel.user_id == current_user.id).first()
     if not company:
         raise HTTPException(status_code=404, detail="Company profile not found")
-    return db.query(OfferModel).filter(OfferModel.company_id == company.id).all()
+    query = db.query(OfferModel).filter(OfferModel.company_id == company.id)
+    return paginate(query, [sort_key(db, OfferModel.created_at), OfferModel.id], cursor, limit)
 
 @router.get("/{id}", response_model=Offer)
 def get_offer_by_id(id: int, db: Session = Depends(get_db)):
@@ -54,10 +155,58 @@ def create_offer(
         company_id=company.id
     )
     db.add(db_offer)
+    db.flush()
+    search.index_offer(db, db_offer.id)
+    stats.offer_created(db, db_offer.category)
+    touch_catalog(db)
+    offers_changed(db, [db_offer.id])
     db.commit()
     db.refresh(db_offer)
     return db_offer
 
+@router.post("/bulk", response_model=OfferBulkResult)
+def create_offers_bulk(
+    batch: OfferBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_company)
+):
+    """
+    Creates up to BULK_MAX_ITEMS offers in one transaction. Invalid items are
+    reported by their index in `errors` and the valid ones are still created.
+    """
+    company = db.query(CompanyModel).filter(CompanyModel.user_id == current_user.id).first()
+    if not company:
+        raise HTTPException(status_code=404, detail="Company profile not found")
+
+    rows, errors = [], []
+    for index, item in enumerate(batch.offers):
+        try:
+            offer_in = OfferCreate.model_validate(item)
+        except ValidationError as exc:
+            errors.append({
+                "index": index,
+                "detail": exc.errors(include_url=False, include_context=False, include_input=False),
+            })
+            continue
+        rows.append({**offer_in.dict(), "company_id": company.id})
+
+    created = []
+    if rows:
+        # Batched into multi-row INSERT ... RETURNING by SQLAlchemy's insertmanyvalues.
+        # RETURNING order is not guaranteed, ids follow the VALUES order.
+        offers = sorted(
+            db.scalars(insert(OfferModel).returning(OfferModel), rows).all(), key=lambda offer: offer.id
+        )
+        offer_ids = [offer.id for offer in offers]
+        search.index_offers(db, offer_ids)
+        stats.offers_created(db, offers)
+        touch_catalog(db)
+        offers_changed(db, offer_ids)
+        # Serialized before commit so the expired objects are not reloaded one by one
+        created = [Offer.model_validate(offer) for offer in offers]
+        db.commit()
+    return {"created": created, "errors": errors}
+
 @router.put("/{id}", response_model=Offer)
 def update_offer(
     id: int,
@@ -74,9 +223,15 @@ def update_offer(
     if offer.company_id != company.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to update this offer")
         
+    old_category = offer.category
     for field, value in offer_in.dict(exclude_unset=True).items():
         setattr(offer, field, value)
         
+    db.flush()
+    search.index_offer(db, offer.id)
+    stats.offer_category_changed(db, old_category, offer.category, offer.created_at)
+    touch_catalog(db)
+    offers_changed(db, [offer.id])
     db.commit()
     db.refresh(offer)
     return offer
@@ -95,6 +250,12 @@ def delete_offer(
     if offer.company_id != company.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to delete this offer")
         
+    search.remove_offer(db, offer.id)
+    # Its applications go with it through the ORM cascade
+    stats.applications_deleted(db, offer.applications)
+    stats.offer_deleted(db, offer.category, offer.created_at)
     db.delete(offer)
+    touch_catalog(db)
+    offers_changed(db, [offer.id])
     db.commit()
     return {"message": "Offer deleted successfully"}
@@ -0,0 +1,89 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from ..database import SessionLocal, get_async_db
+from ..schemas.offer import Offer, OfferFacets, RecommendedOffer
+from ..schemas.pagination import Page
+from ..models.user import User as UserModel
+from ..deps import get_current_user_async, get_current_company_async
+from ..core.config import settings
+from ..core.pagination import clamp_limit
+from . import offers
+
+# Async counterparts of the read routes in offers.py, registered ahead of them
+# when settings.DB_ASYNC is on. The query logic is shared: each handler runs the
+# sync route function through AsyncSession.run_sync, which drives the async
+# driver from a greenlet so the event loop is never blocked on I/O. The
+# greenlet still runs on the loop's thread, so CPU-bound work (the
+# recommendation index) goes to the threadpool instead.
+
+router = APIRouter()
+
+@router.get("/", response_model=Page[Offer])
+async def get_offers(
+    db: AsyncSession = Depends(get_async_db),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE,
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    duration: Optional[str] = None,
+    paid: Optional[bool] = None
+):
+    return await db.run_sync(
+        lambda session: offers.get_offers(
+            db=session, cursor=cursor, limit=limit, q=q,
+            category=category, location=location, duration=duration, paid=paid,
+        )
+    )
+
+@router.get("/facets", response_model=OfferFacets)
+async def get_offer_facets(
+    db: AsyncSession = Depends(get_async_db),
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    duration: Optional[str] = None,
+    paid: Optional[bool] = None
+):
+    return await db.run_sync(
+        lambda session: offers.get_offer_facets(
+            db=session, q=q, category=category, location=location, duration=duration, paid=paid,
+        )
+    )
+
+@router.get("/recommended", response_model=List[RecommendedOffer])
+async def get_recommended_offers(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
+    limit: int = 10
+):
+    limit = clamp_limit(limit)
+    applied_ids = await db.run_sync(lambda session: offers.applied_offer_ids(session, current_user.id))
+    ranked = await run_in_threadpool(_rank_offers, applied_ids, limit) if applied_ids else []
+    return await db.run_sync(
+        lambda session: offers.recommended_offers(session, current_user, applied_ids, ranked, limit)
+    )
+
+def _rank_offers(applied_ids: List[int], limit: int):
+    # Index build and scoring off the event loop, with a sync session for the offer reads they need
+    with SessionLocal() as session:
+        return offers.rank_offers(session, applied_ids, limit)
+
+@router.get("/company", response_model=Page[Offer])
+async def get_company_offers(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_company_async),
+    cursor: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+):
+    return await db.run_sync(
+        lambda session: offers.get_company_offers(
+            db=session, current_user=current_user, cursor=cursor, limit=limit
+        )
+    )
+
+@router.get("/{id}", response_model=Offer)
+async def get_offer_by_id(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda session: offers.get_offer_by_id(id=id, db=session))
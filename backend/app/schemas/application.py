@@ -1,9 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from ..models.application import ApplicationStatus
 from .offer import Offer
 from .user import User
+from ..core.config import settings
 
 class ApplicationBase(BaseModel):
     offer_id: int
@@ -25,3 +26,34 @@ class Application(ApplicationBase):
 
     class Config:
         from_attributes = True
+
+class ApplicationBulkUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+    status: ApplicationStatus
+
+class ApplicationStatusChange(BaseModel):
+    id: int
+    offer_id: int
+    status: ApplicationStatus
+
+class ApplicationBulkError(BaseModel):
+    id: int
+    detail: str
+
+class ApplicationBulkResult(BaseModel):
+    updated: List[ApplicationStatusChange]
+    errors: List[ApplicationBulkError]
+
+class OfferApplicationCounts(BaseModel):
+    offer_id: int
+    title: Optional[str] = None
+    total: int
+    counts: Dict[ApplicationStatus, int]
+
+class ApplicationSummary(BaseModel):
+    total: int
+    counts: Dict[ApplicationStatus, int]
+
+class CompanyApplicationSummary(ApplicationSummary):
+    offers: List[OfferApplicationCounts]
+    latest_pending: List[Application]
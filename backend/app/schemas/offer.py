@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
+from ..core.config import settings
 
 class OfferBase(BaseModel):
     title: str
@@ -30,8 +31,35 @@ class Offer(OfferBase):
     class Config:
         from_attributes = True
 
+class RecommendedOffer(Offer):
+    # Similarity to the offers the user applied to, None for the newest-offers fallback
+    score: Optional[float] = None
+
 class OfferWithCompany(Offer):
     company_name: Optional[str] = None
     
     class Config:
         from_attributes = True
+
+class OfferBulkCreate(BaseModel):
+    # Items are validated one by one so a bad offer does not reject the whole batch
+    offers: List[Dict[str, Any]] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+class OfferBulkError(BaseModel):
+    index: int
+    detail: Any
+
+class OfferBulkResult(BaseModel):
+    created: List[Offer]
+    errors: List[OfferBulkError]
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class OfferFacets(BaseModel):
+    total: int
+    category: List[FacetCount]
+    location: List[FacetCount]
+    duration: List[FacetCount]
+    paid: List[FacetCount]  # values "paid" and "unpaid"
@@ -28,3 +28,7 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: User
+
+class StreamToken(BaseModel):
+    token: str
+    expires_in: int  # seconds
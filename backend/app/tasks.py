@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .models import user, company, offer, application, stats as stats_models  # noqa: F401
+from .models.cv_document import CvDocument
+from .core import cv_text, search
+from .core.jobs import enqueue, forget, job
+from .core.sql import conflict_insert
+from .core.storage import cv_storage
+
+# Handlers of the background jobs enqueued by the routes (see core.jobs).
+# Each runs in its own transaction, committed together with the job's "done"
+# mark, and may run more than once: they only act on what is still there.
+
+
+@job("cv.release")
+def release_cv(db: Session, payload: dict):
+    """Deletes a replaced CV file, and its extracted text, once no user points to it (enqueued by upload_cv)."""
+    cv_storage.release(db, payload["url"])
+    sha256 = cv_storage.sha256_for_url(payload["url"])
+    if sha256:
+        search.prune_cv_documents(db, [sha256])
+
+
+def index_cv_later(db: Session, sha256: str, url: str) -> bool:
+    """
+    Enqueues the text extraction of a stored CV unless a document for its
+    content already exists or is queued, so an identical file is never
+    extracted twice.
+    """
+    if db.scalar(select(CvDocument.id).where(CvDocument.sha256 == sha256)) is not None:
+        return False
+    key = f"cv.index:{sha256}"
+    # A finished job without its document means the document was pruned since
+    forget(db, key)
+    return enqueue(db, "cv.index", {"sha256": sha256, "url": url}, key=key)
+
+
+@job("cv.index")
+def index_cv(db: Session, payload: dict):
+    """Extracts the text of a stored CV into cv_documents and the CV search index."""
+    sha256 = payload["sha256"]
+    if not payload.get("force") and db.scalar(select(CvDocument.id).where(CvDocument.sha256 == sha256)) is not None:
+        return  # Same content indexed meanwhile
+    path = cv_storage.path_for_url(payload["url"])
+    if path is None:
+        raise ValueError(f"Not a stored file: {payload['url']}")
+    # No transaction stays open while the file is parsed
+    db.rollback()
+    try:
+        document_text = cv_text.extract_text(path)
+        status, error = ("indexed" if document_text else "empty"), None
+    except cv_text.UnreadableDocument as exc:
+        # Parsing it again would fail the same way: recorded, not retried
+        document_text, status, error = None, "failed", str(exc)
+
+    values = {
+        "status": status, "text": document_text, "error": error, "extracted_at": datetime.now(timezone.utc),
+    }
+    document_id = db.scalar(
+        conflict_insert(db, CvDocument)
+        .values(sha256=sha256, **values)
+        .on_conflict_do_update(index_elements=["sha256"], set_=values)
+        .returning(CvDocument.id)
+    )
+    search.index_cv_document(db, document_id, document_text)
+
+
+@job("users.purge")
+def purge_user(db: Session, payload: dict):
+    """
+    Deletes a deleted user's CV file and its extracted text once no other user
+    points to the same content (enqueued by admin.delete_user, which already
+    deleted the user's rows).
+    """
+    release_cv(db, {"url": payload["cv_url"]})
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import logging
+import signal
+from .database import SessionLocal
+from .core import jobs
+from . import tasks  # noqa: F401  (registers the job handlers)
+
+async def _run(concurrency: int, until_idle: bool):
+    worker = jobs.Worker(SessionLocal, concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    print(f"Job worker {worker.name} started ({worker.concurrency} at a time)")
+    await worker.run(until_idle=until_idle)
+
+def run_worker(concurrency: int = 0, until_idle: bool = False):
+    """
+    Runs background jobs outside the API processes, for deployments that set
+    JOBS_EMBEDDED_WORKER=false or need more job throughput. Any number of these
+    can run against one PostgreSQL database. Stops on SIGINT/SIGTERM after the
+    running jobs finish (up to JOBS_SHUTDOWN_TIMEOUT).
+    """
+    asyncio.run(_run(concurrency, until_idle))
+
+def requeue_dead_jobs():
+    """Puts every job of the dead-letter table back in the queue, with fresh attempts."""
+    db = SessionLocal()
+    try:
+        print(f"Requeued {jobs.requeue_dead(db)} dead job(s)")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background jobs (see app.core.jobs).")
+    parser.add_argument("--concurrency", type=int, default=0, help="Jobs at once (default JOBS_CONCURRENCY)")
+    parser.add_argument("--until-idle", action="store_true", help="Exit once no job is due (cron, CI)")
+    parser.add_argument("--requeue-dead", action="store_true", help="Requeue the dead-letter table and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.requeue_dead:
+        requeue_dead_jobs()
+    else:
+        run_worker(args.concurrency, args.until_idle)
@@ -0,0 +1,151 @@
+"""
+GET /offers and /offers/{id} with the catalog response cache off, on, and with
+clients revalidating through If-None-Match (304s).
+
+Usage (from backend/):
+    python -m benchmarks.catalog_cache [--clients 50] [--duration 10] [--offers 5000]
+
+Clients cycle through a fixed set of list pages, filters and offer ids, the way
+browsing traffic does. The server-side hit ratio and bytes saved are reported
+by GET /admin/cache-stats under "catalog". Needs `httpx`.
+
+Then two servers share the database and an offer is edited from a third
+process, which sends them no invalidation signal. Both must agree on
+Last-Modified, serve the edit within CATALOG_CACHE_TTL, and stop answering
+304 to the old Last-Modified (exit 1 otherwise).
+"""
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+
+import httpx
+
+from .common import DATABASE_URL, percentile, start_server, wait_ready
+from .concurrency import seed
+from app.database import SessionLocal
+from app.models.offer import Offer
+from app.core.catalog_cache import touch_catalog
+
+REQUESTS = [
+    ("/offers/", {"limit": 20}),
+    ("/offers/", {"limit": 20, "category": "Engineering"}),
+    ("/offers/", {"limit": 20, "q": "internship"}),
+    ("/offers/", {"limit": 20, "location": "Tunis", "paid": "true"}),
+] + [(f"/offers/{i}", {}) for i in range(1, 21)]
+
+
+async def load(base_url: str, clients: int, duration: float, revalidate: bool) -> dict:
+    latencies, statuses, received = [], {}, 0
+    etags = {}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker(offset: int):
+            nonlocal received
+            for path, params in itertools.islice(itertools.cycle(REQUESTS), offset, None):
+                if time.monotonic() >= deadline:
+                    return
+                key = (path, tuple(sorted(params.items())))
+                headers = {"If-None-Match": etags[key]} if revalidate and key in etags else {}
+                start = time.perf_counter()
+                response = await client.get(path, params=params, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                received += len(response.content)
+                if "etag" in response.headers:
+                    etags[key] = response.headers["etag"]
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "statuses": statuses,
+        "mb_received": received / (1024 * 1024),
+    }
+
+
+def check_workers(port: int, ttl: float) -> list:
+    failures = []
+    servers = [start_server(port + i, CATALOG_CACHE_TTL=ttl, METRICS_ENABLED="false") for i in range(2)]
+    urls = [f"http://127.0.0.1:{port + i}" for i in range(2)]
+    try:
+        for url in urls:
+            asyncio.run(wait_ready(url))
+        before = [httpx.get(f"{url}/offers/1") for url in urls]
+        stamps = {response.headers["last-modified"] for response in before}
+        if len(stamps) != 1:
+            failures.append(f"the workers disagree on Last-Modified: {stamps}")
+
+        time.sleep(1)  # Last-Modified has a one-second resolution
+        with SessionLocal() as db:
+            offer = db.get(Offer, 1)
+            offer.title = f"{offer.title} (edited)"
+            touch_catalog(db)
+            db.commit()
+        started = time.monotonic()
+        pending = set(urls)
+        while pending and time.monotonic() - started < ttl * 2 + 2:
+            for url in list(pending):
+                if httpx.get(f"{url}/offers/1").json()["title"].endswith("(edited)"):
+                    pending.discard(url)
+            time.sleep(0.1)
+        print(f"edit from another process: served by both workers after {time.monotonic() - started:.1f} s "
+              f"(CATALOG_CACHE_TTL {ttl} s)")
+        if pending:
+            failures.append(f"{sorted(pending)} still served the old offer after {ttl * 2 + 2} s")
+
+        after = [httpx.get(f"{url}/offers/1", headers={"If-Modified-Since": before[0].headers["last-modified"]})
+                 for url in urls]
+        stamps = {response.headers["last-modified"] for response in after}
+        print(f"If-Modified-Since the old date: {[r.status_code for r in after]}, Last-Modified {stamps}")
+        if any(r.status_code == 304 for r in after) or len(stamps) != 1:
+            failures.append("a worker answered 304 for a changed catalog, or the workers disagree on Last-Modified")
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--offers", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--ttl", type=float, default=2.0, help="CATALOG_CACHE_TTL of the two-worker check")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.offers} offers into {DATABASE_URL} ...")
+    seed(args.offers)
+
+    runs = [("cache off", 0, False), ("cache on", 1024, False), ("cache + 304", 1024, True)]
+    for label, size, revalidate in runs:
+        server = start_server(args.port, CATALOG_CACHE_SIZE=size, METRICS_ENABLED="false")
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_ready(base_url))
+            result = asyncio.run(load(base_url, args.clients, args.duration, revalidate))
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"{label:<12} {result['rps']:8.1f} req/s   p50 {result['p50_ms']:7.1f} ms   "
+            f"p99 {result['p99_ms']:7.1f} ms   {result['mb_received']:7.1f} MB received   {result['statuses']}"
+        )
+
+    failures = check_workers(args.port, args.ttl)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Shared setup for the benchmark scripts. Import this module before anything
+from `app` so the app binds to the benchmark database instead of `.env`.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DATABASE_URL = os.environ.get("BENCH_DATABASE_URL") or \
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ["DATABASE_URL"] = DATABASE_URL
+
+from app.database import engine, Base  # noqa: E402
+# Register every mapper so relationships resolve
+from app.models.user import User  # noqa: E402,F401
+from app.models.company import Company  # noqa: E402,F401
+from app.models.offer import Offer  # noqa: E402,F401
+from app.models.application import Application  # noqa: E402,F401
+from app.models.stats import StatCounter, StatDaily  # noqa: E402,F401
+from app.models.job import Job, DeadJob  # noqa: E402,F401
+from app.models.cv_document import CvDocument  # noqa: E402,F401
+from app.models.catalog_state import CatalogState  # noqa: E402,F401
+
+
+def drop_schema():
+    from sqlalchemy import text
+    from app.core.search import drop_search
+    Base.metadata.drop_all(bind=engine)
+    drop_search(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+def reset_schema():
+    """Recreates the schema through the migrations, as deployments get it."""
+    from app.core.migrations import upgrade_database
+    from app.core.search import init_search
+    drop_schema()
+    upgrade_database(engine)
+    init_search(engine)
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port: int, **env_overrides) -> subprocess.Popen:
+    """Starts the API in a uvicorn subprocess bound to the benchmark database."""
+    env = dict(os.environ, DATABASE_URL=DATABASE_URL)
+    env.update({key: str(value) for key, value in env_overrides.items()})
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "critical"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(base_url + "/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
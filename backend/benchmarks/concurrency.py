@@ -0,0 +1,106 @@
+"""
+Requests/sec of GET /offers with the sync (threadpool) and async (event loop)
+database modes under many concurrent clients.
+
+Usage (from backend/):
+    python -m benchmarks.concurrency [--clients 500] [--duration 20] [--offers 5000]
+
+Each mode runs in its own uvicorn process against the same seeded database
+(a throwaway SQLite file unless BENCH_DATABASE_URL points at Postgres, which is
+where the difference matters). Needs `httpx` for the load generator.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .common import DATABASE_URL, reset_schema, percentile, start_server, wait_ready
+from app.database import SessionLocal, engine
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.core.search import init_search
+
+def seed(n_offers: int):
+    reset_schema()
+    with SessionLocal() as db:
+        user = User(email="bench@test.tn", name="Bench", password="x", role=UserRole.COMPANY)
+        db.add(user)
+        db.flush()
+        company = Company(user_id=user.id, name="Bench Labs")
+        db.add(company)
+        db.flush()
+        db.execute(Offer.__table__.insert(), [
+            {
+                "company_id": company.id, "title": f"Offer {i}", "description": "Internship " * 20,
+                "category": "Engineering", "duration": "3 Months", "location": "Tunis",
+                "price": "Paid (400 DT/month)", "features": ["python"],
+            }
+            for i in range(n_offers)
+        ])
+        db.commit()
+    init_search(engine)
+
+
+async def load(base_url: str, clients: int, duration: float):
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get("/offers/", params={"limit": 20})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--offers", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.offers} offers into {DATABASE_URL} ...")
+    seed(args.offers)
+
+    for async_mode in (False, True):
+        server = start_server(args.port, DB_ASYNC=str(async_mode).lower())
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_ready(base_url))
+            result = asyncio.run(load(base_url, args.clients, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        label = "async" if async_mode else "sync"
+        print(
+            f"{label:<6} {args.clients} clients: {result['rps']:8.1f} req/s   "
+            f"p50 {result['p50_ms']:8.1f} ms   p99 {result['p99_ms']:8.1f} ms   "
+            f"errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Double-submit race on POST /applications/ and POST /auth/register: the same
+request is fired many times in parallel and exactly one must win.
+
+Usage (from backend/):
+    python -m benchmarks.concurrent_apply [--requests 100]
+
+Runs against a uvicorn subprocess (a throwaway SQLite file unless
+BENCH_DATABASE_URL points at Postgres). Checks that one request got 200 and
+all others 400, that one row was written and that the stats counters moved
+by exactly one. Exits non-zero otherwise. Needs `httpx`.
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+
+import httpx
+from sqlalchemy import func, select
+
+from .common import reset_schema, start_server, wait_ready
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application
+from app.models.stats import StatCounter
+from app.core.security import create_access_token
+from app.core.stats import TOTAL
+
+
+def seed() -> tuple:
+    reset_schema()
+    with SessionLocal() as db:
+        recruiter = User(email="bench@test.tn", name="Bench", password="x", role=UserRole.COMPANY)
+        student = User(email="student@test.tn", name="Student", password="x", role=UserRole.STAGIAIRE)
+        db.add_all([recruiter, student])
+        db.flush()
+        company = Company(user_id=recruiter.id, name="Bench Labs")
+        db.add(company)
+        db.flush()
+        offer = Offer(
+            company_id=company.id, title="Offer", description="Internship", category="Engineering",
+            duration="3 Months", location="Tunis", price="Unpaid", features=[],
+        )
+        db.add(offer)
+        db.commit()
+        return create_access_token(student.id), offer.id
+
+
+def counter(db, metric: str) -> int:
+    return db.scalar(
+        select(StatCounter.value).where(StatCounter.metric == metric, StatCounter.dimension == TOTAL)
+    ) or 0
+
+
+async def burst(client: httpx.AsyncClient, n: int, method: str, url: str, **kwargs) -> Counter:
+    responses = await asyncio.gather(*(client.request(method, url, **kwargs) for _ in range(n)))
+    return Counter(response.status_code for response in responses)
+
+
+def check(name: str, statuses: Counter, rows: int, counted: int, n: int) -> bool:
+    ok = statuses == Counter({200: 1, 400: n - 1}) and rows == 1 and counted == 1
+    print(f"{name:<28} statuses {dict(statuses)}  rows {rows}  counter {counted}  {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+async def run(base_url: str, token: str, offer_id: int, n: int) -> bool:
+    limits = httpx.Limits(max_connections=n)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        with SessionLocal() as db:
+            users_before = counter(db, "users")
+        applied = await burst(
+            client, n, "POST", "/applications/",
+            json={"offer_id": offer_id}, headers={"Authorization": f"Bearer {token}"},
+        )
+        registered = await burst(
+            client, n, "POST", "/auth/register",
+            json={"email": "race@test.tn", "name": "Race", "password": "password", "role": "company"},
+        )
+
+    with SessionLocal() as db:
+        ok = check(
+            "POST /applications/", applied,
+            db.scalar(select(func.count()).select_from(Application)), counter(db, "applications"), n,
+        )
+        ok &= check(
+            "POST /auth/register", registered,
+            db.scalar(select(func.count()).select_from(User).where(User.email == "race@test.tn")),
+            counter(db, "users") - users_before, n,
+        )
+        companies = db.scalar(select(func.count()).select_from(Company).where(Company.name == "Race"))
+        print(f"{'  company profiles':<28} {companies}  {'ok' if companies == 1 else 'FAILED'}")
+        ok &= companies == 1
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    token, offer_id = seed()
+    base_url = f"http://127.0.0.1:{args.port}"
+    # Cheap hashes, and every registration queues for a hasher instead of being
+    # shed with a 503: the race under test is the INSERT, not bcrypt
+    server = start_server(args.port, BCRYPT_ROUNDS=4, PASSWORD_HASH_MAX_PENDING=args.requests)
+    try:
+        asyncio.run(wait_ready(base_url))
+        ok = asyncio.run(run(base_url, token, offer_id, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
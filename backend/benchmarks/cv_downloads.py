@@ -0,0 +1,137 @@
+"""
+Worker occupancy while 200 recruiters download the same CV in parallel, with
+FILE_DELIVERY=direct (the app sends the bytes) and FILE_DELIVERY=x-accel (the
+app only authorizes and hands the transfer to the front proxy).
+
+Usage (from backend/):
+    python -m benchmarks.cv_downloads [--clients 200] [--size-mb 5] [--rounds 3]
+
+No nginx is involved: in x-accel mode the numbers are the app's own share of
+each download, which is what a proxy in front leaves to Python. Occupancy is
+the CPU time the uvicorn process burned (read from /proc, so Linux only) and
+the latency of GET / probes issued during the burst. Needs `httpx`.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+import httpx
+
+from .common import DATABASE_URL, reset_schema, percentile, start_server, wait_ready
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application
+from app.core.security import create_access_token
+from app.core.storage import ContentStore
+
+
+def seed(upload_dir: str, size: int) -> tuple:
+    reset_schema()
+    store = ContentStore(upload_dir, "cv", max_bytes=size, chunk_size=size, grace_seconds=0)
+    content = os.urandom(size)
+    relative = store.relative_path(hashlib.sha256(content).hexdigest(), ".pdf")
+    path = os.path.join(upload_dir, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as handle:
+        handle.write(content)
+
+    with SessionLocal() as db:
+        recruiter = User(email="bench@test.tn", name="Bench", password="x", role=UserRole.COMPANY)
+        student = User(
+            email="student@test.tn", name="Student", password="x",
+            role=UserRole.STAGIAIRE, cv_url=store.url_for(relative),
+        )
+        db.add_all([recruiter, student])
+        db.flush()
+        company = Company(user_id=recruiter.id, name="Bench Labs")
+        db.add(company)
+        db.flush()
+        offer = Offer(company_id=company.id, title="Offer", description="Internship", category="Engineering")
+        db.add(offer)
+        db.flush()
+        db.add(Application(stagiaire_id=student.id, offer_id=offer.id))
+        db.commit()
+        return create_access_token(recruiter.id), student.id
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as handle:
+        fields = handle.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def burst(base_url: str, token: str, student_id: int, clients: int) -> dict:
+    limits = httpx.Limits(max_connections=clients + 1)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        done = asyncio.Event()
+
+        async def probe():
+            latencies = []
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+            return latencies
+
+        async def download():
+            response = await client.get(f"/files/cv/{student_id}", headers=headers)
+            response.raise_for_status()
+            return len(response.content)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        sizes = await asyncio.gather(*(download() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        probes = sorted(await probe_task)
+    return {
+        "elapsed": elapsed,
+        "bytes_from_app": sum(sizes),
+        "probe_p50_ms": percentile(probes, 50) * 1000,
+        "probe_p99_ms": percentile(probes, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    upload_dir = tempfile.mkdtemp(prefix="bench-uploads-")
+    size = int(args.size_mb * 1024 * 1024)
+    print(f"Seeding a {args.size_mb} MB CV into {upload_dir} and {DATABASE_URL} ...")
+    token, student_id = seed(upload_dir, size)
+
+    for mode in ("direct", "x-accel"):
+        server = start_server(args.port, UPLOAD_DIR=upload_dir, FILE_DELIVERY=mode, METRICS_ENABLED="false")
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_ready(base_url))
+            for round_number in range(1, args.rounds + 1):
+                cpu_before = cpu_seconds(server.pid)
+                result = asyncio.run(burst(base_url, token, student_id, args.clients))
+                cpu = cpu_seconds(server.pid) - cpu_before
+                print(
+                    f"{mode:<8} round {round_number}: {args.clients} downloads in {result['elapsed']:6.2f} s   "
+                    f"app CPU {cpu:6.2f} s ({cpu / result['elapsed'] * 100:5.1f}% of a core)   "
+                    f"{result['bytes_from_app'] / (1024 * 1024):8.1f} MB sent by the app   "
+                    f"GET / p50 {result['probe_p50_ms']:6.1f} ms  p99 {result['probe_p99_ms']:6.1f} ms"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
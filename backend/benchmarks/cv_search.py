@@ -0,0 +1,252 @@
+"""
+CV text extraction and the candidate search of GET /applications/company?q=.
+
+Usage (from backend/):
+    python -m benchmarks.cv_search [--students 1000] [--duplicates 0.2] [--searches 200]
+
+In process, on a throwaway SQLite file (or BENCH_DATABASE_URL) and upload
+directory. Every student uploads a generated CV (PDF or DOCX, a share of them
+byte-identical to another student's), then a worker extracts the text, then:
+  - upload latency, and how many extraction jobs were queued (one per
+    distinct file: identical uploads must cost nothing);
+  - re-uploading the same files queues no job at all;
+  - searches for a skill planted in 10% of the CVs return exactly those
+    candidates, with p50/p95 latency, also combined with status and offer;
+  - a corrupt PDF is recorded as "failed" once, not retried.
+Exits 1 when one of these does not hold.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp())
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import io  # noqa: E402
+import random  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import zipfile  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from .common import percentile, reset_schema  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.models.company import Company  # noqa: E402
+from app.models.offer import Offer  # noqa: E402
+from app.models.application import Application  # noqa: E402
+from app.models.cv_document import CvDocument  # noqa: E402
+from app.models.job import Job  # noqa: E402
+from app.core import jobs  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+
+WORDS = """python java react sql docker linux marketing finance design excel
+communication leadership teamwork analysis research statistics accounting
+sales support network security cloud mobile android testing agile""".split()
+SKILL = "kubernetes"
+
+
+def make_pdf(text: str) -> bytes:
+    """A one-page PDF with `text` in Helvetica, the smallest file pypdf reads text from."""
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    content = f"BT /F1 11 Tf 50 750 Td ({escaped}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def make_docx(text: str) -> bytes:
+    paragraphs = "".join(
+        f'<w:p><w:r><w:t>{line}</w:t></w:r></w:p>' for line in text.split(". ")
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types/>')
+        archive.writestr(
+            "word/document.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{paragraphs}</w:body></w:document>",
+        )
+    return buffer.getvalue()
+
+
+def seed(n_students: int) -> dict:
+    reset_schema()
+    with SessionLocal() as db:
+        owner = User(email="company@cv.tn", name="Company", password="x", role=UserRole.COMPANY)
+        students = [
+            User(email=f"s{i}@cv.tn", name=f"Student {i}", password="x", role=UserRole.STAGIAIRE)
+            for i in range(n_students)
+        ]
+        db.add_all([owner] + students)
+        db.flush()
+        company = Company(user_id=owner.id, name="Company")
+        db.add(company)
+        db.flush()
+        offers = [
+            Offer(company_id=company.id, title=f"Offer {i}", description="d", category="Engineering",
+                  duration="3 Months", location="Tunis", price="Unpaid", features=[])
+            for i in range(2)
+        ]
+        db.add_all(offers)
+        db.flush()
+        db.add_all([Application(stagiaire_id=s.id, offer_id=offers[i % 2].id) for i, s in enumerate(students)])
+        db.commit()
+        return {
+            "company_token": create_access_token(owner.id),
+            "offer_ids": [offer.id for offer in offers],
+            "students": [(s.id, create_access_token(s.id)) for s in students],
+        }
+
+
+def make_cvs(students, duplicates: float, rng: random.Random) -> dict:
+    """(filename, bytes) per student id; a `duplicates` share reuses an earlier student's file."""
+    cvs = {}
+    for index, (student_id, _) in enumerate(students):
+        if index and rng.random() < duplicates:
+            cvs[student_id] = cvs[students[rng.randrange(index)][0]]
+            continue
+        words = rng.sample(WORDS, 8) + ([SKILL] if index % 10 == 0 else [])
+        text = f"Student {student_id}. Skills: {' '.join(words)}. Internship search"
+        cvs[student_id] = ("cv.pdf", make_pdf(text)) if index % 2 else ("cv.docx", make_docx(text))
+    return cvs
+
+
+def run_worker():
+    asyncio.run(jobs.Worker(SessionLocal, poll_interval=0.05).run(until_idle=True))
+
+
+def job_count(name: str) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(Job).where(Job.name == name))
+
+
+def upload_all(client, students, cvs) -> list:
+    latencies = []
+    for student_id, token in students:
+        filename, content = cvs[student_id]
+        started = time.perf_counter()
+        response = client.post(
+            "/auth/upload-cv", files={"file": (filename, content)}, headers={"Authorization": f"Bearer {token}"}
+        )
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return sorted(latencies)
+
+
+def search_all(client, headers, **params) -> set:
+    found, cursor = set(), None
+    while True:
+        page = client.get("/applications/company", params=dict(params, cursor=cursor, limit=100), headers=headers)
+        page.raise_for_status()
+        body = page.json()
+        found.update(item["stagiaire_id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--duplicates", type=float, default=0.2)
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    context = seed(args.students)
+    students = context["students"]
+    cvs = make_cvs(students, args.duplicates, rng)
+    distinct = len({content for _, content in cvs.values()})
+    client = TestClient(create_app())  # No lifespan: jobs wait for run_worker()
+    failures = []
+
+    latencies = upload_all(client, students, cvs)
+    queued = job_count("cv.index")
+    print(f"{len(students)} uploads ({distinct} distinct files): p50 {percentile(latencies, 50) * 1000:.1f} ms  "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} ms, {queued} extraction jobs queued")
+    if queued != distinct:
+        failures.append(f"{queued} extraction jobs for {distinct} distinct files")
+
+    started = time.perf_counter()
+    run_worker()
+    elapsed = time.perf_counter() - started
+    with SessionLocal() as db:
+        statuses = dict(db.execute(select(CvDocument.status, func.count()).group_by(CvDocument.status)).all())
+    print(f"extraction: {distinct} files in {elapsed:.2f} s ({distinct / elapsed:.0f}/s), documents {statuses}")
+    if statuses.get("indexed") != distinct:
+        failures.append(f"expected {distinct} indexed documents, got {statuses}")
+
+    upload_all(client, students[:100], cvs)
+    if job_count("cv.index") != queued:
+        failures.append("re-uploading identical files queued extraction jobs")
+    else:
+        print("re-upload of 100 identical files: no extraction queued")
+
+    headers = {"Authorization": f"Bearer {context['company_token']}"}
+    expected = {sid for sid, _ in students if SKILL.encode() in (cvs[sid][1] if cvs[sid][0] == "cv.pdf" else b"")}
+    expected |= {sid for sid, _ in students if cvs[sid][0] == "cv.docx" and _docx_has(cvs[sid][1], SKILL)}
+    found = search_all(client, headers, q=SKILL)
+    print(f"q={SKILL}: {len(found)} candidates, {len(expected)} expected")
+    if found != expected:
+        failures.append(f"q={SKILL} found {len(found)} candidates, expected {len(expected)}")
+    prefix = search_all(client, headers, q=SKILL[:5])
+    narrowed = search_all(client, headers, q=SKILL, offer_id=context["offer_ids"][0], status="pending")
+    if prefix != expected or not narrowed or not narrowed <= expected:
+        failures.append("prefix or filtered CV search returned the wrong candidates")
+
+    timings = []
+    for _ in range(args.searches):
+        q = rng.choice(WORDS + [SKILL])
+        started = time.perf_counter()
+        client.get("/applications/company", params={"q": q, "limit": 20}, headers=headers).raise_for_status()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"GET /applications/company?q=  p50 {percentile(timings, 50) * 1000:.1f} ms  "
+          f"p95 {percentile(timings, 95) * 1000:.1f} ms")
+
+    # A corrupt file is recorded as failed on the first run, not retried
+    student_id, token = students[1]
+    client.post("/auth/upload-cv", files={"file": ("cv.pdf", b"%PDF-1.4 garbage")},
+                headers={"Authorization": f"Bearer {token}"}).raise_for_status()
+    run_worker()
+    with SessionLocal() as db:
+        sha256 = db.get(User, student_id).cv_sha256
+        document = db.scalars(select(CvDocument).where(CvDocument.sha256 == sha256)).first()
+        attempts = db.scalar(select(func.max(Job.attempts)).where(Job.name == "cv.index"))
+    print(f"corrupt PDF: {document.status if document else None} ({document.error if document else '-'}), "
+          f"max attempts {attempts}")
+    if document is None or document.status != "failed" or attempts != 1:
+        failures.append("a corrupt PDF was not recorded as failed in one attempt")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+def _docx_has(content: bytes, word: str) -> bool:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        return word in archive.read("word/document.xml").decode()
+
+
+if __name__ == "__main__":
+    main()
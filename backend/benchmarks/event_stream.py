@@ -0,0 +1,281 @@
+"""
+Server-sent events (GET /events/stream): memory per idle client, heartbeats,
+delivery latency of status changes, and the slow-client cut-off.
+
+Usage (from backend/):
+    python -m benchmarks.event_stream [--idle 2000] [--changes 200]
+
+Starts uvicorn on a throwaway SQLite database with a 1 s heartbeat, then:
+  0. checks that `?token=` takes the stream tokens of POST /events/token but
+     not login JWTs, and that a stream token is refused by the other routes;
+  1. opens --idle streams that never receive anything and reports the server's
+     resident memory per open stream, and checks they all get a keep-alive;
+  2. changes --changes application statuses one PATCH at a time and times
+     each PATCH until the student's stream delivers the event;
+  3. runs --bulk-rounds bulk updates for a company with two streams open:
+     the one that is read must get every event, the one that is never read
+     (small socket buffer) must be cut with an "overflow" event once the
+     server can no longer write to it and EVENTS_QUEUE_SIZE events pile up.
+Exits 1 when a token is accepted where it should not be, an event is lost,
+or a stream gets no heartbeat or no overflow.
+Needs `httpx`.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import httpx
+
+from .common import percentile, reset_schema, start_server, wait_ready
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application
+from app.core.config import settings
+from app.core.security import create_access_token, create_stream_token
+
+
+def seed(n_students: int) -> dict:
+    reset_schema()
+    with SessionLocal() as db:
+        owner = User(email="company@events.tn", name="Company", password="x", role=UserRole.COMPANY)
+        db.add(owner)
+        db.flush()
+        company = Company(user_id=owner.id, name="Company")
+        db.add(company)
+        db.flush()
+        offer = Offer(
+            company_id=company.id, title="Offer", description="d", category="Engineering",
+            duration="3 Months", location="Tunis", price="Unpaid", features=[],
+        )
+        students = [
+            User(email=f"s{i}@events.tn", name=f"Student {i}", password="x", role=UserRole.STAGIAIRE)
+            for i in range(n_students)
+        ]
+        db.add_all([offer] + students)
+        db.flush()
+        applications = [Application(stagiaire_id=student.id, offer_id=offer.id) for student in students]
+        db.add_all(applications)
+        db.commit()
+        return {
+            "company_token": create_access_token(owner.id),
+            # Streams open with stream tokens, minted here as POST /events/token does
+            "students": [(s.id, a.id) for s, a in zip(students, applications)],
+        }
+
+
+class Stream:
+    """A minimal SSE client on a raw socket, so thousands of them stay cheap on this side too."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.buffer = ""
+
+    @classmethod
+    async def open(cls, port: int, token: str, receive_buffer: Optional[int] = None) -> "Stream":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if receive_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+        reader, writer = await asyncio.open_connection(sock=sock)
+        writer.write(
+            f"GET /events/stream?token={token} HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n"
+            .encode()
+        )
+        await writer.drain()
+        status = await reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(f"stream refused: {status!r}")
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        return cls(reader, writer)
+
+    async def _chunk(self) -> bool:
+        # The body is chunked (no Content-Length): size line, data, CRLF
+        size_line = await self.reader.readline()
+        if not size_line:
+            return False
+        size = int(size_line.strip(), 16)
+        data = await self.reader.readexactly(size + 2)
+        if size == 0:
+            return False
+        self.buffer += data[:-2].decode()
+        return True
+
+    async def next_message(self) -> Optional[str]:
+        """Returns the next SSE block (event or comment), None when the stream ends."""
+        while "\n\n" not in self.buffer:
+            if not await self._chunk():
+                return None
+        message, self.buffer = self.buffer.split("\n\n", 1)
+        return message
+
+    async def next_event(self, timeout: float) -> Optional[Tuple[str, dict]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            message = await asyncio.wait_for(self.next_message(), max(deadline - time.monotonic(), 0.001))
+            if message is None:
+                return None
+            fields = dict(line.split(": ", 1) for line in message.split("\n") if ": " in line and line[0] != ":")
+            if "event" in fields:
+                return fields["event"], json.loads(fields["data"])
+
+    def close(self):
+        self.writer.close()
+
+
+def rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def run(args, context: dict, server_pid: int) -> List[str]:
+    failures = []
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_ready(base_url)
+    students = context["students"]
+    company_headers = {"Authorization": f"Bearer {context['company_token']}"}
+
+    # 0. Tokens: the login JWT stays out of URLs, a stream token opens nothing else
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        response = await client.post("/events/token", headers=company_headers)
+        stream_token = response.json()["token"]
+        (await Stream.open(args.port, stream_token)).close()
+        try:
+            (await Stream.open(args.port, context["company_token"])).close()
+            failures.append("a login JWT opened a stream from ?token=")
+        except RuntimeError:
+            pass
+        response = await client.get("/auth/me", headers={"Authorization": f"Bearer {stream_token}"})
+        print(f"stream token: opens a stream, GET /auth/me -> {response.status_code}; login JWT in ?token= refused")
+        if response.status_code != 401:
+            failures.append(f"a stream token was accepted by GET /auth/me ({response.status_code})")
+
+    # 1. Idle streams
+    before = rss_kib(server_pid)
+    idle: List[Stream] = []
+    for start in range(0, args.idle, 200):
+        idle.extend(await asyncio.gather(*(
+            Stream.open(args.port, create_stream_token(students[i % len(students)][0]))
+            for i in range(start, min(start + 200, args.idle))
+        )))
+    await asyncio.sleep(1)
+    after = rss_kib(server_pid)
+    print(f"{len(idle)} idle streams: server RSS {before} -> {after} KiB, "
+          f"{(after - before) / max(len(idle), 1):.1f} KiB per stream")
+    await asyncio.gather(*(stream.next_message() for stream in idle[:50]))  # The retry: line
+    messages = await asyncio.gather(*(asyncio.wait_for(stream.next_message(), 5) for stream in idle[:50]))
+    if not all(message and message.startswith(": keep-alive") for message in messages):
+        failures.append("idle streams got no heartbeat")
+    for stream in idle:
+        stream.close()
+
+    # 2. Delivery latency, one status change at a time
+    latencies = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        for student_id, application_id in students[:args.changes]:
+            stream = await Stream.open(args.port, create_stream_token(student_id))
+            await stream.next_message()
+            started = time.perf_counter()
+            response = await client.patch(
+                f"/applications/{application_id}", json={"status": "accepted"}, headers=company_headers
+            )
+            received = await stream.next_event(5)
+            latencies.append(time.perf_counter() - started)
+            stream.close()
+            if response.status_code != 200 or received is None or received[1]["application_id"] != application_id:
+                failures.append(f"application {application_id}: no status event ({response.status_code}, {received})")
+                break
+        latencies.sort()
+        print(f"status change -> event  n={len(latencies)}  p50 {percentile(latencies, 50) * 1000:.1f} ms"
+              f"  p95 {percentile(latencies, 95) * 1000:.1f} ms  p99 {percentile(latencies, 99) * 1000:.1f} ms")
+
+        # 3. and 4. Bulk updates to a company with two open streams: one is read as
+        # events come, the other never is, so once its socket buffers are full the
+        # server can no longer write to it and its queue must overflow
+        stream_token = (await client.post("/events/token", headers=company_headers)).json()["token"]
+        stalled = await Stream.open(args.port, stream_token, receive_buffer=4096)
+        reading = await Stream.open(args.port, stream_token)
+        for stream in (stalled, reading):
+            await stream.next_message()
+        ids = [application_id for _, application_id in students[:settings.BULK_MAX_ITEMS]]
+        expected = len(ids) * args.bulk_rounds
+        collect = asyncio.ensure_future(_collect(reading, expected))
+        stats_before = (await client.get("/internal/events")).json()
+        started = time.perf_counter()
+        for round in range(args.bulk_rounds):
+            # Alternating, so every application changes status every round
+            status = "rejected" if round % 2 == 0 else "accepted"
+            response = await client.patch(
+                "/applications/bulk", json={"ids": ids, "status": status}, headers=company_headers
+            )
+            if response.status_code != 200:
+                failures.append(f"bulk update failed with {response.status_code}")
+                break
+        received = await collect
+        elapsed = time.perf_counter() - started
+        print(f"reading company stream: {len(received)}/{expected} events in {elapsed:.1f} s")
+        if len(received) != expected:
+            failures.append(f"the reading stream got {len(received)} of {expected} events")
+
+        buffered = 0
+        while True:
+            event = await stalled.next_event(10)
+            if event is None or event[0] == "overflow":
+                break
+            buffered += 1
+        print(f"stalled company stream: {buffered} events already in socket buffers, "
+              f"then {event[0] if event else 'end of stream'}")
+        if event is None or event[0] != "overflow":
+            failures.append("the stalled stream was not cut with an overflow event")
+        stats = (await client.get("/internal/events")).json()
+        print(f"hub: {json.dumps(stats)}")
+        if stats["overflows"] <= stats_before["overflows"]:
+            failures.append("no overflow counted")
+        stalled.close()
+        reading.close()
+    return failures
+
+
+async def _collect(stream: Stream, expected: int) -> List[dict]:
+    events = []
+    while len(events) < expected:
+        event = await stream.next_event(10)
+        if event is None:
+            break
+        events.append(event[1])
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--idle", type=int, default=2000)
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--bulk-rounds", type=int, default=40, help="Bulk updates of BULK_MAX_ITEMS applications")
+    parser.add_argument("--port", type=int, default=8769)
+    args = parser.parse_args()
+
+    context = seed(max(args.changes, settings.BULK_MAX_ITEMS))
+    server = start_server(args.port, EVENTS_HEARTBEAT=1)
+    try:
+        failures = asyncio.run(run(args, context, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
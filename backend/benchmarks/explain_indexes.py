@@ -0,0 +1,181 @@
+"""
+Checks that the hot queries are answered from the indexes the migrations
+create, on a database with 1M applications.
+
+Usage (from backend/):
+    python -m benchmarks.explain_indexes [--applications 1000000] [--skip-seed]
+
+Seeds the data (a throwaway SQLite file unless BENCH_DATABASE_URL points at
+Postgres), then runs EXPLAIN (PostgreSQL, after ANALYZE) or EXPLAIN QUERY PLAN
+(SQLite) for each query and asserts the expected index appears in the plan.
+Exits non-zero when a query falls back to a sequential scan.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Iterator, List
+
+from sqlalchemy import func, select, text
+
+from .common import DATABASE_URL, reset_schema
+from app.database import engine
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application, ApplicationStatus
+
+CHUNK = 20_000
+
+
+def chunks(rows: Iterator[dict]) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(n_applications: int):
+    n_students = max(n_applications // 20, 1)
+    n_companies = max(n_applications // 1000, 1)
+    n_offers = max(n_applications // 10, 1)
+    categories = ["Engineering", "Design", "Marketing", "Finance", "Data", "Sales", "HR", "Legal"]
+    rng = random.Random(42)
+
+    reset_schema()
+    with engine.begin() as conn:
+        users = (
+            {"email": f"u{i}@bench.tn", "name": f"User {i}", "password": "x",
+             "role": UserRole.COMPANY if i < n_companies else UserRole.STAGIAIRE}
+            for i in range(n_companies + n_students)
+        )
+        for batch in chunks(users):
+            conn.execute(User.__table__.insert(), batch)
+        for batch in chunks({"user_id": i + 1, "name": f"Company {i}"} for i in range(n_companies)):
+            conn.execute(Company.__table__.insert(), batch)
+        offers = (
+            {"company_id": rng.randint(1, n_companies), "title": f"Offer {i}", "description": "d",
+             "category": rng.choice(categories), "duration": "3 Months", "location": "Tunis", "price": "Unpaid"}
+            for i in range(n_offers)
+        )
+        for batch in chunks(offers):
+            conn.execute(Offer.__table__.insert(), batch)
+        # Every (student, offer) pair at most once, as the unique index demands
+        applications = (
+            {"stagiaire_id": n_companies + 1 + i % n_students,
+             "offer_id": (i // n_students * 7919 + i) % n_offers + 1,
+             "status": ApplicationStatus.PENDING}
+            for i in range(n_applications)
+        )
+        for batch in chunks(applications):
+            conn.execute(Application.__table__.insert(), batch)
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+
+def checks():
+    company_id, offer_id = 1, 1
+    with engine.connect() as conn:
+        student_id = conn.execute(
+            select(User.id).where(User.role == UserRole.STAGIAIRE).order_by(User.id).limit(1)
+        ).scalar()
+    return [
+        (
+            "GET /offers?category=",
+            select(Offer).where(Offer.category == "Design").order_by(Offer.created_at.desc(), Offer.id.desc()).limit(21),
+            "ix_offers_category",
+        ),
+        (
+            "GET /offers/company",
+            select(Offer).where(Offer.company_id == company_id)
+            .order_by(Offer.created_at.desc(), Offer.id.desc()).limit(21),
+            "ix_offers_company_id_created_at",
+        ),
+        (
+            "GET /applications/my-applications",
+            select(Application).where(Application.stagiaire_id == student_id)
+            .order_by(Application.applied_at.desc(), Application.id.desc()).limit(21),
+            "uq_applications_stagiaire_offer",
+        ),
+        (
+            "GET /applications/company",
+            select(Application).join(Offer, Offer.id == Application.offer_id).where(Offer.company_id == company_id)
+            .order_by(Application.applied_at.desc(), Application.id.desc()).limit(21),
+            "ix_applications_offer_id_status_applied_at",
+        ),
+        (
+            "GET /applications/company/summary counts",
+            select(Offer.id, Application.status, func.count(Application.id))
+            .outerjoin(Application, Application.offer_id == Offer.id).where(Offer.company_id == company_id)
+            .group_by(Offer.id, Application.status),
+            "ix_applications_offer_id_status_applied_at",
+        ),
+        (
+            "GET /applications/company/summary pending",
+            select(Application).join(Offer, Offer.id == Application.offer_id)
+            .where(Offer.company_id == company_id, Application.status == ApplicationStatus.PENDING)
+            .order_by(Application.applied_at.desc(), Application.id.desc()).limit(5),
+            "ix_applications_offer_id_status_applied_at",
+        ),
+        (
+            "POST /applications duplicate check",
+            select(Application.id).where(Application.stagiaire_id == student_id, Application.offer_id == offer_id),
+            "uq_applications_stagiaire_offer",
+        ),
+        (
+            "DELETE /offers/{id} cascade",
+            select(Application).where(Application.offer_id == offer_id),
+            "ix_applications_offer_id_status_applied_at",
+        ),
+    ]
+
+
+def _pg_indexes(plan: dict) -> List[str]:
+    found = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        found += _pg_indexes(child)
+    return found
+
+
+def plan_indexes(conn, statement) -> tuple:
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "postgresql":
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+        return _pg_indexes(plan[0]["Plan"]), json.dumps(plan[0]["Plan"])[:300]
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    details = [row[-1] for row in rows]
+    indexes = [d.split(" INDEX ", 1)[1].split(" ")[0] for d in details if " INDEX " in d]
+    return indexes, " | ".join(details)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applications", type=int, default=1_000_000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse BENCH_DATABASE_URL as already seeded")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"Seeding {args.applications} applications into {DATABASE_URL} ...")
+        started = time.perf_counter()
+        seed(args.applications)
+        print(f"Seeded in {time.perf_counter() - started:.1f} s")
+
+    failed = False
+    with engine.connect() as conn:
+        for name, statement, expected in checks():
+            indexes, plan = plan_indexes(conn, statement)
+            ok = expected in indexes
+            failed |= not ok
+            print(f"{name:<42} {'ok' if ok else 'MISSING ' + expected:<40} {plan}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Exports 1M synthetic applications through the streaming export and checks
+that memory stays flat.
+
+Usage (from backend/):
+    python -m benchmarks.export_memory [--rows 1000000] [--ceiling-mb 64]
+
+The export runs in a fresh subprocess so its peak RSS is not polluted by the
+seeding step. Exits non-zero when the RSS growth during the export exceeds the
+ceiling.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from .common import DATABASE_URL, BACKEND_DIR, reset_schema
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application, ApplicationStatus
+
+
+def seed(rows: int, batch: int = 50_000):
+    reset_schema()
+    with SessionLocal() as db:
+        owner = User(email="owner@test.tn", name="Owner", password="x", role=UserRole.COMPANY)
+        db.add(owner)
+        db.flush()
+        company = Company(user_id=owner.id, name="Export Labs")
+        db.add(company)
+        db.flush()
+        db.execute(User.__table__.insert(), [
+            {"email": f"s{i}@test.tn", "name": f"Student {i}", "password": "x", "role": UserRole.STAGIAIRE}
+            for i in range(1000)
+        ])
+        db.execute(Offer.__table__.insert(), [
+            {"company_id": company.id, "title": f"Offer {i}", "description": "d", "category": "Engineering",
+             "duration": "3 Months", "location": "Tunis", "price": "Unpaid"}
+            for i in range(1000)
+        ])
+        student_ids = [row[0] for row in db.query(User.id).filter(User.role == UserRole.STAGIAIRE)]
+        offer_ids = [row[0] for row in db.query(Offer.id)]
+        statuses = list(ApplicationStatus)
+        for start in range(0, rows, batch):
+            db.execute(Application.__table__.insert(), [
+                {"stagiaire_id": student_ids[i % len(student_ids)],
+                 "offer_id": offer_ids[(i * 7) % len(offer_ids)],
+                 "status": statuses[i % len(statuses)]}
+                for i in range(start, min(rows, start + batch))
+            ])
+        db.commit()
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def consume(fmt: str):
+    from app.routes.admin import export_applications
+
+    # Drain the StreamingResponse body the way the ASGI server would
+    response = export_applications(format=fmt, admin=None)
+    baseline = rss_mb()
+    start = time.perf_counter()
+    first_chunk, total_bytes = None, 0
+    async for chunk in response.body_iterator:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+        total_bytes += len(chunk)
+    print(json.dumps({
+        "baseline_mb": baseline,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "first_chunk_ms": (first_chunk or 0) * 1000,
+        "seconds": time.perf_counter() - start,
+        "bytes": total_bytes,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--ceiling-mb", type=float, default=64.0)
+    parser.add_argument("--consume", choices=["ndjson", "csv"])
+    args = parser.parse_args()
+
+    if args.consume:
+        asyncio.run(consume(args.consume))
+        return
+
+    print(f"Seeding {args.rows} applications into {DATABASE_URL} ...")
+    seed(args.rows)
+
+    failed = False
+    for fmt in ("ndjson", "csv"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.export_memory", "--consume", fmt],
+            cwd=BACKEND_DIR, env=dict(os.environ, BENCH_DATABASE_URL=DATABASE_URL),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        growth = result["peak_mb"] - result["baseline_mb"]
+        failed |= growth > args.ceiling_mb
+        print(
+            f"{fmt:<6} {result['bytes'] / 2**20:8.1f} MiB in {result['seconds']:6.1f} s   "
+            f"first chunk {result['first_chunk_ms']:7.1f} ms   "
+            f"RSS growth {growth:6.1f} MiB (ceiling {args.ceiling_mb:.0f})"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
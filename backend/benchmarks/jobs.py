@@ -0,0 +1,210 @@
+"""
+Background job queue (core.jobs): throughput with several workers sharing the
+table, exactly-once completion, retries with backoff into the dead-letter
+table, idempotency keys, expired leases, and DELETE /admin/users removing what the
+user owns within the request.
+
+Usage (from backend/):
+    python -m benchmarks.jobs [--jobs 2000] [--workers 4] [--offers 200] [--applications 20]
+
+Runs in process on a throwaway SQLite file unless BENCH_DATABASE_URL points
+at PostgreSQL (where the workers claim with FOR UPDATE SKIP LOCKED). Exits 1
+when a job runs twice or never, a failing job does not end up dead after its
+attempts, or a user deletion leaves rows or stats counters behind.
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, update
+
+from .common import percentile, reset_schema
+from app.main import create_app
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application
+from app.models.job import DeadJob, Job
+from app.core import jobs, stats
+from app.core.config import settings
+from app.core.security import create_access_token
+
+runs: Counter = Counter()
+attempt_times = []
+_lock = threading.Lock()
+
+
+@jobs.job("bench.noop")
+def noop(db, payload):
+    with _lock:
+        runs[payload["n"]] += 1
+
+
+@jobs.job("bench.fail")
+def fail(db, payload):
+    attempt_times.append(time.monotonic())
+    raise RuntimeError("always fails")
+
+
+def run_workers(count: int, concurrency: int, poll_interval: float = 0.05):
+    async def main():
+        workers = [jobs.Worker(SessionLocal, concurrency=concurrency, poll_interval=poll_interval) for _ in range(count)]
+        await asyncio.gather(*(worker.run(until_idle=True) for worker in workers))
+    asyncio.run(main())
+
+
+def check_throughput(args, failures):
+    with SessionLocal() as db:
+        for start in range(0, args.jobs, 500):
+            for n in range(start, min(start + 500, args.jobs)):
+                jobs.enqueue(db, "bench.noop", {"n": n})
+            db.commit()
+    started = time.perf_counter()
+    run_workers(args.workers, args.concurrency)
+    elapsed = time.perf_counter() - started
+    twice = [n for n, count in runs.items() if count > 1]
+    missing = args.jobs - len(runs)
+    with SessionLocal() as db:
+        depth = jobs.queue_stats(db)["depth"]
+    print(f"{args.jobs} jobs, {args.workers} workers x {args.concurrency}: {elapsed:.2f} s, "
+          f"{args.jobs / elapsed:.0f} jobs/s  queue {depth}")
+    if twice or missing or depth["done"] != args.jobs:
+        failures.append(f"{len(twice)} jobs ran twice, {missing} never ran")
+
+
+def check_retries(failures):
+    settings.JOBS_BACKOFF_BASE = 0.1
+    with SessionLocal() as db:
+        jobs.enqueue(db, "bench.fail", {}, max_attempts=3)
+        db.commit()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        run_workers(1, 1)
+        with SessionLocal() as db:
+            dead = db.scalars(select(DeadJob).where(DeadJob.name == "bench.fail")).first()
+        if dead:
+            break
+        time.sleep(0.05)
+    gaps = [round(b - a, 2) for a, b in zip(attempt_times, attempt_times[1:])]
+    print(f"failing job: {len(attempt_times)} attempts, gaps {gaps} s, "
+          f"dead-lettered: {bool(dead)} ({dead.last_error.splitlines()[-1] if dead else '-'})")
+    if not dead or dead.attempts != 3 or len(attempt_times) != 3:
+        failures.append("the failing job did not end up dead after 3 attempts")
+    elif not gaps[1] > gaps[0]:
+        failures.append(f"retry delays do not grow: {gaps}")
+
+
+def check_idempotency_and_leases(failures):
+    with SessionLocal() as db:
+        first = jobs.enqueue(db, "bench.noop", {"n": -1}, key="bench:once")
+        db.commit()
+        second = jobs.enqueue(db, "bench.noop", {"n": -1}, key="bench:once")
+        db.commit()
+        count = db.scalar(select(func.count()).select_from(Job).where(Job.idempotency_key == "bench:once"))
+    print(f"idempotency key: first enqueue {first}, second {second}, {count} row")
+    if not first or second or count != 1:
+        failures.append("an idempotency key did not deduplicate")
+
+    # A job held by a worker that died long ago
+    with SessionLocal() as db:
+        jobs.enqueue(db, "bench.noop", {"n": -2})
+        db.flush()
+        job_id = db.scalar(select(func.max(Job.id)))
+        db.execute(update(Job).where(Job.id == job_id).values(
+            status=jobs.RUNNING, attempts=1, locked_by="gone",
+            started_at=jobs._now() - timedelta(seconds=settings.JOBS_LEASE_SECONDS + 1),
+        ))
+        db.commit()
+    jobs.Worker(SessionLocal).maintain()
+    run_workers(1, 1)
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+    print(f"expired lease: job {job_id} {job.status} after {job.attempts} attempts ({job.last_error})")
+    if job.status != jobs.DONE or runs[-2] != 1:
+        failures.append("a job with an expired lease was not run again")
+
+
+def seed_company(n_offers: int, n_applications: int) -> dict:
+    with SessionLocal() as db:
+        admin = User(email="admin@jobs.tn", name="Admin", password="x", role=UserRole.ADMIN)
+        owner = User(email="company@jobs.tn", name="Company", password="x", role=UserRole.COMPANY)
+        students = [
+            User(email=f"s{i}@jobs.tn", name=f"Student {i}", password="x", role=UserRole.STAGIAIRE)
+            for i in range(n_applications)
+        ]
+        db.add_all([admin, owner] + students)
+        db.flush()
+        company = Company(user_id=owner.id, name="Company")
+        db.add(company)
+        db.flush()
+        offers = [
+            Offer(company_id=company.id, title=f"Offer {i}", description="d", category="Engineering",
+                  duration="3 Months", location="Tunis", price="Unpaid", features=[])
+            for i in range(n_offers)
+        ]
+        db.add_all(offers)
+        db.flush()
+        db.add_all([Application(stagiaire_id=s.id, offer_id=o.id) for o in offers for s in students])
+        db.commit()
+        stats.rebuild(db)
+        return {"admin": create_access_token(admin.id), "owner": owner.id, "student": students[0].id}
+
+
+def check_user_deletion(args, failures):
+    context = seed_company(args.offers, args.applications)
+    headers = {"Authorization": f"Bearer {context['admin']}"}
+    client = TestClient(create_app())  # No lifespan: no job runs during the checks
+    latencies = []
+    for user_id in (context["student"], context["owner"]):
+        started = time.perf_counter()
+        response = client.delete(f"/admin/users/{user_id}", headers=headers)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            failures.append(f"DELETE /admin/users/{user_id}: {response.status_code}")
+            return
+    # Nothing is left for a job: the rows are gone when the request returns
+    with SessionLocal() as db:
+        left = {
+            "offers": db.scalar(select(func.count()).select_from(Offer)),
+            "applications": db.scalar(select(func.count()).select_from(Application)),
+            "companies": db.scalar(select(func.count()).select_from(Company)),
+        }
+        counters = stats.totals(db)
+        stats.rebuild(db)
+        rebuilt = stats.totals(db)
+    print(f"DELETE /admin/users: student {latencies[0] * 1000:.1f} ms, company with {args.offers} offers x "
+          f"{args.applications} applications {latencies[1] * 1000:.1f} ms, left {left}")
+    if any(left.values()):
+        failures.append(f"the deletes left rows behind: {left}")
+    if counters != rebuilt:
+        failures.append(f"stats counters drifted: {counters} != {rebuilt}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--offers", type=int, default=200)
+    parser.add_argument("--applications", type=int, default=20, help="per offer")
+    args = parser.parse_args()
+
+    reset_schema()
+    failures = []
+    check_throughput(args, failures)
+    check_retries(failures)
+    check_idempotency_and_leases(failures)
+    check_user_deletion(args, failures)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Scenario-based HTTP load test of the API, with a stored baseline to catch
+regressions.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest [--users 20] [--duration 15] [--scenarios browse,student]
+        [--output results.json] [--baseline benchmarks/baselines/loadtest-sqlite.json]
+        [--threshold 0.2] [--save-baseline PATH]
+
+Scenarios, each run on its own for --duration seconds by --users closed-loop
+virtual users (after a --warmup that is not measured), --repeat times:
+    browse   anonymous GET /offers/ (first pages, category filters) and GET /offers/{id}
+    student  POST /auth/login, then browse, then POST /applications/
+    company  GET /offers/company and GET /applications/company with a company token
+    admin    GET /admin/stats with an admin token
+
+Prints a JSON report with throughput and p50/p95/p99 latency per scenario
+and per request, from the run with the median throughput. With --baseline, a scenario regresses when its throughput
+drops, or its p50/p95 latency grows, by more than --threshold (20%); the
+exit status is then 1. Baselines are only comparable on the same machine and
+database. The data set and every virtual user's choices are seeded, so runs
+are repeatable.
+
+Runs against a uvicorn subprocess on a throwaway SQLite file, or on Postgres
+when BENCH_DATABASE_URL is set. Passwords are hashed with --bcrypt-rounds (4)
+so logins measure the API rather than bcrypt (see login_storm for that).
+Needs `httpx`.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import select
+
+from .common import reset_schema, percentile, start_server, wait_ready
+from app.database import SessionLocal, engine
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application, ApplicationStatus
+from app.core.security import pwd_context, create_access_token
+from app.core.search import init_search
+from app.core.stats import init_stats
+
+PASSWORD = "password"
+CATEGORIES = ["Engineering", "Design", "Marketing", "Finance", "Data"]
+
+
+def seed(n_offers: int, n_students: int, bcrypt_rounds: int) -> dict:
+    reset_schema()
+    rng = random.Random(42)
+    hashed = pwd_context.handler("bcrypt").using(rounds=bcrypt_rounds).hash(PASSWORD)
+    with SessionLocal() as db:
+        admin = User(email="admin@load.tn", name="Admin", password=hashed, role=UserRole.ADMIN)
+        owners = [
+            User(email=f"company{i}@load.tn", name=f"Company {i}", password=hashed, role=UserRole.COMPANY)
+            for i in range(10)
+        ]
+        db.add_all([admin] + owners)
+        db.flush()
+        companies = [Company(user_id=owner.id, name=owner.name) for owner in owners]
+        db.add_all(companies)
+        db.flush()
+        db.execute(User.__table__.insert(), [
+            {"email": f"student{i}@load.tn", "name": f"Student {i}", "password": hashed, "role": UserRole.STAGIAIRE}
+            for i in range(n_students)
+        ])
+        db.execute(Offer.__table__.insert(), [
+            {
+                "company_id": companies[i % len(companies)].id, "title": f"Offer {i}",
+                "description": "Internship " * 20, "category": rng.choice(CATEGORIES),
+                "duration": "3 Months", "location": "Tunis", "price": "Unpaid", "features": ["python"],
+            }
+            for i in range(n_offers)
+        ])
+        offer_ids = list(db.scalars(select(Offer.id).order_by(Offer.id)))
+        student_ids = list(db.scalars(select(User.id).where(User.role == UserRole.STAGIAIRE).order_by(User.id)))
+        # Some applications to the first company so its dashboard has rows to show
+        db.execute(Application.__table__.insert(), [
+            {"stagiaire_id": student_id, "offer_id": offer_ids[0], "status": ApplicationStatus.PENDING}
+            for student_id in student_ids[:50]
+        ])
+        db.commit()
+        context = {
+            "offer_ids": offer_ids,
+            "students": [f"student{i}@load.tn" for i in range(n_students)],
+            "company_token": create_access_token(owners[0].id),
+            "admin_token": create_access_token(admin.id),
+        }
+    init_search(engine)
+    init_stats(engine)
+    return context
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.recording = False
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str,
+                   expect=(200,), **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        if self.recording:
+            self.latencies[name].append(time.perf_counter() - start)
+            if response is None or response.status_code not in expect:
+                self.errors[name] += 1
+        return response
+
+
+async def browse(client, user, rng, context, recorder):
+    await recorder.call(client, "GET /offers/", "GET", "/offers/", params={"limit": 20})
+    await recorder.call(
+        client, "GET /offers/?category=", "GET", "/offers/", params={"category": rng.choice(CATEGORIES), "limit": 20}
+    )
+    offer_id = rng.choice(context["offer_ids"])
+    await recorder.call(client, "GET /offers/{id}", "GET", f"/offers/{offer_id}")
+
+
+async def student(client, user, rng, context, recorder):
+    email = context["students"][user % len(context["students"])]
+    response = await recorder.call(
+        client, "POST /auth/login", "POST", "/auth/login", data={"username": email, "password": PASSWORD}
+    )
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    await browse(client, user, rng, context, recorder)
+    # Applying twice to the same offer is a normal 400, not an error
+    await recorder.call(
+        client, "POST /applications/", "POST", "/applications/", expect=(200, 400),
+        json={"offer_id": rng.choice(context["offer_ids"])}, headers=headers,
+    )
+
+
+async def company(client, user, rng, context, recorder):
+    headers = {"Authorization": f"Bearer {context['company_token']}"}
+    await recorder.call(client, "GET /offers/company", "GET", "/offers/company", headers=headers)
+    await recorder.call(client, "GET /applications/company", "GET", "/applications/company", headers=headers)
+
+
+async def admin(client, user, rng, context, recorder):
+    headers = {"Authorization": f"Bearer {context['admin_token']}"}
+    await recorder.call(client, "GET /admin/stats", "GET", "/admin/stats", headers=headers)
+
+
+SCENARIOS = {"browse": browse, "student": student, "company": company, "admin": admin}
+
+
+async def run_scenario(base_url: str, scenario, context: dict, users: int, duration: float, warmup: float) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def virtual_user(user: int, until: float):
+            rng = random.Random(user)
+            while time.monotonic() < until:
+                await scenario(client, user, rng, context, recorder)
+
+        await asyncio.gather(*(virtual_user(u, time.monotonic() + warmup) for u in range(users)))
+        recorder.recording = True
+        started = time.monotonic()
+        await asyncio.gather(*(virtual_user(u, started + duration) for u in range(users)))
+        elapsed = time.monotonic() - started
+    return summarize(recorder, elapsed)
+
+
+def _latency_summary(latencies: List[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    everything = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    result = _latency_summary(everything, sum(recorder.errors.values()), elapsed)
+    result["endpoints"] = {
+        name: _latency_summary(latencies, recorder.errors[name], elapsed)
+        for name, latencies in sorted(recorder.latencies.items())
+    }
+    return result
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """Returns one line per regression of `report` against `baseline`."""
+    regressions = []
+    for name, base in baseline["scenarios"].items():
+        current = report["scenarios"].get(name)
+        if current is None:
+            continue
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {current['rps']} req/s, baseline {base['rps']} req/s")
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {current[metric]} ms, baseline {base[metric]} ms")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors, baseline {base['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, the median one is reported")
+    parser.add_argument("--offers", type=int, default=2000)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    context = seed(args.offers, args.students, args.bcrypt_rounds)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(
+        args.port, BCRYPT_ROUNDS=args.bcrypt_rounds, PASSWORD_HASH_MAX_PENDING=max(args.users, 8),
+    )
+    report = {
+        "meta": {
+            "database": engine.dialect.name,
+            "users": args.users,
+            "duration": args.duration,
+            "repeat": args.repeat,
+            "offers": args.offers,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {},
+    }
+    try:
+        asyncio.run(wait_ready(base_url))
+        for name in names:
+            runs = [
+                asyncio.run(run_scenario(base_url, SCENARIOS[name], context, args.users, args.duration, args.warmup))
+                for _ in range(args.repeat)
+            ]
+            # Report the median run by throughput, which damps one-off noise
+            runs.sort(key=lambda run: run["rps"])
+            report["scenarios"][name] = dict(runs[len(runs) // 2], rps_runs=[run["rps"] for run in runs])
+    finally:
+        server.terminate()
+        server.wait()
+
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as handle:
+            handle.write(rendered + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(report, json.load(handle), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Latency of GET /offers while a storm of logins hammers bcrypt, with hashing
+inline on the request threadpool (before) and in the dedicated process pool
+(after).
+
+Usage (from backend/):
+    python -m benchmarks.login_storm [--logins 64] [--readers 16] [--duration 15]
+
+Needs `httpx` for the load generator.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .common import DATABASE_URL, reset_schema, percentile, start_server, wait_ready
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.core.security import pwd_context
+
+PASSWORD = "password"
+
+
+def seed(n_users: int):
+    reset_schema()
+    hashed = pwd_context.hash(PASSWORD)
+    with SessionLocal() as db:
+        db.execute(User.__table__.insert(), [
+            {"email": f"storm{i}@test.tn", "name": f"Storm {i}", "password": hashed, "role": UserRole.STAGIAIRE}
+            for i in range(n_users)
+        ])
+        owner = User(email="owner@test.tn", name="Owner", password=hashed, role=UserRole.COMPANY)
+        db.add(owner)
+        db.flush()
+        company = Company(user_id=owner.id, name="Storm Labs")
+        db.add(company)
+        db.flush()
+        db.add_all(
+            Offer(company_id=company.id, title=f"Offer {i}", description="d", category="Engineering",
+                  duration="3 Months", location="Tunis", price="Unpaid", features=[])
+            for i in range(200)
+        )
+        db.commit()
+
+
+async def storm(base_url: str, logins: int, readers: int, duration: float):
+    read_latencies, login_status = [], {}
+    limits = httpx.Limits(max_connections=logins + readers)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        deadline = time.monotonic() + duration
+
+        async def login(i: int):
+            while time.monotonic() < deadline:
+                response = await client.post(
+                    "/auth/login", data={"username": f"storm{i}@test.tn", "password": PASSWORD}
+                )
+                login_status[response.status_code] = login_status.get(response.status_code, 0) + 1
+                if response.status_code == 503:
+                    await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+
+        async def read():
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                await client.get("/offers/")
+                read_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(*(login(i) for i in range(logins)), *(read() for _ in range(readers)))
+    read_latencies.sort()
+    return read_latencies, login_status
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.logins} users into {DATABASE_URL} ...")
+    seed(args.logins)
+
+    for label, workers in (("inline (before)", 0), (f"pool of {args.workers} (after)", args.workers)):
+        server = start_server(args.port, PASSWORD_HASH_WORKERS=workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_ready(base_url))
+            latencies, login_status = asyncio.run(storm(base_url, args.logins, args.readers, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"{label:<20} GET /offers p50 {percentile(latencies, 50) * 1000:8.1f} ms   "
+            f"p99 {percentile(latencies, 99) * 1000:8.1f} ms   ({len(latencies)} reads)   "
+            f"logins by status {dict(sorted(login_status.items()))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares the old "download the whole catalog and filter in the browser" flow
+with server-side search on GET /offers.
+
+Usage (from backend/):
+    python -m benchmarks.offer_search [--offers 100000]
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import argparse
+import random
+import time
+from typing import List
+from pydantic import TypeAdapter
+
+from .common import DATABASE_URL, reset_schema
+from app.database import engine, SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.schemas.offer import Offer as OfferSchema
+from app.core.search import init_search
+from app.routes.offers import get_offers
+
+WORDS = [
+    "python", "react", "fastapi", "design", "marketing", "data", "cloud", "mobile",
+    "security", "finance", "devops", "sales", "research", "embedded", "network",
+    "android", "analyst", "support", "content", "product",
+]
+CATEGORIES = ["Engineering", "Design", "Marketing", "Business", "Healthcare"]
+LOCATIONS = ["Tunis", "Sousse", "Sfax", "Remote", "Tunis, Lac 2", "Nabeul"]
+DURATIONS = ["2 Months", "3 Months", "4-6 Months", "6 Months"]
+
+serializer = TypeAdapter(List[OfferSchema])
+
+
+def seed(n_offers: int, batch: int = 5000):
+    reset_schema()
+    rng = random.Random(42)
+    with SessionLocal() as db:
+        companies = []
+        for i in range(200):
+            user = User(email=f"bench{i}@test.tn", name=f"Company {i}", password="x", role=UserRole.COMPANY)
+            db.add(user)
+            db.flush()
+            company = Company(user_id=user.id, name=f"{rng.choice(WORDS).title()} Labs {i}")
+            db.add(company)
+            companies.append(company)
+        db.flush()
+        company_ids = [c.id for c in companies]
+        rows = []
+        for i in range(n_offers):
+            rows.append({
+                "company_id": rng.choice(company_ids),
+                "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} intern",
+                "description": " ".join(rng.choices(WORDS, k=40)),
+                "category": rng.choice(CATEGORIES),
+                "duration": rng.choice(DURATIONS),
+                "location": rng.choice(LOCATIONS),
+                "price": rng.choice(["Paid (400 DT/month)", "Paid (300 DT/month)", "Unpaid"]),
+                "features": rng.sample(WORDS, 3),
+            })
+            if len(rows) == batch:
+                db.execute(Offer.__table__.insert(), rows)
+                rows = []
+        if rows:
+            db.execute(Offer.__table__.insert(), rows)
+        db.commit()
+    init_search(engine)
+
+
+def measure(label: str, fn, repeat: int):
+    timings, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            result = fn(db)
+            items = result["items"] if isinstance(result, dict) else result
+            size = len(serializer.dump_json(serializer.validate_python(items, from_attributes=True)))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{label:<42} median {timings[len(timings) // 2] * 1000:9.1f} ms   payload {size / 1024:10.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.offers} offers into {DATABASE_URL} ...")
+    seed(args.offers)
+
+    measure(
+        "full catalog download (old client flow)",
+        lambda db: db.query(Offer).all(),
+        max(1, args.repeat // 2),
+    )
+    measure(
+        "q='react' page of 20",
+        lambda db: get_offers(db=db, cursor=None, limit=20, q="react"),
+        args.repeat,
+    )
+    measure(
+        "q='cloud security' + Tunis + paid, 20",
+        lambda db: get_offers(db=db, cursor=None, limit=20, q="cloud security", location="Tunis", paid=True),
+        args.repeat,
+    )
+    measure(
+        "category + duration filter, 20",
+        lambda db: get_offers(db=db, cursor=None, limit=20, category="Design", duration="6 Months"),
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Guards list and bulk routes against N+1 queries: every route is run against a
+small and a large dataset (or batch) and must issue the same number of SQL
+statements for both, including the ones triggered while serializing the response.
+
+Usage (from backend/):
+    python -m benchmarks.query_counts
+
+Exits non-zero when a route's statement count grows with the result size.
+"""
+import sys
+from typing import Callable, Dict
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from .common import reset_schema
+from app.database import engine, SessionLocal
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.models.application import Application
+from app.schemas.pagination import Page
+from app.schemas.application import (
+    Application as ApplicationSchema, ApplicationBulkUpdate, ApplicationBulkResult, ApplicationSummary,
+    CompanyApplicationSummary,
+)
+from app.schemas.offer import Offer as OfferSchema, OfferBulkCreate, OfferBulkResult
+from app.schemas.user import User as UserSchema
+from app.schemas.company import Company as CompanySchema
+from app.core.config import settings
+from app.core.querycount import count_queries
+from app.routes import admin, applications, offers
+
+PAGE = settings.MAX_PAGE_SIZE
+
+
+def seed(n: int):
+    reset_schema()
+    with SessionLocal() as db:
+        admin_user = User(email="admin@bench.tn", name="Admin", password="x", role=UserRole.ADMIN)
+        company_user = User(email="company@bench.tn", name="Company", password="x", role=UserRole.COMPANY)
+        db.add_all([admin_user, company_user])
+        db.flush()
+        company = Company(user_id=company_user.id, name="Company")
+        db.add(company)
+        db.flush()
+        students, company_offers = [], []
+        for i in range(n):
+            students.append(User(email=f"s{i}@bench.tn", name=f"Student {i}", password="x", role=UserRole.STAGIAIRE))
+            company_offers.append(Offer(
+                company_id=company.id, title=f"Offer {i}", description="d", category="Engineering",
+                duration="3 Months", location="Tunis", price="Unpaid", features=[],
+            ))
+        db.add_all(students + company_offers)
+        db.flush()
+        # One application per student, plus the first student applying everywhere,
+        # so both the stagiaire and the offer side of the listings fan out
+        for i, student in enumerate(students):
+            db.add(Application(stagiaire_id=student.id, offer_id=company_offers[i].id))
+        db.add_all(Application(stagiaire_id=students[0].id, offer_id=o.id) for o in company_offers[1:])
+        db.commit()
+        return admin_user.id, company_user.id, students[0].id
+
+
+def bulk_offers(n: int) -> OfferBulkCreate:
+    return OfferBulkCreate(offers=[
+        {
+            "title": f"Imported {i}", "description": "d", "category": "Design", "duration": "6 Months",
+            "location": "Sousse", "price": "Unpaid", "features": ["figma"],
+        }
+        for i in range(n)
+    ])
+
+
+def run_routes(admin_id: int, company_id: int, student_id: int, n: int) -> Dict[str, int]:
+    routes: Dict[str, Callable] = {
+        "GET /applications/my-applications": (
+            lambda db: applications.get_user_applications(db=db, current_user=db.get(User, student_id), cursor=None, limit=PAGE),
+            Page[ApplicationSchema],
+        ),
+        "GET /applications/my-applications/summary": (
+            lambda db: applications.get_user_application_summary(db=db, current_user=db.get(User, student_id)),
+            ApplicationSummary,
+        ),
+        "GET /applications/company": (
+            lambda db: applications.get_company_applications(db=db, current_user=db.get(User, company_id), cursor=None, limit=PAGE),
+            Page[ApplicationSchema],
+        ),
+        "GET /applications/company/summary": (
+            lambda db: applications.get_company_application_summary(
+                db=db, current_user=db.get(User, company_id), pending_limit=PAGE,
+            ),
+            CompanyApplicationSummary,
+        ),
+        "GET /admin/applications": (
+            lambda db: admin.list_applications(db=db, admin=db.get(User, admin_id), cursor=None, limit=PAGE),
+            Page[ApplicationSchema],
+        ),
+        "GET /admin/users": (
+            lambda db: admin.list_users(db=db, admin=db.get(User, admin_id), cursor=None, limit=PAGE),
+            Page[UserSchema],
+        ),
+        "GET /admin/companies": (
+            lambda db: admin.list_companies(db=db, admin=db.get(User, admin_id), cursor=None, limit=PAGE),
+            Page[CompanySchema],
+        ),
+        "GET /offers/company": (
+            lambda db: offers.get_company_offers(db=db, current_user=db.get(User, company_id), cursor=None, limit=PAGE),
+            Page[OfferSchema],
+        ),
+        # Write routes last, they change the data the listings above read
+        "POST /offers/bulk": (
+            lambda db: offers.create_offers_bulk(batch=bulk_offers(n), db=db, current_user=db.get(User, company_id)),
+            OfferBulkResult,
+        ),
+        "PATCH /applications/bulk": (
+            lambda db: applications.update_application_status_bulk(
+                batch=ApplicationBulkUpdate(ids=list(db.scalars(select(Application.id))), status="accepted"),
+                db=db, current_user=db.get(User, company_id),
+            ),
+            ApplicationBulkResult,
+        ),
+    }
+    counts = {}
+    for name, (call, schema) in routes.items():
+        with SessionLocal() as db:
+            with count_queries(engine) as counter:
+                adapter = TypeAdapter(schema)
+                adapter.dump_json(adapter.validate_python(call(db), from_attributes=True))
+            counts[name] = counter.count
+    return counts
+
+
+def main():
+    small = run_routes(*seed(3), n=3)
+    large = run_routes(*seed(PAGE + 20), n=PAGE + 20)
+    failed = False
+    for name in small:
+        status = "ok" if small[name] == large[name] else "GROWS WITH RESULT SIZE"
+        failed |= small[name] != large[name]
+        print(f"{name:<42} {small[name]:>3} statements (3 rows) {large[name]:>3} statements ({PAGE} rows)  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Latency of the offer recommender (core.recommend) on a large synthetic catalog.
+
+Usage (from backend/):
+    python -m benchmarks.recommendations [--offers 100000] [--queries 1000] [--budget-ms 20]
+
+Builds the in-memory index from generated offers (no database), then times
+recommendations for random students who applied to 1 to 50 offers, and
+incremental upserts and removals. Runs pinned to one CPU core where the OS
+allows it, since the target is per-request latency on one worker. Exits 1
+when the p95 recommendation latency exceeds --budget-ms, or when a profile
+made of one category's offers is not answered mostly from that category.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from .common import percentile
+from app.core.recommend import OfferIndex
+from app.core.config import settings
+
+CATEGORIES = ["Software Engineering", "Data Science", "Marketing", "UI/UX Design", "Finance", "Sales",
+              "Electrical Engineering", "Human Resources", "Mechanical Engineering", "Legal"]
+SKILLS = ["python", "react", "sql", "excel", "figma", "seo", "java", "docker", "communication", "autocad",
+          "power bi", "accounting", "negotiation", "matlab", "english", "french"]
+SYLLABLES = ["ka", "lo", "mi", "ter", "san", "vo", "rel", "dun", "pra", "gen", "tos", "bli", "mar", "zen", "qui"]
+
+
+def vocabulary(rng: random.Random, size: int):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_offers(n: int, seed: int = 42):
+    """(id, title, description, category, features) rows; each category has its own slice of the vocabulary."""
+    rng = random.Random(seed)
+    words = vocabulary(rng, 20_000)
+    shared = words[:2_000]
+    per_category = {
+        category: words[2_000 + i * 1_800: 2_000 + (i + 1) * 1_800] for i, category in enumerate(CATEGORIES)
+    }
+    offers = []
+    for offer_id in range(1, n + 1):
+        category = rng.choice(CATEGORIES)
+        own = per_category[category]
+        # Zipf-like: low ranks of each word list are much more frequent
+        description = " ".join(
+            own[int(rng.paretovariate(1.2)) % len(own)] if rng.random() < 0.6
+            else shared[int(rng.paretovariate(1.1)) % len(shared)]
+            for _ in range(rng.randint(40, 160))
+        )
+        title = f"{category} intern {own[rng.randrange(50)]}"
+        offers.append((offer_id, title, description, category, rng.sample(SKILLS, rng.randint(1, 4))))
+    return offers
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def report(label: str, seconds):
+    seconds = sorted(seconds)
+    print(f"{label:<28} n={len(seconds):<6} p50 {percentile(seconds, 50) * 1000:8.3f} ms"
+          f"  p95 {percentile(seconds, 95) * 1000:8.3f} ms  p99 {percentile(seconds, 99) * 1000:8.3f} ms")
+    return percentile(seconds, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+    rng = random.Random(7)
+    offers, seconds = timed(synthetic_offers, args.offers)
+    print(f"generated {len(offers)} offers in {seconds:.1f} s")
+
+    index = OfferIndex(settings.RECOMMEND_TERMS_PER_OFFER, settings.RECOMMEND_IDF_REFRESH)
+    _, seconds = timed(index.load, offers)
+    print(f"index built in {seconds:.2f} s: {len(index.vocabulary)} terms, "
+          f"{index.terms.nbytes + index.tf.nbytes + index.scaled.nbytes >> 20} MiB of rows")
+
+    failures = []
+    latencies = []
+    for _ in range(args.queries):
+        applied = rng.sample(range(1, args.offers + 1), rng.randint(1, settings.RECOMMEND_PROFILE_SIZE))
+        _, seconds = timed(index.recommend, applied, args.limit, applied)
+        latencies.append(seconds)
+    p95 = report("recommend", latencies)
+    if p95 * 1000 > args.budget_ms:
+        failures.append(f"recommend p95 {p95 * 1000:.2f} ms over the {args.budget_ms} ms budget")
+
+    # Relevance: students who applied to one category get offers from it
+    categories = {offer[0]: offer[3] for offer in offers}
+    matching = total = 0
+    for category in CATEGORIES:
+        applied = [offer_id for offer_id, c in categories.items() if c == category][:10]
+        for offer_id, _ in index.recommend(applied, args.limit, applied):
+            matching += categories[offer_id] == category
+            total += 1
+    print(f"{'same-category results':<28} {matching}/{total}")
+    if total == 0 or matching < 0.9 * total:
+        failures.append(f"only {matching}/{total} recommendations match the profile's category")
+
+    # Incremental updates: edits, then new offers past the next IDF refresh
+    edits = [timed(index.upsert, offers[rng.randrange(len(offers))])[1] for _ in range(1000)]
+    report("upsert (edit)", edits)
+    fresh = synthetic_offers(len(offers) // 5, seed=43)
+    inserts = [timed(index.upsert, (args.offers + offer[0],) + offer[1:])[1] for offer in fresh]
+    report("upsert (new, with refresh)", inserts)
+    removals = [timed(index.remove, offer[0])[1] for offer in offers[:1000]]
+    report("remove", removals)
+    if len(index) != args.offers + len(fresh) - 1000:
+        failures.append(f"index holds {len(index)} offers after updates")
+
+    latencies = []
+    for _ in range(args.queries):
+        applied = rng.sample(range(1001, args.offers + 1), rng.randint(1, settings.RECOMMEND_PROFILE_SIZE))
+        _, seconds = timed(index.recommend, applied, args.limit, applied)
+        latencies.append(seconds)
+    p95 = report(f"recommend ({len(index)} offers)", latencies)
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+GET /offers latency while students upload 5 MB CVs concurrently, to check
+that uploads stream through the threadpool instead of stalling the event loop.
+
+Usage (from backend/):
+    python -m benchmarks.upload_latency [--uploaders 20] [--size-mb 5] [--duration 15]
+
+Runs two phases against one uvicorn process: GET /offers alone, then the same
+probe while `--uploaders` clients post CVs in a loop. Uploaded files go to a
+throwaway UPLOAD_DIR. Needs `httpx` for the load generator.
+
+Then posts a CV four times over the limit, with and without Content-Length,
+and exits 1 unless both get a 413 before the server has read the body.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .common import DATABASE_URL, reset_schema, percentile, start_server, wait_ready
+from app.database import SessionLocal, engine
+from app.models.user import User, UserRole
+from app.models.company import Company
+from app.models.offer import Offer
+from app.core.search import init_search
+from app.core.security import create_access_token
+
+
+def seed(n_students: int, n_offers: int) -> list:
+    reset_schema()
+    with SessionLocal() as db:
+        owner = User(email="bench@test.tn", name="Bench", password="x", role=UserRole.COMPANY)
+        db.add(owner)
+        db.flush()
+        company = Company(user_id=owner.id, name="Bench Labs")
+        db.add(company)
+        db.flush()
+        db.execute(Offer.__table__.insert(), [
+            {
+                "company_id": company.id, "title": f"Offer {i}", "description": "Internship " * 20,
+                "category": "Engineering", "duration": "3 Months", "location": "Tunis",
+                "price": "Paid (400 DT/month)", "features": ["python"],
+            }
+            for i in range(n_offers)
+        ])
+        students = [
+            User(email=f"student{i}@test.tn", name=f"Student {i}", password="x", role=UserRole.STAGIAIRE)
+            for i in range(n_students)
+        ]
+        db.add_all(students)
+        db.commit()
+        student_ids = [student.id for student in students]
+    init_search(engine)
+    return [create_access_token(student_id) for student_id in student_ids]
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/offers/", params={"limit": 20})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def uploader(client: httpx.AsyncClient, token: str, size: int, stop: asyncio.Event) -> int:
+    uploads = 0
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        # Distinct content every time so deduplication does not short-circuit the write
+        body = os.urandom(size)
+        response = await client.post(
+            "/auth/upload-cv", headers=headers, files={"file": ("cv.pdf", body, "application/pdf")}
+        )
+        response.raise_for_status()
+        uploads += 1
+    return uploads
+
+
+async def phase(base_url: str, tokens: list, size: int, duration: float) -> dict:
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=len(tokens) + 4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        probe_task = asyncio.create_task(probe(client, stop))
+        upload_tasks = [asyncio.create_task(uploader(client, token, size, stop)) for token in tokens]
+        await asyncio.sleep(duration)
+        stop.set()
+        latencies = sorted(await probe_task)
+        uploads = sum(await asyncio.gather(*upload_tasks))
+    return {
+        "probes": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0) * 1000,
+        "uploads": uploads,
+        "upload_mb_s": uploads * size / (1024 * 1024) / duration,
+    }
+
+
+async def post_partial(port: int, headers: dict, body: bytes) -> int:
+    """Sends the headers and `body`, then nothing more, and returns the response status (0 if none)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        lines = ["POST /auth/upload-cv HTTP/1.1", "Host: 127.0.0.1"] + [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout=10)
+    except (asyncio.TimeoutError, ConnectionError):
+        return 0
+    finally:
+        writer.close()
+    return int(status_line.split()[1]) if status_line else 0
+
+
+async def check_oversized(port: int, token: str, size: int) -> list:
+    """
+    Failures: an upload four times over the limit must get its 413 while most
+    of its body is still unsent, whether it declares Content-Length or is chunked.
+    """
+    boundary = "benchboundary"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"cv.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode()
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": f"multipart/form-data; boundary={boundary}"}
+    # Declared: only the start of the body is sent
+    declared = await post_partial(port, dict(headers, **{"Content-Length": str(4 * size)}), head)
+    # Chunked: just past the limit, the remaining three quarters never come
+    data = head + b"x" * (size + 128 * 1024)
+    chunked = await post_partial(
+        port, dict(headers, **{"Transfer-Encoding": "chunked"}), f"{len(data):x}\r\n".encode() + data + b"\r\n"
+    )
+    failures = []
+    for label, status in (("declared", declared), ("chunked", chunked)):
+        print(f"oversized upload, {label:<8} -> {status or 'no response'}")
+        if status != 413:
+            failures.append(f"{label} oversized upload got {status or 'no response'} instead of 413")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploaders", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--offers", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.uploaders} students and {args.offers} offers into {DATABASE_URL} ...")
+    tokens = seed(args.uploaders, args.offers)
+    size = int(args.size_mb * 1024 * 1024)
+
+    upload_dir = tempfile.mkdtemp(prefix="bench-uploads-")
+    server = start_server(args.port, UPLOAD_DIR=upload_dir, CV_MAX_BYTES=size + 1)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        idle = asyncio.run(phase(base_url, [], size, args.duration))
+        busy = asyncio.run(phase(base_url, tokens, size, args.duration))
+        failures = asyncio.run(check_oversized(args.port, tokens[0], size))
+    finally:
+        server.terminate()
+        server.wait()
+
+    for label, result in (("idle", idle), (f"{args.uploaders} uploads", busy)):
+        print(
+            f"{label:<12} GET /offers p50 {result['p50_ms']:7.1f} ms   p99 {result['p99_ms']:7.1f} ms   "
+            f"max {result['max_ms']:7.1f} ms   ({result['uploads']} uploads, {result['upload_mb_s']:.1f} MB/s)"
+        )
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from alembic import context
+from sqlalchemy import Index
+
+from app.core.config import settings
+from app.database import Base, engine
+# Register every model on Base.metadata for autogenerate and the drift check
+from app.models import user, company, offer, application, stats, job, cv_document, catalog_state  # noqa: F401
+from app.core.search import FTS_TABLES
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names):
+    # The SQLite FTS5 indexes and their shadow tables are managed by core.search
+    if type_ == "table" and name and name.startswith(FTS_TABLES):
+        return False
+    return True
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Skip dialect-specific indexes (Index.ddl_if) on the other dialects
+    if isinstance(object, Index):
+        ddl_if = getattr(object, "_ddl_if", None)
+        dialect = context.get_context().dialect.name
+        if ddl_if is not None and ddl_if.dialect and ddl_if.dialect != dialect:
+            return False
+    return True
+
+
+def configure(**options):
+    context.configure(
+        target_metadata=target_metadata,
+        include_name=include_name,
+        include_object=include_object,
+        compare_type=True,
+        render_as_batch=True,  # SQLite can only ALTER tables by copying them
+        **options,
+    )
+
+
+def run_migrations_offline():
+    configure(url=settings.DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # app.core.migrations passes the connection it is already holding
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    with engine.connect() as connection:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,53 @@
+"""hot path indexes
+
+Indexes for the foreign keys and filters the API queries on, and one
+application per (stagiaire, offer). On PostgreSQL they are built CONCURRENTLY
+outside the migration transaction so writes keep flowing while they build. A
+build that fails leaves an INVALID index behind: drop it and run the upgrade again.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:28:45.454309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    # (name, table, columns, unique)
+    ('ix_applications_offer_id', 'applications', ['offer_id'], False),
+    ('uq_applications_stagiaire_offer', 'applications', ['stagiaire_id', 'offer_id'], True),
+    ('ix_offers_category', 'offers', ['category'], False),
+    ('ix_offers_company_id_created_at', 'offers', ['company_id', 'created_at'], False),
+]
+
+
+def upgrade() -> None:
+    # Duplicate applications predate the unique index (apply checked, then
+    # inserted). Keep the oldest of each pair; run app.rebuild_stats afterwards.
+    op.execute(
+        "DELETE FROM applications WHERE stagiaire_id IS NOT NULL AND offer_id IS NOT NULL "
+        "AND id NOT IN (SELECT MIN(id) FROM applications "
+        "WHERE stagiaire_id IS NOT NULL AND offer_id IS NOT NULL GROUP BY stagiaire_id, offer_id)"
+    )
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name, table, columns, unique=unique,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,47 @@
+"""application status index
+
+Composite (offer_id, status, applied_at) index for the company dashboard:
+per-offer counts by status, the latest pending applications and the
+status/offer filters of /applications/company. It leads with offer_id, so it
+replaces ix_applications_offer_id for the foreign key and cascade lookups.
+Built CONCURRENTLY on PostgreSQL, like 0002.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 13:05:12.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_applications_offer_id_status_applied_at', 'applications', ['offer_id', 'status', 'applied_at'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_applications_offer_id', table_name='applications', postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_applications_offer_id', 'applications', ['offer_id'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_applications_offer_id_status_applied_at', table_name='applications',
+            postgresql_concurrently=True, if_exists=True,
+        )
@@ -0,0 +1,58 @@
+"""cv documents
+
+Extracted CV text for the candidate search of /applications/company:
+`cv_documents`, one row per distinct CV file keyed by its SHA-256 (tsvector
+column with a GIN index on PostgreSQL, the FTS5 table of core.search on
+SQLite), and `users.cv_sha256` (indexed), which links a user to the row of their CV.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 18:02:51.730946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cv_documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('extracted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('search_vector', sa.Text().with_variant(postgresql.TSVECTOR(), 'postgresql'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('cv_documents', schema=None) as batch_op:
+        batch_op.create_index('uq_cv_documents_sha256', ['sha256'], unique=True)
+    if op.get_bind().dialect.name == 'postgresql':
+        # SQLite keeps its search index in the FTS5 table created by core.search
+        op.create_index('ix_cv_documents_search_vector', 'cv_documents', ['search_vector'], postgresql_using='gin')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cv_sha256', sa.String(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_users_cv_sha256'), ['cv_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_cv_sha256'))
+        batch_op.drop_column('cv_sha256')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_cv_documents_search_vector', table_name='cv_documents')
+    with op.batch_alter_table('cv_documents', schema=None) as batch_op:
+        batch_op.drop_index('uq_cv_documents_sha256')
+
+    op.drop_table('cv_documents')
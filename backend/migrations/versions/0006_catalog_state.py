@@ -0,0 +1,37 @@
+"""catalog state
+
+`catalog_state`, the version of the public offer catalog shared by every
+worker (core.catalog_cache): one row, bumped with the time of the change by
+each transaction that changes offers. Seeded at version 0.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 19:12:40.318207
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    catalog_state = op.create_table('catalog_state',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('modified_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalog_state, [{'id': 1, 'version': 0, 'modified_at': datetime.now(timezone.utc)}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_state')
@@ -3,13 +3,21 @@ from app.models.user import User
 from app.models.company import Company
 from app.models.offer import Offer
 from app.models.application import Application
+from app.models.stats import StatCounter, StatDaily
+from app.core.search import init_search, drop_search
+from app.core.migrations import upgrade_database
+from sqlalchemy import text
 
 def reset_db():
     print("🗑️ Dropping all tables...")
     Base.metadata.drop_all(bind=engine)
+    drop_search(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
     print("✅ Tables dropped.")
     print("🏗️ Creating all tables...")
-    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
+    init_search(engine)
     print("✅ Tables created.")
 
 if __name__ == "__main__":
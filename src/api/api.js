@@ -7,9 +7,11 @@
  */
 import axios from 'axios';
 
+const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
 // Create an Axios instance with base configuration
 const api = axios.create({
-    baseURL: process.env.REACT_APP_API_URL || 'http://localhost:8000',
+    baseURL: API_URL,
     headers: {
         'Content-Type': 'application/json',
     },
@@ -62,19 +64,28 @@ export const authService = {
             headers: { 'Content-Type': 'multipart/form-data' }
         });
     },
+    // CVs are only served through this authorized route, as a Blob
+    downloadCV: (userId) => api.get(`/files/cv/${userId}`, { responseType: 'blob' }),
 };
 
 /**
  * Internship Offers Management
  * CRUD operations for internship listings.
+ * List endpoints return `{ items, next_cursor }`; pass `{ cursor }` to fetch the next page.
  */
 export const offerApi = {
     getAll: (params) => api.get('/offers/', { params }),
     getById: (id) => api.get(`/offers/${id}`),
+    // Counts per category, location, duration and paid/unpaid for the same filters as getAll
+    getFacets: (params) => api.get('/offers/facets', { params }),
+    // Offers similar to the student's applications, best first (a plain array, not a page)
+    getRecommended: (limit = 10) => api.get('/offers/recommended', { params: { limit } }),
     create: (data) => api.post('/offers/', data),
+    // Returns `{ created, errors }`, errors carry the index of the rejected offer
+    createBulk: (offers) => api.post('/offers/bulk', { offers }),
     update: (id, data) => api.put(`/offers/${id}`, data),
     delete: (id) => api.delete(`/offers/${id}`),
-    getCompanyOffers: () => api.get('/offers/company'),
+    getCompanyOffers: (params) => api.get('/offers/company', { params }),
 };
 
 /**
@@ -83,9 +94,15 @@ export const offerApi = {
  */
 export const applicationApi = {
     apply: (data) => api.post('/applications/', data),
-    getStagiaireApplications: () => api.get('/applications/my-applications'),
-    getCompanyApplications: () => api.get('/applications/company'),
+    getStagiaireApplications: (params) => api.get('/applications/my-applications', { params }),
+    // The student's counts by status, over all pages
+    getStagiaireSummary: () => api.get('/applications/my-applications/summary'),
+    // params: cursor, limit, status, offer_id, q (words to find in the candidates' CV text)
+    getCompanyApplications: (params) => api.get('/applications/company', { params }),
+    // Counts by status (overall and per offer) and the latest pending applications
+    getCompanySummary: (params) => api.get('/applications/company/summary', { params }),
     updateStatus: (id, status) => api.patch(`/applications/${id}`, { status }),
+    updateStatusBulk: (ids, status) => api.patch('/applications/bulk', { ids, status }),
     getAllApplications: () => api.get('/applications/all'),
 };
 
@@ -94,10 +111,56 @@ export const applicationApi = {
  * High-level system oversight and user management.
  */
 export const adminApi = {
-    getUsers: () => api.get('/admin/users'),
+    getUsers: (params) => api.get('/admin/users', { params }),
     getStats: () => api.get('/admin/stats'),
-    getAllApplications: () => api.get('/admin/applications'),
+    getAllApplications: (params) => api.get('/admin/applications', { params }),
     deleteUser: (id) => api.delete(`/admin/users/${id}`),
 };
 
 export default api;
+
+/**
+ * Server-Sent Events
+ * Pushes `application.created` and `application.status_changed` for the logged-in user.
+ * EventSource cannot send headers, so every connection first fetches a short-lived
+ * stream token (POST /events/token) for the query string: the login JWT never
+ * appears in a URL. The token expires within a minute, so instead of letting the
+ * browser reconnect with it, each dropped connection is reopened with a fresh one.
+ * `handlers` maps event types to callbacks, `onOpen` runs on every (re)connection.
+ * Returns a function that closes the stream.
+ */
+const EVENT_STREAM_RETRY_MS = 3000;
+
+export const openEventStream = (handlers, onOpen) => {
+    let source = null;
+    let retry = null;
+    let closed = false;
+
+    const reconnect = () => {
+        if (!closed) retry = setTimeout(connect, EVENT_STREAM_RETRY_MS);
+    };
+    const connect = async () => {
+        let token;
+        try {
+            token = (await api.post('/events/token')).data.token;
+        } catch (error) {
+            reconnect();
+            return;
+        }
+        if (closed) return;
+        source = new EventSource(`${API_URL}/events/stream?token=${encodeURIComponent(token)}`);
+        Object.entries(handlers).forEach(([type, handler]) => source.addEventListener(type, handler));
+        source.onopen = () => onOpen && onOpen();
+        source.onerror = () => {
+            source.close();
+            reconnect();
+        };
+    };
+
+    connect();
+    return () => {
+        closed = true;
+        clearTimeout(retry);
+        if (source) source.close();
+    };
+};
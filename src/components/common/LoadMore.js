@@ -0,0 +1,20 @@
+import React from 'react';
+import { ChevronDown, Loader2 } from 'lucide-react';
+
+/**
+ * "Load more" control for the cursor-paginated lists (`{ items, next_cursor }`).
+ * Renders nothing once the last page has been loaded (`cursor` is null).
+ */
+const LoadMore = ({ cursor, loading, onLoad, className = '' }) => {
+    if (!cursor) return null;
+    return (
+        <div className={`flex justify-center ${className}`}>
+            <button onClick={onLoad} disabled={loading} className="btn-secondary flex items-center gap-2 disabled:opacity-50">
+                {loading ? <Loader2 size={16} className="animate-spin" /> : <ChevronDown size={16} />}
+                {loading ? 'Loading' : 'Load more'}
+            </button>
+        </div>
+    );
+};
+
+export default LoadMore;
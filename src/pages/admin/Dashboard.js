@@ -7,23 +7,33 @@ import {
 } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { toast } from 'react-hot-toast';
+import LoadMore from '../../components/common/LoadMore';
 
 const AdminDashboard = () => {
-    const [stats, setStats] = useState({ users: 124, companies: 42, offers: 86, applications: 312 });
+    const [stats, setStats] = useState({ users: 0, companies: 0, offers: 0, applications: 0 });
     const [applications, setApplications] = useState([]);
     const [users, setUsers] = useState([]);
+    const [cursors, setCursors] = useState({ users: null, applications: null });
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [activeTab, setActiveTab] = useState('users');
 
+    // Totals come from the server-side counters, the tables only hold the pages loaded so far
+    const fetchStats = () => adminApi.getStats()
+        .then((response) => setStats(response.data))
+        .catch((error) => console.error('Stats Error:', error));
+
     useEffect(() => {
         const fetchData = async () => {
+            fetchStats();
             try {
                 const [usersRes, appsRes] = await Promise.all([
                     adminApi.getUsers(),
-                    adminApi.getApplications()
+                    adminApi.getAllApplications()
                 ]);
-                setUsers(usersRes.data);
-                setApplications(appsRes.data);
+                setUsers(usersRes.data.items);
+                setApplications(appsRes.data.items);
+                setCursors({ users: usersRes.data.next_cursor, applications: appsRes.data.next_cursor });
             } catch (error) {
                 toast.error('Failed to synchronize with central intelligence. Please check your connection.');
                 console.error('API Error:', error);
@@ -34,11 +44,29 @@ const AdminDashboard = () => {
         fetchData();
     }, []);
 
+    const loadMore = async (table) => {
+        const fetchPage = table === 'users' ? adminApi.getUsers : adminApi.getAllApplications;
+        const append = table === 'users' ? setUsers : setApplications;
+        setLoadingMore(true);
+        try {
+            const response = await fetchPage({ cursor: cursors[table] });
+            append((current) => [...current, ...response.data.items]);
+            setCursors((current) => ({ ...current, [table]: response.data.next_cursor }));
+        } catch (error) {
+            toast.error('Failed to load more records.');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDeleteUser = async (id) => {
         if (!window.confirm('Terminate this user account permanently?')) return;
         try {
             await adminApi.deleteUser(id);
             setUsers(users.filter(u => u.id !== id));
+            // Their applications went with them
+            setApplications((current) => current.filter(app => app.stagiaire_id !== id));
+            fetchStats();
             toast.success('User terminated successfully');
         } catch (error) {
             toast.error('Failed to terminate user');
@@ -173,6 +201,7 @@ const AdminDashboard = () => {
                                             ))}
                                         </tbody>
                                     </table>
+                                    <LoadMore cursor={cursors.users} loading={loadingMore} onLoad={() => loadMore('users')} className="py-8" />
                                 </motion.div>
                             )}
 
@@ -194,10 +223,10 @@ const AdminDashboard = () => {
                                             {applications.map(app => (
                                                 <tr key={app.id} className="hover:bg-slate-50/30 transition-colors">
                                                     <td className="px-8 py-6">
-                                                        <p className="text-sm font-black text-slate-900">{app.student}</p>
+                                                        <p className="text-sm font-black text-slate-900">{app.stagiaire?.name}</p>
                                                     </td>
                                                     <td className="px-8 py-6">
-                                                        <p className="text-sm font-medium text-slate-600">{app.offer}</p>
+                                                        <p className="text-sm font-medium text-slate-600">{app.offer?.title}</p>
                                                     </td>
                                                     <td className="px-8 py-6">
                                                         <span className={`px-3 py-1 rounded-full text-[10px] font-black uppercase tracking-widest border border-slate-100 ${app.status === 'accepted' ? 'bg-emerald-50 text-emerald-600 border-emerald-100' :
@@ -208,12 +237,13 @@ const AdminDashboard = () => {
                                                         </span>
                                                     </td>
                                                     <td className="px-8 py-6 text-right font-bold text-[11px] text-slate-400 uppercase tracking-widest">
-                                                        {app.date}
+                                                        {new Date(app.applied_at).toLocaleDateString()}
                                                     </td>
                                                 </tr>
                                             ))}
                                         </tbody>
                                     </table>
+                                    <LoadMore cursor={cursors.applications} loading={loadingMore} onLoad={() => loadMore('applications')} className="py-8" />
                                 </motion.div>
                             )}
                         </AnimatePresence>
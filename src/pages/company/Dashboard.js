@@ -6,11 +6,14 @@ import {
 } from 'lucide-react';
 import { offerApi, applicationApi } from '../../api/api';
 import OfferForm from '../../components/offers/OfferForm';
+import LoadMore from '../../components/common/LoadMore';
 import { toast } from 'react-hot-toast';
 import { motion, AnimatePresence } from 'framer-motion';
 
 const CompanyDashboard = () => {
     const [offers, setOffers] = useState([]);
+    const [nextOffersCursor, setNextOffersCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [applications, setApplications] = useState([]);
     const [stats, setStats] = useState({ activeOffers: 0, totalApplicants: 0, pendingReview: 0 });
     const [loading, setLoading] = useState(true);
@@ -19,17 +22,20 @@ const CompanyDashboard = () => {
 
     const fetchData = async () => {
         try {
-            const [offersRes, appsRes] = await Promise.all([
+            const [offersRes, summaryRes] = await Promise.all([
                 offerApi.getCompanyOffers(),
-                applicationApi.getCompanyApplications()
+                applicationApi.getCompanySummary()
             ]);
-            setOffers(offersRes.data);
-            setApplications(appsRes.data);
+            const summary = summaryRes.data;
+            setOffers(offersRes.data.items);
+            setNextOffersCursor(offersRes.data.next_cursor);
+            // Counts are computed on the server; only the latest pending applications are downloaded
+            setApplications(summary.latest_pending);
 
             setStats({
-                activeOffers: offersRes.data.length,
-                totalApplicants: appsRes.data.length,
-                pendingReview: appsRes.data.filter(a => a.status === 'pending').length
+                activeOffers: summary.offers.length,
+                totalApplicants: summary.total,
+                pendingReview: summary.counts.pending
             });
         } catch (error) {
             toast.error('Failed to sync recruitment hub metrics.');
@@ -43,6 +49,19 @@ const CompanyDashboard = () => {
         fetchData();
     }, []);
 
+    const loadMoreOffers = async () => {
+        setLoadingMore(true);
+        try {
+            const response = await offerApi.getCompanyOffers({ cursor: nextOffersCursor });
+            setOffers((current) => [...current, ...response.data.items]);
+            setNextOffersCursor(response.data.next_cursor);
+        } catch (error) {
+            toast.error('Failed to load more protocols.');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDeleteOffer = async (id) => {
         if (!window.confirm('Terminate this internship protocol? This action is irreversible.')) return;
         try {
@@ -167,6 +186,7 @@ const CompanyDashboard = () => {
                                         <p className="text-slate-400 font-medium">Start building your pipeline by initiating a new internship protocol.</p>
                                     </div>
                                 )}
+                                <LoadMore cursor={nextOffersCursor} loading={loadingMore} onLoad={loadMoreOffers} />
                             </div>
                         </div>
                     </div>
@@ -187,10 +207,10 @@ const CompanyDashboard = () => {
                                             <div className="flex justify-between items-start mb-6">
                                                 <div className="flex items-center gap-4">
                                                     <div className="w-12 h-12 bg-primary-600/20 text-primary-400 border border-primary-500/20 rounded-2xl flex items-center justify-center font-black text-lg">
-                                                        {app.user.name?.charAt(0).toUpperCase()}
+                                                        {app.stagiaire?.name?.charAt(0).toUpperCase()}
                                                     </div>
                                                     <div>
-                                                        <p className="text-white font-black text-sm tracking-tight leading-none mb-1">{app.user.name}</p>
+                                                        <p className="text-white font-black text-sm tracking-tight leading-none mb-1">{app.stagiaire?.name}</p>
                                                         <p className="text-slate-400 text-[9px] font-black uppercase tracking-[0.2em]">{app.offer.title}</p>
                                                     </div>
                                                 </div>
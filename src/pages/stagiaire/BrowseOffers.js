@@ -1,41 +1,86 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { offerApi } from '../../api/api';
 import OfferCard from '../../components/offers/OfferCard';
+import LoadMore from '../../components/common/LoadMore';
+import { toast } from 'react-hot-toast';
 import { Search, SlidersHorizontal, Sparkles, Filter, X, GraduationCap } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 
 const BrowseOffers = () => {
     const [offers, setOffers] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+    // Parameters of the current result list; a page requested for older filters is dropped
+    const query = useRef({});
     const [searchTerm, setSearchTerm] = useState('');
     const [selectedCategory, setSelectedCategory] = useState('All');
     const [isFilterOpen, setIsFilterOpen] = useState(false);
 
+    const [location, setLocation] = useState('');
+    const [pay, setPay] = useState('');
+    const [duration, setDuration] = useState('');
+    const [facets, setFacets] = useState(null);
+
+    // Filter options and counts come from the (server-cached) facets of the whole catalog
+    useEffect(() => {
+        offerApi.getFacets()
+            .then((response) => setFacets(response.data))
+            .catch((error) => console.error('Facet Load Error:', error));
+    }, []);
+
+    // Search and filtering run on the server so only matching offers are downloaded
     useEffect(() => {
+        const params = {};
+        if (searchTerm.trim()) params.q = searchTerm.trim();
+        if (selectedCategory !== 'All') params.category = selectedCategory;
+        if (location) params.location = location;
+        if (duration) params.duration = duration;
+        if (pay) params.paid = pay === 'paid';
+
         const fetchOffers = async () => {
+            setLoading(true);
+            query.current = params;
             try {
-                const response = await offerApi.getAll();
-                setOffers(response.data);
+                const response = await offerApi.getAll(params);
+                if (query.current !== params) return;
+                setOffers(response.data.items);
+                setNextCursor(response.data.next_cursor);
             } catch (error) {
                 console.error('Core Network Error:', error);
                 toast.error('Failed to link with internship registry. Please refresh.');
             } finally {
-                setLoading(false);
+                if (query.current === params) setLoading(false);
             }
         };
-        fetchOffers();
-    }, []);
+        const timer = setTimeout(fetchOffers, 300);
+        return () => clearTimeout(timer);
+    }, [searchTerm, selectedCategory, location, duration, pay]);
 
-    const categories = ['All', 'Engineering', 'Design', 'Marketing', 'Business', 'Healthcare'];
+    const loadMore = async () => {
+        const params = query.current;
+        setLoadingMore(true);
+        try {
+            const response = await offerApi.getAll({ ...params, cursor: nextCursor });
+            if (query.current !== params) return;
+            setOffers((current) => [...current, ...response.data.items]);
+            setNextCursor(response.data.next_cursor);
+        } catch (error) {
+            console.error('Pagination Error:', error);
+            toast.error('Failed to load more offers.');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
-    const filteredOffers = offers.filter(offer => {
-        const title = offer.title || '';
-        const companyName = offer.company_name || offer.company?.name || 'Partner Company';
-        const matchesSearch = title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-            companyName.toLowerCase().includes(searchTerm.toLowerCase());
-        const matchesCategory = selectedCategory === 'All' || offer.category === selectedCategory;
-        return matchesSearch && matchesCategory;
-    });
+    const categories = [
+        { value: 'All', count: facets?.total },
+        ...(facets?.category || []).filter(facet => facet.value),
+    ];
+    const locations = (facets?.location || []).filter(facet => facet.value);
+    const durations = (facets?.duration || []).filter(facet => facet.value);
+    const payCount = (value) => facets?.paid.find(facet => facet.value === value)?.count;
+    const withCount = (label, count) => (count === undefined ? label : `${label} (${count})`);
 
     return (
         <div className="min-h-screen pb-20 bg-slate-50">
@@ -116,39 +161,40 @@ const BrowseOffers = () => {
                                     <div className="flex flex-wrap gap-2">
                                         {categories.map(cat => (
                                             <button
-                                                key={cat}
-                                                onClick={() => setSelectedCategory(cat)}
-                                                className={`px-4 py-2 rounded-xl text-xs font-bold transition-all ${selectedCategory === cat ? 'bg-primary-600 text-white shadow-lg shadow-primary-500/20' : 'bg-slate-50 text-slate-500 hover:bg-slate-100'
+                                                key={cat.value}
+                                                onClick={() => setSelectedCategory(cat.value)}
+                                                className={`px-4 py-2 rounded-xl text-xs font-bold transition-all ${selectedCategory === cat.value ? 'bg-primary-600 text-white shadow-lg shadow-primary-500/20' : 'bg-slate-50 text-slate-500 hover:bg-slate-100'
                                                     }`}
                                             >
-                                                {cat}
+                                                {withCount(cat.value, cat.count)}
                                             </button>
                                         ))}
                                     </div>
                                 </div>
                                 <div className="space-y-4">
                                     <label className="text-[10px] font-black text-slate-400 uppercase tracking-[0.2em]">Location Type</label>
-                                    <select className="input-field py-2 text-sm">
-                                        <option>All Locations</option>
-                                        <option>Tunis</option>
-                                        <option>Sousse</option>
-                                        <option>Remote</option>
+                                    <select className="input-field py-2 text-sm" value={location} onChange={(e) => setLocation(e.target.value)}>
+                                        <option value="">All Locations</option>
+                                        {locations.map(facet => (
+                                            <option key={facet.value} value={facet.value}>{withCount(facet.value, facet.count)}</option>
+                                        ))}
                                     </select>
                                 </div>
                                 <div className="space-y-4">
                                     <label className="text-[10px] font-black text-slate-400 uppercase tracking-[0.2em]">Stipend Range</label>
-                                    <select className="input-field py-2 text-sm">
-                                        <option>Any Pay</option>
-                                        <option>Paid Only</option>
-                                        <option>400 DT+</option>
+                                    <select className="input-field py-2 text-sm" value={pay} onChange={(e) => setPay(e.target.value)}>
+                                        <option value="">Any Pay</option>
+                                        <option value="paid">{withCount('Paid Only', payCount('paid'))}</option>
+                                        <option value="unpaid">{withCount('Unpaid', payCount('unpaid'))}</option>
                                     </select>
                                 </div>
                                 <div className="space-y-4">
                                     <label className="text-[10px] font-black text-slate-400 uppercase tracking-[0.2em]">Duration</label>
-                                    <select className="input-field py-2 text-sm">
-                                        <option>Any Length</option>
-                                        <option>3 Months</option>
-                                        <option>6 Months</option>
+                                    <select className="input-field py-2 text-sm" value={duration} onChange={(e) => setDuration(e.target.value)}>
+                                        <option value="">Any Length</option>
+                                        {durations.map(facet => (
+                                            <option key={facet.value} value={facet.value}>{withCount(facet.value, facet.count)}</option>
+                                        ))}
                                     </select>
                                 </div>
                             </div>
@@ -162,13 +208,14 @@ const BrowseOffers = () => {
                         Array(6).fill(0).map((_, i) => (
                             <div key={i} className="bg-white rounded-[2.5rem] aspect-[4/5] border border-slate-100 animate-pulse" />
                         ))
-                    ) : filteredOffers.length > 0 ? (
-                        filteredOffers.map((offer, i) => (
+                    ) : offers.length > 0 ? (
+                        offers.map((offer, i) => (
                             <motion.div
                                 key={offer.id}
                                 initial={{ opacity: 0, y: 20 }}
                                 animate={{ opacity: 1, y: 0 }}
-                                transition={{ delay: i * 0.1 }}
+                                // Staggered within each loaded page, not across the whole list
+                                transition={{ delay: (i % 20) * 0.1 }}
                             >
                                 <OfferCard service={offer} />
                             </motion.div>
@@ -183,6 +230,7 @@ const BrowseOffers = () => {
                         </div>
                     )}
                 </div>
+                {!loading && <LoadMore cursor={nextCursor} loading={loadingMore} onLoad={loadMore} className="mt-12" />}
 
                 {/* Top Companies Section */}
                 <div className="mt-32 pt-20 border-t border-slate-100">
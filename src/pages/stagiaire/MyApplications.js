@@ -4,19 +4,43 @@ import {
     XCircle, AlertCircle, Search, Sparkles,
     Layout
 } from 'lucide-react';
-import { applicationApi } from '../../api/api';
+import { applicationApi, openEventStream } from '../../api/api';
 import ApplicationCard from '../../components/applications/ApplicationCard';
+import LoadMore from '../../components/common/LoadMore';
 import { motion } from 'framer-motion';
 
 const MyApplications = () => {
     const [applications, setApplications] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [summary, setSummary] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // The list is paginated, so the counts come from the server rather than from the loaded pages
+    const fetchSummary = () => applicationApi.getStagiaireSummary()
+        .then((response) => setSummary(response.data))
+        .catch((error) => console.error('Summary Load Error:', error));
+
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const response = await applicationApi.getStagiaireApplications({ cursor: nextCursor });
+            setApplications((current) => [...current, ...response.data.items]);
+            setNextCursor(response.data.next_cursor);
+        } catch (error) {
+            console.error('Pagination Error:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     useEffect(() => {
         const fetchApplications = async () => {
+            fetchSummary();
             try {
                 const response = await applicationApi.getStagiaireApplications();
-                setApplications(response.data);
+                setApplications(response.data.items);
+                setNextCursor(response.data.next_cursor);
             } catch (error) {
                 // Mock applications
                 setApplications([
@@ -29,12 +53,30 @@ const MyApplications = () => {
             }
         };
         fetchApplications();
+
+        // Status changes are pushed by the server instead of re-fetching the list
+        let opened = false;
+        return openEventStream({
+            'application.status_changed': (event) => {
+                const change = JSON.parse(event.data);
+                setApplications((current) => current.map((app) => (
+                    app.id === change.application_id ? { ...app, status: change.status } : app
+                )));
+                fetchSummary();
+            },
+            // Fell too far behind: events may have been missed
+            overflow: fetchApplications,
+        }, () => {
+            // Reconnected: events may have been missed meanwhile
+            if (opened) fetchApplications();
+            opened = true;
+        });
     }, []);
 
     const stats = [
-        { label: 'Protocols Active', value: applications.length, icon: Layout, color: 'blue' },
-        { label: 'Success Clearanced', value: applications.filter(a => a.status === 'accepted').length, icon: CheckCircle, color: 'emerald' },
-        { label: 'Pending Response', value: applications.filter(a => a.status === 'pending').length, icon: Clock, color: 'amber' },
+        { label: 'Protocols Active', value: summary ? summary.total : applications.length, icon: Layout, color: 'blue' },
+        { label: 'Success Clearanced', value: summary ? summary.counts.accepted : applications.filter(a => a.status === 'accepted').length, icon: CheckCircle, color: 'emerald' },
+        { label: 'Pending Response', value: summary ? summary.counts.pending : applications.filter(a => a.status === 'pending').length, icon: Clock, color: 'amber' },
     ];
 
     return (
@@ -75,9 +117,12 @@ const MyApplications = () => {
                     {loading ? (
                         [1, 2, 3].map(i => <div key={i} className="h-40 bg-white rounded-[2rem] border border-slate-100 animate-pulse" />)
                     ) : applications.length > 0 ? (
-                        applications.map((app) => (
-                            <ApplicationCard key={app.id} application={app} />
-                        ))
+                        <>
+                            {applications.map((app) => (
+                                <ApplicationCard key={app.id} application={app} />
+                            ))}
+                            <LoadMore cursor={nextCursor} loading={loadingMore} onLoad={loadMore} />
+                        </>
                     ) : (
                         <div className="bg-white rounded-[3rem] p-20 text-center border border-slate-100 shadow-sm">
                             <div className="w-20 h-20 bg-slate-50 flex items-center justify-center rounded-full mx-auto mb-8 text-slate-300">
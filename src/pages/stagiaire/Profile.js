@@ -30,6 +30,18 @@ const Profile = () => {
             setUploading(false);
         }
     };
+
+    const handleViewCV = async (event) => {
+        event.stopPropagation();
+        try {
+            const response = await authService.downloadCV(user.id);
+            const url = URL.createObjectURL(response.data);
+            window.open(url, '_blank', 'noreferrer');
+            setTimeout(() => URL.revokeObjectURL(url), 60000);
+        } catch (error) {
+            toast.error('Failed to open CV');
+        }
+    };
     return (
         <div className="max-w-4xl mx-auto px-4 py-12">
             <motion.div
@@ -140,14 +152,13 @@ const Profile = () => {
                                 </div>
                             </div>
                             {user.cv_url && !uploading && (
-                                <a
-                                    href={`http://localhost:8000${user.cv_url}`}
-                                    target="_blank"
-                                    rel="noreferrer"
+                                <button
+                                    type="button"
+                                    onClick={handleViewCV}
                                     className="relative z-20 bg-white px-4 py-2 rounded-xl text-[10px] font-black uppercase tracking-widest text-emerald-600 border border-emerald-100 shadow-sm hover:bg-emerald-600 hover:text-white transition-all"
                                 >
                                     View CV
-                                </a>
+                                </button>
                             )}
                         </div>
                     </div>